@@ -0,0 +1,69 @@
+"""Measure model cold-start time from local artifacts.
+
+Each run loads every registered model in a fresh interpreter, so runs are independent
+and repeatable; the first run also includes a cold OS page cache if nothing has touched
+the artifacts yet. Run from the repository root:
+    python -m ai_engine.benchmarks.bench_cold_start --runs 5
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+from typing import Dict, List
+
+CHILD = r"""
+import json, time
+started = time.perf_counter()
+from ai_engine.utils.model_registry import ModelUnavailableError, model_registry
+model_registry.preflight()
+imported = time.perf_counter() - started
+for name in model_registry.specs:
+    try:
+        model_registry.load(name)
+    except ModelUnavailableError:
+        pass
+report = model_registry.status()
+report["import_seconds"] = round(imported, 3)
+report["total_seconds"] = round(time.perf_counter() - started, 3)
+print(json.dumps(report))
+"""
+
+
+def run_once() -> Dict:
+    output = subprocess.run([sys.executable, "-c", CHILD], check=True, capture_output=True, text=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def summarize(label: str, values: List[float]) -> str:
+    if not values:
+        return f"{label:<24} {'-':>8}"
+    return f"{label:<24} {min(values):>8.3f} {statistics.median(values):>8.3f} {max(values):>8.3f}"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    reports = [run_once() for _ in range(args.runs)]
+
+    print(f"{'seconds':<24} {'min':>8} {'median':>8} {'max':>8}")
+    print("-" * 51)
+    print(summarize("preflight", [r["preflight_seconds"] for r in reports]))
+    for model in reports[0]["models"]:
+        name = model["name"]
+        loads = [m["load_seconds"] for r in reports for m in r["models"] if m["name"] == name and m["load_seconds"] is not None]
+        line = summarize(name, loads)
+        if not loads:
+            line += f"  ({model['state']})"
+        print(line)
+    print(summarize("total", [r["total_seconds"] for r in reports]))
+    print(f"\nfirst run total: {reports[0]['total_seconds']:.3f}s (includes cold page cache)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""Benchmark rule-based vs T5 model grammar correction.
+
+Reports per-request latency (p50/p95) and sentence throughput for each backend, and for
+the model backend both a cold pass (every sentence generated) and a warm pass (served
+from the sentence cache). Run from the repository root:
+    python -m ai_engine.benchmarks.bench_correction --requests 50 --sentences 8
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import statistics
+import time
+from typing import Callable, List
+
+from ai_engine.engines.correction_engine import CorrectionEngine
+from ai_engine.engines.model_correction_engine import ModelCorrectionEngine
+
+SENTENCES = [
+    "I didn't knew the exact location so I was asking to many peoples.",
+    "She go to school every days.",
+    "We meeted the manager yesterday and he was very angrily.",
+    "The team have finish the works soonly.",
+    "He can sings very well.",
+    "There is a apple on the table.",
+    "They was late for the meeting because of the traffics.",
+    "I am go to the market tomorrow.",
+    "This informations are not correct.",
+    "Everyone in the offices like the new policy.",
+]
+
+
+def make_requests(count: int, sentences_per_request: int, unique: bool = False, seed: int = 11) -> List[str]:
+    """Random requests; with `unique`, every sentence is made distinct so none hits the cache."""
+    rng = random.Random(seed)
+    requests = []
+    for i in range(count):
+        sentences = []
+        for j in range(sentences_per_request):
+            sentence = rng.choice(SENTENCES)
+            if unique:
+                sentence = f"{sentence[:-1]} on day {i * sentences_per_request + j}."
+            sentences.append(sentence)
+        requests.append(" ".join(sentences))
+    return requests
+
+
+def timed(fn: Callable[[str], object], requests: List[str]) -> List[float]:
+    latencies = []
+    for text in requests:
+        start = time.perf_counter()
+        fn(text)
+        latencies.append(time.perf_counter() - start)
+    return latencies
+
+
+def report(label: str, latencies: List[float], sentences: int) -> None:
+    ordered = sorted(latencies)
+    p95 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+    total = sum(latencies)
+    print(
+        f"{label:<22} {statistics.median(ordered) * 1000:>9.1f} {p95 * 1000:>9.1f} "
+        f"{sentences / total if total else float('inf'):>12.1f}"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=50)
+    parser.add_argument("--sentences", type=int, default=8, help="sentences per request")
+    parser.add_argument("--batch-size", type=int, default=32)
+    args = parser.parse_args()
+
+    requests = make_requests(args.requests, args.sentences)
+    sentence_count = args.requests * args.sentences
+
+    rules = CorrectionEngine()
+    model = ModelCorrectionEngine(batch_size=args.batch_size)
+
+    print(f"{'backend':<22} {'p50 ms':>9} {'p95 ms':>9} {'sentences/s':>12}")
+    print("-" * 55)
+    report("rules", timed(rules.analyze, requests), sentence_count)
+    if not model.available:
+        print(f"model                  unavailable: {model.load_error}")
+        return
+
+    cold_requests = make_requests(args.requests, args.sentences, unique=True)
+    report("model (cold)", timed(model.analyze, cold_requests), sentence_count)
+    report("model (cached)", timed(model.analyze, cold_requests), sentence_count)
+
+    model._cache.clear()
+    start = time.perf_counter()
+    model.analyze_batch(cold_requests)
+    elapsed = time.perf_counter() - start
+    print(f"{'model (one batch)':<22} {'':>9} {'':>9} {sentence_count / elapsed:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""Benchmark standard vs compact /analyze response encoding.
+
+Run from the repository root:
+    python -m ai_engine.benchmarks.bench_response_encoding
+"""
+
+from __future__ import annotations
+
+import gzip
+import random
+import time
+from typing import Dict, List
+
+from ai_engine.models.response_models import AnalyzeResponse
+from ai_engine.utils.response_utils import build_compact_changes, dumps
+
+SIZES = [1_000, 5_000, 10_000, 50_000]
+REPEATS = 5
+
+DEFAULT_REASONS = {
+    "modification": "AI adjusted this word to better match the target tone and flow.",
+    "addition": "AI added this to improve narrative clarity.",
+    "deletion": "AI removed this for conciseness.",
+}
+WORDS = ["the", "quick", "brown", "fox", "jumps", "over", "lazy", "dog", "meeted", "soonly"]
+
+
+def make_changes(count: int, seed: int = 7) -> List[Dict[str, str]]:
+    rng = random.Random(seed)
+    changes = []
+    for _ in range(count):
+        change_type = rng.choice(list(DEFAULT_REASONS))
+        changes.append({
+            "type": change_type,
+            "before": "" if change_type == "addition" else rng.choice(WORDS),
+            "after": "" if change_type == "deletion" else rng.choice(WORDS),
+            "reason": DEFAULT_REASONS[change_type],
+        })
+    return changes
+
+
+def best_of(fn) -> tuple[float, bytes]:
+    best, body = float("inf"), b""
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        body = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, body
+
+
+def main() -> None:
+    base = {
+        "consistency_score": 0.9,
+        "readability_score": 60.0,
+        "detected_tone": "neutral",
+        "modified_text": "",
+        "explanation": ["Change tracker detected changes."],
+    }
+
+    print(f"{'changes':>8} | {'standard ms':>11} {'bytes':>10} {'gzip':>9} | {'compact ms':>10} {'bytes':>10} {'gzip':>9}")
+    print("-" * 80)
+    for size in SIZES:
+        changes = make_changes(size)
+
+        standard_time, standard_body = best_of(
+            lambda: AnalyzeResponse(**base, changes=changes).model_dump_json().encode("utf-8")
+        )
+        compact_time, compact_body = best_of(
+            lambda: dumps({**base, "changes": build_compact_changes(changes)})
+        )
+
+        print(
+            f"{size:>8} | {standard_time * 1000:>11.2f} {len(standard_body):>10} {len(gzip.compress(standard_body)):>9} | "
+            f"{compact_time * 1000:>10.2f} {len(compact_body):>10} {len(gzip.compress(compact_body)):>9}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,165 @@
+"""Benchmark adaptive tone decoding (skip / greedy / beam) against always-beam.
+
+Runs every item of benchmarks/data/tone_eval.jsonl through ToneControlEngine twice:
+once forced to beam search and once with the adaptive policy. Reports p50/p95 latency,
+how often each policy was chosen, skip precision (skipped items whose gold tone already
+matched the target) and rewrite agreement with the beam output, then compares rewriting
+each text into several tones one call at a time against one analyze_tones call. Run
+from the repository root:
+    python -m ai_engine.benchmarks.bench_tone_policy --repeat 3
+
+`--calibrate` refits the marker classifier's Platt scaling on data/tone_train.jsonl, reports
+calibration on the eval file and prints the constants to paste into the classifier; it
+needs no model.
+"""
+
+from __future__ import annotations
+
+import argparse
+import difflib
+import json
+import math
+import statistics
+import time
+from collections import Counter
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+EVAL_PATH = Path(__file__).parent / "data" / "tone_eval.jsonl"
+# Calibration is fitted on the training split so the eval file stays held out
+TRAIN_PATH = Path(__file__).parent.parent / "data" / "tone_train.jsonl"
+
+
+def load_eval(path: Path) -> List[Dict[str, str]]:
+    with path.open("r", encoding="utf-8") as fp:
+        return [json.loads(line) for line in fp if line.strip()]
+
+
+def fit_platt(points: List[Tuple[float, int]], steps: int = 5000, lr: float = 0.1) -> Tuple[float, float]:
+    """Logistic regression of correctness on margin by batch gradient descent."""
+    slope, intercept = 1.0, 0.0
+    for _ in range(steps):
+        grad_slope = grad_intercept = 0.0
+        for x, y in points:
+            p = 1.0 / (1.0 + math.exp(-(slope * x + intercept)))
+            grad_slope += (p - y) * x
+            grad_intercept += p - y
+        slope -= lr * grad_slope / len(points)
+        intercept -= lr * grad_intercept / len(points)
+    return slope, intercept
+
+
+def expected_calibration_error(scored: List[Tuple[float, int]], bins: int = 10) -> float:
+    total = 0.0
+    for b in range(bins):
+        members = [(p, y) for p, y in scored if b / bins <= p < (b + 1) / bins or (b == bins - 1 and p == 1.0)]
+        if members:
+            confidence = sum(p for p, _ in members) / len(members)
+            accuracy = sum(y for _, y in members) / len(members)
+            total += len(members) / len(scored) * abs(confidence - accuracy)
+    return total
+
+
+def _marker_points(classifier, items: List[Dict[str, str]]) -> List[Tuple[float, int]]:
+    points = []
+    for item in items:
+        label, margin = classifier.margin(item["text"])
+        points.append((float(margin), int(label == item["tone"])))
+    return points
+
+
+def calibrate(train_items: List[Dict[str, str]], eval_items: List[Dict[str, str]]) -> None:
+    from ai_engine.engines.tone_classifier import MarkerToneClassifier
+
+    classifier = MarkerToneClassifier()
+    slope, intercept = fit_platt(_marker_points(classifier, train_items))
+
+    points = _marker_points(classifier, eval_items)
+    before = [(classifier.predict(item["text"])[1], y) for item, (_, y) in zip(eval_items, points)]
+    after = [(1.0 / (1.0 + math.exp(-(slope * x + intercept))), y) for x, y in points]
+
+    print(f"eval accuracy       {sum(y for _, y in points) / len(points):.3f}")
+    print(f"eval ECE (current)  {expected_calibration_error(before):.3f}")
+    print(f"eval ECE (refitted) {expected_calibration_error(after):.3f}")
+    print(f"PLATT_SLOPE = {slope:.4f}")
+    print(f"PLATT_INTERCEPT = {intercept:.4f}")
+
+
+def percentile(values: List[float], q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * q))]
+
+
+def run(engine, items: List[Dict[str, str]], policy, repeat: int):
+    latencies, results = [], []
+    for _ in range(repeat):
+        results = []
+        for item in items:
+            start = time.perf_counter()
+            results.append(engine.analyze(item["text"], item["target"], policy=policy))
+            latencies.append(time.perf_counter() - start)
+    return latencies, results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--eval-file", type=Path, default=EVAL_PATH)
+    parser.add_argument("--train-file", type=Path, default=TRAIN_PATH, help="calibration split for --calibrate")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--calibrate", action="store_true", help="refit Platt scaling and exit")
+    parser.add_argument("--tones", default="formal,informal,neutral", help="tones for the multi-tone comparison")
+    args = parser.parse_args()
+
+    items = load_eval(args.eval_file)
+    if args.calibrate:
+        calibrate(load_eval(args.train_file), items)
+        return
+
+    from ai_engine.engines.tone_engine import ToneControlEngine
+
+    engine = ToneControlEngine()
+    if engine.model is None:
+        print(f"tone model unavailable: {engine.load_error}")
+        return
+    run(engine, items[:2], "beam", 1)  # warm up
+
+    beam_latencies, beam_results = run(engine, items, "beam", args.repeat)
+    adaptive_latencies, adaptive_results = run(engine, items, None, args.repeat)
+
+    print(f"{'policy':<10} {'p50 ms':>9} {'p95 ms':>9}")
+    print("-" * 30)
+    for label, latencies in (("beam", beam_latencies), ("adaptive", adaptive_latencies)):
+        print(f"{label:<10} {statistics.median(latencies) * 1000:>9.1f} {percentile(latencies, 0.95) * 1000:>9.1f}")
+
+    chosen = Counter(result.decoding_policy for result in adaptive_results)
+    print("\nchosen: " + ", ".join(f"{name}={chosen.get(name, 0)}" for name in ("skip", "greedy", "beam")))
+
+    skipped = [item for item, result in zip(items, adaptive_results) if result.decoding_policy == "skip"]
+    if skipped:
+        correct = sum(item["tone"] == item["target"] for item in skipped)
+        print(f"skip precision: {correct}/{len(skipped)}")
+
+    similarity = [
+        difflib.SequenceMatcher(a=beam.modified_text, b=adaptive.modified_text).ratio()
+        for beam, adaptive in zip(beam_results, adaptive_results)
+    ]
+    print(f"agreement with beam: mean similarity {statistics.mean(similarity):.3f}, "
+          f"identical {sum(s == 1.0 for s in similarity)}/{len(similarity)}")
+
+    tones = args.tones.split(",")
+    sequential, combined = [], []
+    for item in items:
+        start = time.perf_counter()
+        for tone in tones:
+            engine.analyze(item["text"], tone, policy="beam")
+        sequential.append(time.perf_counter() - start)
+        start = time.perf_counter()
+        engine.analyze_tones(item["text"], tones, policy="beam")
+        combined.append(time.perf_counter() - start)
+    print(f"\n{len(tones)} tones per text   {'p50 ms':>9} {'p95 ms':>9}")
+    for label, latencies in (("one call per tone", sequential), ("analyze_tones", combined)):
+        print(f"{label:<19} {statistics.median(latencies) * 1000:>9.1f} {percentile(latencies, 0.95) * 1000:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,270 @@
+"""Serve several LoRA adapters on one shared base model."""
+
+from __future__ import annotations
+
+import os
+import threading
+import time
+from collections import deque
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+import torch
+from peft import PeftModel
+
+ADAPTER_WEIGHT_FILES = ("adapter_model.safetensors", "adapter_model.bin")
+
+
+def _fingerprint(path: Path) -> float:
+    """Latest modification time of the adapter's config and weights."""
+    files = [path / "adapter_config.json", *(path / name for name in ADAPTER_WEIGHT_FILES)]
+    return max((f.stat().st_mtime for f in files if f.exists()), default=0.0)
+
+
+@dataclass
+class AdapterEntry:
+    """One loaded adapter and its serving statistics."""
+
+    name: str
+    path: str
+    version: int
+    fingerprint: float
+    loaded_at: float = field(default_factory=time.time)
+    requests: int = 0
+    batches: int = 0
+    latencies_ms: Deque[float] = field(default_factory=lambda: deque(maxlen=512))
+
+    @property
+    def internal_name(self) -> str:
+        # PEFT cannot rename adapters, so each reload gets a fresh versioned name
+        return f"{self.name}__v{self.version}"
+
+
+class _Batch:
+    """Prompts for one adapter, collected from concurrent callers for one generate() call."""
+
+    def __init__(self, key: Tuple[str, tuple], generate_kwargs: Dict[str, Any]) -> None:
+        self.key = key
+        self.generate_kwargs = generate_kwargs
+        self.created = time.monotonic()
+        self.prompts: List[str] = []
+        self.outputs: List[str] = []
+        self.error: Optional[BaseException] = None
+        self.done = threading.Event()
+
+
+class LoRAAdapterManager:
+    """
+    Keeps one base model in memory with any number of PEFT LoRA adapters side by side.
+
+    The model runs one batch at a time (switching the active adapter is global state), so
+    `generate()` micro-batches: prompts for the same adapter and decoding settings, from
+    one call or from concurrent requests, join an open batch. The caller that opened it
+    waits up to `batch_window_ms`, plus however long the model is busy, then runs every
+    prompt collected so far (at most `max_batch_size`) as one padded generate() call.
+
+    `load()` on an existing name loads the new weights under a new version, switches
+    routing to it, then frees the old one, so in-flight requests never see a half-loaded
+    adapter. `refresh()` reloads adapters whose files changed, unloads ones whose
+    directory is gone and picks up new adapter directories.
+    """
+
+    DEFAULT_ADAPTER = "default"
+
+    def __init__(
+        self,
+        base_model: Any,
+        tokenizer: Any,
+        device: str = "cpu",
+        batch_window_ms: Optional[float] = None,
+        max_batch_size: Optional[int] = None,
+    ) -> None:
+        self.base_model = base_model
+        self.tokenizer = tokenizer
+        self.device = device
+        self.batch_window = (
+            batch_window_ms if batch_window_ms is not None else float(os.getenv("TONE_BATCH_WINDOW_MS", 5))
+        ) / 1000
+        self.max_batch_size = max_batch_size or int(os.getenv("TONE_MAX_BATCH_SIZE", 32))
+        self.model: Optional[PeftModel] = None
+        self._adapters: Dict[str, AdapterEntry] = {}
+        self._adapter_dirs: List[Path] = []
+        self._lock = threading.RLock()
+        # (adapter, decoding settings) -> batch still accepting prompts
+        self._pending: Dict[Tuple[str, tuple], _Batch] = {}
+        self._pending_lock = threading.Lock()
+
+    @staticmethod
+    def adapter_key(tone: str) -> str:
+        return "_".join(tone.lower().split())
+
+    def load(self, name: str, path: Path) -> AdapterEntry:
+        """Load (or hot-reload) adapter `name` from `path`."""
+        path = Path(path)
+        with self._lock:
+            previous = self._adapters.get(name)
+            entry = AdapterEntry(name, str(path), previous.version + 1 if previous else 1, _fingerprint(path))
+            if self.model is None:
+                self.model = PeftModel.from_pretrained(
+                    self.base_model, str(path), adapter_name=entry.internal_name, local_files_only=True
+                )
+            else:
+                self.model.load_adapter(str(path), adapter_name=entry.internal_name, local_files_only=True)
+            self.model.to(self.device)
+            self.model.eval()
+            self._adapters[name] = entry
+            if previous is not None:
+                self.model.delete_adapter(previous.internal_name)
+            return entry
+
+    def discover(self, adapter_dir: Path, failed: Optional[Dict[str, str]] = None) -> List[str]:
+        """
+        Load every adapter directory under `adapter_dir`; the directory name is the tone.
+        With `failed`, adapters that do not load are recorded there instead of raising.
+        """
+        adapter_dir = Path(adapter_dir)
+        if adapter_dir not in self._adapter_dirs:
+            self._adapter_dirs.append(adapter_dir)
+        loaded = []
+        if not adapter_dir.is_dir():
+            return loaded
+        for path in sorted(adapter_dir.iterdir()):
+            name = self.adapter_key(path.name)
+            if (path / "adapter_config.json").exists() and name not in self._adapters:
+                try:
+                    self.load(name, path)
+                except Exception as exc:  # noqa: BLE001
+                    if failed is None:
+                        raise
+                    failed[name] = f"{type(exc).__name__}: {exc}"
+                    continue
+                loaded.append(name)
+        return loaded
+
+    def refresh(self) -> Dict[str, Any]:
+        """
+        Hot-reload adapters whose files changed on disk, unload ones whose directory is
+        gone and load newly added ones. One adapter failing to load does not stop the
+        others; it keeps serving its previous version and is reported under `failed`.
+        The default adapter is never unloaded, since every other tone falls back to it.
+        """
+        reloaded: List[str] = []
+        removed: List[str] = []
+        failed: Dict[str, str] = {}
+        with self._lock:
+            for entry in list(self._adapters.values()):
+                path = Path(entry.path)
+                if not (path / "adapter_config.json").exists():
+                    if entry.name == self.DEFAULT_ADAPTER:
+                        failed[entry.name] = f"adapter_config.json missing in {path}; keeping the loaded version"
+                    else:
+                        del self._adapters[entry.name]
+                        self.model.delete_adapter(entry.internal_name)
+                        removed.append(entry.name)
+                elif _fingerprint(path) != entry.fingerprint:
+                    try:
+                        self.load(entry.name, path)
+                        reloaded.append(entry.name)
+                    except Exception as exc:  # noqa: BLE001
+                        failed[entry.name] = f"{type(exc).__name__}: {exc}"
+            for adapter_dir in self._adapter_dirs:
+                reloaded += self.discover(adapter_dir, failed)
+        return {"reloaded": reloaded, "removed": removed, "failed": failed}
+
+    def route(self, tone: str) -> str:
+        """Adapter for a tone: a dedicated one if loaded, else the default adapter."""
+        name = self.adapter_key(tone)
+        return name if name in self._adapters else self.DEFAULT_ADAPTER
+
+    def _join(self, name: str, prompts: List[str], generate_kwargs: Dict[str, Any]) -> Tuple[_Batch, int, bool]:
+        """Add prompts to the open batch for their adapter; returns (batch, offset, opened it)."""
+        key = (name, tuple(sorted(generate_kwargs.items())))
+        with self._pending_lock:
+            batch = self._pending.get(key)
+            opened = batch is None or len(batch.prompts) + len(prompts) > self.max_batch_size
+            if opened:
+                batch = self._pending[key] = _Batch(key, generate_kwargs)
+            offset = len(batch.prompts)
+            batch.prompts.extend(prompts)
+            return batch, offset, opened
+
+    @torch.inference_mode()
+    def _run(self, batch: _Batch) -> None:
+        remaining = self.batch_window - (time.monotonic() - batch.created)
+        if remaining > 0:
+            time.sleep(remaining)
+        try:
+            with self._lock:
+                # Prompts that arrived while the model was busy ride along in this batch
+                with self._pending_lock:
+                    if self._pending.get(batch.key) is batch:
+                        del self._pending[batch.key]
+                entry = self._adapters[batch.key[0]]
+                started = time.perf_counter()
+                self.model.set_adapter(entry.internal_name)
+                inputs = self.tokenizer(batch.prompts, return_tensors="pt", padding=True, truncation=True).to(self.device)
+                generated = self.model.generate(**inputs, **batch.generate_kwargs)
+                elapsed_ms = (time.perf_counter() - started) * 1000
+            entry.requests += len(batch.prompts)
+            entry.batches += 1
+            entry.latencies_ms.append(elapsed_ms)
+            batch.outputs = [text.strip() for text in self.tokenizer.batch_decode(generated, skip_special_tokens=True)]
+        except BaseException as exc:
+            batch.error = exc
+        finally:
+            batch.done.set()
+
+    def generate(self, requests: List[Tuple[str, str]], **generate_kwargs: Any) -> List[str]:
+        """Generate for (adapter name, prompt) pairs, micro-batched per adapter (see class docs)."""
+        groups: Dict[str, List[int]] = {}
+        for index, (name, _) in enumerate(requests):
+            groups.setdefault(name, []).append(index)
+
+        joined = [
+            (indices, *self._join(name, [requests[i][1] for i in indices], generate_kwargs))
+            for name, indices in groups.items()
+        ]
+        # Run the batches this call opened before waiting on others, so callers never wait on each other in a cycle
+        for _, batch, _, opened in joined:
+            if opened:
+                self._run(batch)
+
+        outputs: List[str] = [""] * len(requests)
+        for indices, batch, offset, _ in joined:
+            batch.done.wait()
+            if batch.error is not None:
+                raise batch.error
+            for i, text in zip(indices, batch.outputs[offset:offset + len(indices)]):
+                outputs[i] = text
+        return outputs
+
+    def _adapter_bytes(self, internal_name: str) -> Tuple[int, int]:
+        marker = f".{internal_name}."
+        params = [p for n, p in self.model.named_parameters() if marker in n]
+        return sum(p.numel() for p in params), sum(p.numel() * p.element_size() for p in params)
+
+    def stats(self) -> Dict[str, Any]:
+        """Base model memory plus per-adapter parameter memory and batch latency."""
+        with self._lock:
+            if self.model is None:
+                return {"base_memory_bytes": 0, "adapters": []}
+            internal = {entry.internal_name for entry in self._adapters.values()}
+            base_bytes = sum(
+                p.numel() * p.element_size()
+                for n, p in self.model.named_parameters()
+                if not any(f".{name}." in n for name in internal)
+            )
+            adapters = []
+            for entry in self._adapters.values():
+                params, memory = self._adapter_bytes(entry.internal_name)
+                latencies = sorted(entry.latencies_ms)
+                report = {k: v for k, v in asdict(entry).items() if k != "latencies_ms"}
+                report.update(
+                    parameters=params,
+                    memory_bytes=memory,
+                    p50_batch_ms=round(latencies[len(latencies) // 2], 1) if latencies else None,
+                    p95_batch_ms=round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))], 1) if latencies else None,
+                )
+                adapters.append(report)
+            return {"base_memory_bytes": base_bytes, "adapters": adapters}
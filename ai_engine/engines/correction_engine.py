@@ -3,6 +3,7 @@ import re
 from dataclasses import dataclass
 from typing import List, Dict
 from textblob import TextBlob
+from ai_engine.utils.model_registry import ModelUnavailableError, model_registry
 from ai_engine.utils.text_utils import normalize_text
 
 @dataclass
@@ -15,9 +16,10 @@ class CorrectionEngine:
     """Provides word-level spelling and basic grammar correction."""
 
     def __init__(self) -> None:
+        # Shared with the narrative engine through the model registry
         try:
-            self.nlp = spacy.load("en_core_web_sm")
-        except:
+            self.nlp = model_registry.load("en_core_web_sm")
+        except ModelUnavailableError:
             self.nlp = spacy.blank("en")
 
     def _should_correct(self, token) -> bool:
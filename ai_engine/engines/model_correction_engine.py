@@ -0,0 +1,170 @@
+"""Grammar correction backed by the fine-tuned T5 model in custom_grammar_model."""
+
+from __future__ import annotations
+
+import difflib
+import hashlib
+import re
+import string
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+import torch
+
+from ai_engine.engines.correction_engine import CorrectionResult
+from ai_engine.utils.model_registry import ModelUnavailableError, model_registry
+
+# Splits after sentence-final punctuation, keeping the whitespace so text can be rebuilt
+_SENTENCE_BREAK = re.compile(r"((?<=[.!?])\s+)")
+_PUNCTUATION = set(string.punctuation)
+
+
+def _strip_punctuation(word: str) -> str:
+    return "".join(ch for ch in word if ch not in _PUNCTUATION)
+
+
+def _edit_reason(change_type: str, before: str, after: str) -> str:
+    if change_type == "addition":
+        return "Missing word added for grammatical correctness."
+    if change_type == "deletion":
+        return "Unnecessary word removed."
+    if before.lower() == after.lower():
+        return "Capitalization correction."
+    if _strip_punctuation(before).lower() == _strip_punctuation(after).lower():
+        return "Punctuation correction."
+    if " " not in before and " " not in after and difflib.SequenceMatcher(a=before.lower(), b=after.lower()).ratio() >= 0.75:
+        return "Spelling or word form correction."
+    return "Grammar correction suggested by the language model."
+
+
+def word_edits(original: str, corrected: str) -> List[Dict[str, str]]:
+    """Word-level changes between a sentence and its correction, with reasons."""
+    original_words = original.split()
+    corrected_words = corrected.split()
+    matcher = difflib.SequenceMatcher(a=original_words, b=corrected_words, autojunk=False)
+    changes: List[Dict[str, str]] = []
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == "equal":
+            continue
+        change_type = {"insert": "addition", "delete": "deletion"}.get(tag, "modification")
+        before = " ".join(original_words[i1:i2])
+        after = " ".join(corrected_words[j1:j2])
+        changes.append({"type": change_type, "before": before, "after": after, "reason": _edit_reason(change_type, before, after)})
+    return changes
+
+
+class ModelCorrectionEngine:
+    """
+    Sentence-level grammar correction with the fine-tuned T5 model.
+
+    Uncached sentences of a request (or of several requests via `analyze_batch`) are
+    sorted by token length and generated in length buckets of `batch_size`, so padding
+    stays small. Corrections are cached per sentence hash.
+    """
+
+    PREFIX = "grammar: "
+    # Matches the training max_length; longer sentences are left untouched instead of truncated
+    MAX_INPUT_TOKENS = 128
+    CACHE_SIZE = 50_000
+
+    def __init__(self, batch_size: int = 32, num_beams: int = 1) -> None:
+        self.batch_size = batch_size
+        self.num_beams = num_beams
+        self.device = "cuda" if torch.cuda.is_available() else "cpu"
+        self.model = None
+        self.tokenizer = None
+        self.load_error: Optional[str] = None
+        self._cache: "OrderedDict[str, str]" = OrderedDict()
+        # Sync handlers share the engine across threadpool workers
+        self._cache_lock = threading.Lock()
+        self._load_model()
+
+    def _load_model(self) -> None:
+        try:
+            self.tokenizer, self.model = model_registry.load("custom_grammar_model")
+            self.model.to(self.device)
+            self.model.eval()
+        except ModelUnavailableError as exc:
+            self.load_error = str(exc)
+
+    @property
+    def available(self) -> bool:
+        return self.model is not None
+
+    @staticmethod
+    def _cache_key(sentence: str) -> str:
+        return hashlib.sha1(sentence.encode("utf-8")).hexdigest()
+
+    @torch.inference_mode()
+    def _generate(self, sentences: List[str]) -> List[str]:
+        """Correct unique sentences in length-bucketed batches; returns outputs in input order."""
+        encoded = self.tokenizer([self.PREFIX + s for s in sentences], add_special_tokens=True)["input_ids"]
+        outputs: List[str] = list(sentences)
+        order = sorted(
+            (i for i, ids in enumerate(encoded) if len(ids) <= self.MAX_INPUT_TOKENS),
+            key=lambda i: len(encoded[i]),
+        )
+        for start in range(0, len(order), self.batch_size):
+            bucket = order[start:start + self.batch_size]
+            batch = self.tokenizer.pad({"input_ids": [encoded[i] for i in bucket]}, return_tensors="pt").to(self.device)
+            longest = max(len(encoded[i]) for i in bucket)
+            generated = self.model.generate(
+                **batch,
+                max_new_tokens=min(self.MAX_INPUT_TOKENS, int(longest * 1.5) + 8),
+                num_beams=self.num_beams,
+                do_sample=False,
+            )
+            for i, text in zip(bucket, self.tokenizer.batch_decode(generated, skip_special_tokens=True)):
+                outputs[i] = text.strip() or sentences[i]
+        return outputs
+
+    def correct_sentences(self, sentences: List[str]) -> List[str]:
+        if not self.available:
+            raise RuntimeError(f"Grammar model not loaded: {self.load_error}")
+        keys = [self._cache_key(s) for s in sentences]
+        corrections: Dict[str, str] = {}
+        with self._cache_lock:
+            for key in keys:
+                if key in self._cache:
+                    self._cache.move_to_end(key)
+                    corrections[key] = self._cache[key]
+
+        missing = {key: s for key, s in zip(keys, sentences) if key not in corrections}
+        if missing:
+            # Generate outside the lock and read results from `corrections`, so a
+            # concurrent request evicting them from the cache cannot break this one
+            corrections.update(zip(missing, self._generate(list(missing.values()))))
+            with self._cache_lock:
+                for key in missing:
+                    self._cache[key] = corrections[key]
+                while len(self._cache) > self.CACHE_SIZE:
+                    self._cache.popitem(last=False)
+        return [corrections[key] for key in keys]
+
+    def analyze_batch(self, texts: List[str]) -> List[CorrectionResult]:
+        """Correct several texts with one pass over all of their uncached sentences."""
+        pieces = [_SENTENCE_BREAK.split(text) for text in texts]
+        # Even positions are sentences, odd positions the whitespace between them
+        sentences = [p.strip() for parts in pieces for p in parts[0::2] if p.strip()]
+        corrections = dict(zip(sentences, self.correct_sentences(sentences))) if sentences else {}
+
+        results = []
+        for parts in pieces:
+            rebuilt, changes = [], []
+            for index, part in enumerate(parts):
+                sentence = part.strip()
+                if index % 2 == 0 and sentence:
+                    corrected = corrections[sentence]
+                    changes.extend(word_edits(sentence, corrected))
+                    # Keep the whitespace around the sentence as written
+                    start = part.index(sentence)
+                    rebuilt.append(part[:start] + corrected + part[start + len(sentence):])
+                else:
+                    rebuilt.append(part)
+            results.append(CorrectionResult(corrected_text="".join(rebuilt), changes=changes))
+        return results
+
+    def analyze(self, text: str) -> CorrectionResult:
+        """Correct grammar sentence by sentence with the T5 model."""
+        return self.analyze_batch([text])[0]
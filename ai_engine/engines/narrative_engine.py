@@ -2,15 +2,18 @@
 
 from __future__ import annotations
 
-from dataclasses import dataclass
-from typing import Dict, List
+import hashlib
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Dict, List, Literal, Tuple
 
 import numpy as np
 import spacy
-from sentence_transformers import SentenceTransformer
-from sklearn.metrics.pairwise import cosine_similarity
+import torch
 
-from ai_engine.utils.text_utils import normalize_text, split_sentences
+from ai_engine.utils.model_registry import ModelUnavailableError, model_registry
+from ai_engine.utils.text_utils import iter_sections, normalize_text, split_sentences
 
 
 @dataclass
@@ -20,30 +23,111 @@ class NarrativeResult:
     entities: Dict[str, List[str]]
     consistency_score: float
     pairwise_similarities: List[float]
+    nli_pairs_scored: int = 0
+    sections: List["SectionResult"] = field(default_factory=list)
+
+
+@dataclass
+class SectionResult:
+    """Consistency of one chapter-like section in hierarchical analysis."""
+
+    title: str
+    consistency_score: float
+    paragraph_scores: List[float]
+    transition_scores: List[float]
+    sentence_count: int
+
+
+ConsistencyMode = Literal["full", "two_tier"]
 
 
 class NarrativeConsistencyEngine:
     """Analyzes text-level narrative consistency."""
 
+    # Windows whose bi-encoder similarity is below this floor share too little content to
+    # contradict each other and are accepted as consistent; the rest go to the NLI
+    # cross-encoder. High similarity is no evidence of consistency ("Anna was alive" vs
+    # "Anna was dead"), so those windows are never skipped.
+    NLI_SIMILARITY_FLOOR = 0.25
+    EMBEDDING_CACHE_SIZE = 20_000
+    # analyze_document keeps at most this many transition scores and names per entity label
+    MAX_DOCUMENT_SCORES = 1_000
+    MAX_ENTITIES_PER_LABEL = 200
+
     def __init__(self) -> None:
         self._nlp = self._load_spacy_model()
         self._nli_model = self._load_nli_model()
+        self._embedding_model = self._load_embedding_model()
+        self._embedding_cache: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        # Sync handlers share the engine across threadpool workers
+        self._embedding_lock = threading.Lock()
+
+    # Models come from local artifacts only; see ai_engine.utils.model_registry
 
     @staticmethod
     def _load_spacy_model():
         try:
-            return spacy.load("en_core_web_sm")
-        except OSError:
+            return model_registry.load("en_core_web_sm")
+        except ModelUnavailableError:
             return spacy.blank("en")
 
     @staticmethod
     def _load_nli_model():
         try:
-            from sentence_transformers import CrossEncoder
-            return CrossEncoder("cross-encoder/nli-deberta-v3-small")
-        except Exception:  # noqa: BLE001
+            return model_registry.load("nli-deberta-v3-small")
+        except ModelUnavailableError:
+            return None
+
+    @staticmethod
+    def _load_embedding_model():
+        try:
+            return model_registry.load("all-MiniLM-L6-v2")
+        except ModelUnavailableError:
             return None
 
+    def _embed_sentences(self, sentences: List[str]) -> np.ndarray:
+        """Return unit-normalized embeddings, encoding only sentences missing from the cache."""
+        keys = [hashlib.sha1(sentence.encode("utf-8")).hexdigest() for sentence in sentences]
+        vectors: Dict[str, np.ndarray] = {}
+        with self._embedding_lock:
+            for key in keys:
+                vector = self._embedding_cache.get(key)
+                if vector is not None:
+                    self._embedding_cache.move_to_end(key)
+                    vectors[key] = vector
+
+        missing = {key: sentence for key, sentence in zip(keys, sentences) if key not in vectors}
+        if missing:
+            # Encode outside the lock; results are used from `vectors`, so a concurrent
+            # eviction cannot drop them before they are read
+            encoded = self._embedding_model.encode(
+                list(missing.values()),
+                batch_size=64,
+                convert_to_numpy=True,
+                normalize_embeddings=True,
+            )
+            vectors.update(zip(missing.keys(), encoded))
+            with self._embedding_lock:
+                for key in missing:
+                    self._embedding_cache[key] = vectors[key]
+                while len(self._embedding_cache) > self.EMBEDDING_CACHE_SIZE:
+                    self._embedding_cache.popitem(last=False)
+        return np.stack([vectors[key] for key in keys])
+
+    def _select_nli_windows(self, sentences: List[str], window_size: int, first_index: int = 1) -> List[int]:
+        """
+        Cheap first tier: score each sentence against its window with the bi-encoder and
+        return the indices whose best similarity reaches NLI_SIMILARITY_FLOOR.
+        """
+        embeddings = self._embed_sentences(sentences)
+        selected: List[int] = []
+        for i in range(first_index, len(sentences)):
+            start_idx = max(0, i - window_size)
+            similarity = float(np.max(embeddings[start_idx:i] @ embeddings[i]))
+            if similarity >= self.NLI_SIMILARITY_FLOOR:
+                selected.append(i)
+        return selected
+
     def _group_entities(self, text: str) -> Dict[str, List[str]]:
         doc = self._nlp(text)
         grouped: Dict[str, List[str]] = {}
@@ -53,55 +137,122 @@ class NarrativeConsistencyEngine:
                 grouped[ent.label_].append(ent.text)
         return grouped
 
-    def _compute_long_context_consistency(self, sentences: List[str], window_size: int = 5) -> List[float]:
+    def _tokenize_sentences(self, sentences: List[str]) -> List[List[int]]:
+        """Tokenize every sentence exactly once, without special tokens."""
+        encoded = self._nli_model.tokenizer(sentences, add_special_tokens=False)
+        return [list(ids) for ids in encoded["input_ids"]]
+
+    @staticmethod
+    def _build_premise(sentence_ids: List[List[int]], end: int, window_size: int, token_budget: int) -> List[int]:
+        """
+        Assemble a premise from cached token IDs of the sentences preceding `end`.
+        Walks backwards so the most recent context is kept; the oldest sentence that
+        overflows the budget is cut from the left, giving a deterministic length.
+        """
+        premise: List[int] = []
+        start_idx = max(0, end - window_size)
+        for idx in range(end - 1, start_idx - 1, -1):
+            remaining = token_budget - len(premise)
+            if remaining <= 0:
+                break
+            ids = sentence_ids[idx]
+            premise = (ids[-remaining:] if len(ids) > remaining else ids) + premise
+        return premise
+
+    @torch.inference_mode()
+    def _predict_token_pairs(self, pairs: List[Tuple[List[int], List[int]]], batch_size: int = 32) -> np.ndarray:
+        """Run the cross-encoder on pre-tokenized pairs, batching by similar length to limit padding."""
+        tokenizer = self._nli_model.tokenizer
+        model = self._nli_model.model
+        device = next(model.parameters()).device
+
+        features = [
+            {
+                "input_ids": tokenizer.build_inputs_with_special_tokens(premise, hypothesis),
+                "token_type_ids": tokenizer.create_token_type_ids_from_sequences(premise, hypothesis),
+            }
+            for premise, hypothesis in pairs
+        ]
+        order = sorted(range(len(features)), key=lambda idx: len(features[idx]["input_ids"]))
+
+        logits = np.zeros((len(features), model.config.num_labels), dtype=np.float32)
+        for offset in range(0, len(order), batch_size):
+            chunk = order[offset:offset + batch_size]
+            batch = tokenizer.pad([features[idx] for idx in chunk], padding=True, return_tensors="pt")
+            batch = {key: value.to(device) for key, value in batch.items()}
+            logits[chunk] = model(**batch).logits.float().cpu().numpy()
+        return logits
+
+    def _compute_long_context_consistency(
+        self,
+        sentences: List[str],
+        window_size: int = 5,
+        token_budget: int = 256,
+        mode: ConsistencyMode = "full",
+        first_index: int = 1,
+    ) -> Tuple[List[float], int]:
         """
         Check consistency of each sentence against a rolling window of past sentences.
         This provides long-text tracking across paragraphs instead of just adjacent pairs.
+        Premises are built from cached token IDs and capped at `token_budget` tokens.
+
+        In "two_tier" mode windows the bi-encoder finds unrelated to their context are
+        not sent to the cross-encoder. Sentences before `first_index` only serve as context. Returns
+        the scores for sentences from `first_index` on and the number of NLI pairs run.
         """
-        if len(sentences) < 2:
-            return []
+        first_index = max(first_index, 1)
+        if len(sentences) <= first_index:
+            return [], 0
 
         if self._nli_model is None:
-            return [0.5 for _ in range(len(sentences) - 1)]
+            return [0.5 for _ in range(len(sentences) - first_index)], 0
+
+        if mode == "two_tier" and self._embedding_model is not None:
+            candidates = self._select_nli_windows(sentences, window_size, first_index)
+        else:
+            candidates = list(range(first_index, len(sentences)))
+
+        # Windows cleared by the pre-filter carry no contradiction signal
+        similarities = [1.0 for _ in range(len(sentences) - first_index)]
+        if not candidates:
+            return similarities, 0
+
+        sentence_ids = self._tokenize_sentences(sentences)
+
+        # Leave room for the hypothesis and the three special tokens of a pair
+        max_length = getattr(self._nli_model, "max_length", None) or 512
+        hypothesis_budget = max(max_length - token_budget - 3, 1)
 
-        similarities: List[float] = []
-        
         # Build pairs: Compare current sentence against up to `window_size` previous sentences
-        pairs = []
-        pair_indices = [] # keep track of which output belongs to which sentence index
-        
-        for i in range(1, len(sentences)):
-            current_sentence = sentences[i]
-            # Look back up to `window_size` sentences
-            start_idx = max(0, i - window_size)
-            past_context = " ".join(sentences[start_idx:i])
-            
-            pairs.append([past_context, current_sentence])
-            pair_indices.append(i)
+        pairs = [
+            (
+                self._build_premise(sentence_ids, i, window_size, token_budget),
+                sentence_ids[i][:hypothesis_budget],
+            )
+            for i in candidates
+        ]
 
-        # Batch predict for speed
-        scores = self._nli_model.predict(pairs)
-        
-        for i in range(len(scores)):
-            score_logits = scores[i]
-            exp_scores = np.exp(score_logits - np.max(score_logits))
-            probs = exp_scores / np.sum(exp_scores)
-            
-            # label 0 is contradiction, 1 is entailment, 2 is neutral
-            # High contradiction probability = low consistency score
-            consistency = 1.0 - float(probs[0])
-            similarities.append(float(np.clip(consistency, 0.0, 1.0)))
-            
-        return similarities
-
-    def analyze(self, text: str) -> NarrativeResult:
+        logits = self._predict_token_pairs(pairs)
+        exp_scores = np.exp(logits - logits.max(axis=1, keepdims=True))
+        probs = exp_scores / exp_scores.sum(axis=1, keepdims=True)
+
+        # label 0 is contradiction, 1 is entailment, 2 is neutral
+        # High contradiction probability = low consistency score
+        consistency = np.clip(1.0 - probs[:, 0], 0.0, 1.0)
+        for i, score in zip(candidates, consistency):
+            similarities[i - first_index] = float(score)
+        return similarities, len(pairs)
+
+    def analyze(self, text: str, mode: ConsistencyMode = "full") -> NarrativeResult:
         """Extract entities and estimate long-context consistency score."""
         normalized = normalize_text(text)
         sentences = split_sentences(normalized)
         entities = self._group_entities(normalized)
         
         # Using a window size of 10 past sentences to hold global narrative state across longer text
-        rolling_consistency = self._compute_long_context_consistency(sentences, window_size=10)
+        rolling_consistency, nli_pairs_scored = self._compute_long_context_consistency(
+            sentences, window_size=10, mode=mode
+        )
         
         consistency_score = float(np.mean(rolling_consistency)) if rolling_consistency else 1.0
 
@@ -109,6 +260,103 @@ class NarrativeConsistencyEngine:
             entities=entities,
             consistency_score=float(np.clip(consistency_score, 0.0, 1.0)),
             pairwise_similarities=rolling_consistency,
+            nli_pairs_scored=nli_pairs_scored,
+        )
+
+    def analyze_continuation(
+        self,
+        sentences: List[str],
+        context: List[str],
+        mode: ConsistencyMode = "full",
+    ) -> NarrativeResult:
+        """
+        Score `sentences` as the continuation of already-seen `context` sentences.
+        Used by streaming analysis so chunk boundaries do not reset the rolling window;
+        only the new sentences are scored and searched for entities.
+        """
+        entities = self._group_entities(" ".join(sentences))
+        rolling_consistency, nli_pairs_scored = self._compute_long_context_consistency(
+            context + sentences, window_size=10, mode=mode, first_index=len(context)
+        )
+        consistency_score = float(np.mean(rolling_consistency)) if rolling_consistency else 1.0
+
+        return NarrativeResult(
+            entities=entities,
+            consistency_score=float(np.clip(consistency_score, 0.0, 1.0)),
+            pairwise_similarities=rolling_consistency,
+            nli_pairs_scored=nli_pairs_scored,
+        )
+
+    def analyze_document(
+        self,
+        text: str,
+        mode: ConsistencyMode = "full",
+        batch_size: int = 32,
+    ) -> NarrativeResult:
+        """
+        Hierarchical variant of `analyze` for long documents.
+
+        Sections and paragraphs are kept apart instead of being flattened. Consistency is
+        scored within each paragraph, then between paragraph summaries (topic sentences)
+        inside each section. Sections are read lazily and only one section's paragraphs
+        are held at a time. Entities are capped at MAX_ENTITIES_PER_LABEL per label, and
+        `pairwise_similarities` holds the first MAX_DOCUMENT_SCORES transition scores; the
+        overall score is a running sentence-weighted mean. What still grows with the
+        document is the per-section results in `sections` (a few floats per paragraph).
+        """
+        # Dicts as insertion-ordered sets
+        entities: Dict[str, Dict[str, None]] = {}
+        sections: List[SectionResult] = []
+        transition_scores: List[float] = []
+        nli_pairs_scored = 0
+        weighted_total = 0.0
+        total_sentences = 0
+
+        for title, paragraphs in iter_sections(text):
+            for doc in self._nlp.pipe(paragraphs, batch_size=batch_size):
+                for ent in doc.ents:
+                    names = entities.setdefault(ent.label_, {})
+                    if len(names) < self.MAX_ENTITIES_PER_LABEL:
+                        names[ent.text] = None
+
+            paragraph_scores: List[float] = []
+            summaries: List[str] = []
+            sentence_count = 0
+            for paragraph in paragraphs:
+                sentences = split_sentences(paragraph)
+                if not sentences:
+                    continue
+                sentence_count += len(sentences)
+                summaries.append(sentences[0])
+                scores, pairs_run = self._compute_long_context_consistency(sentences, window_size=10, mode=mode)
+                nli_pairs_scored += pairs_run
+                paragraph_scores.append(float(np.mean(scores)) if scores else 1.0)
+
+            section_transitions, pairs_run = self._compute_long_context_consistency(summaries, window_size=5, mode=mode)
+            nli_pairs_scored += pairs_run
+            transition_scores.extend(section_transitions[: self.MAX_DOCUMENT_SCORES - len(transition_scores)])
+
+            section_score = float(np.clip(np.mean(paragraph_scores + section_transitions), 0.0, 1.0)) if paragraph_scores else 1.0
+            sections.append(
+                SectionResult(
+                    title=title,
+                    consistency_score=section_score,
+                    paragraph_scores=paragraph_scores,
+                    transition_scores=section_transitions,
+                    sentence_count=sentence_count,
+                )
+            )
+            weighted_total += section_score * sentence_count
+            total_sentences += sentence_count
+
+        consistency_score = weighted_total / total_sentences if total_sentences else 1.0
+
+        return NarrativeResult(
+            entities={label: list(names) for label, names in entities.items()},
+            consistency_score=float(np.clip(consistency_score, 0.0, 1.0)),
+            pairwise_similarities=transition_scores,
+            nli_pairs_scored=nli_pairs_scored,
+            sections=sections,
         )
 
     def check_relevance(self, text: str, topic: str | None = None) -> dict:
@@ -0,0 +1,115 @@
+"""Streaming analysis engine that aggregates per-chunk results for very large inputs."""
+
+from __future__ import annotations
+
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Dict, List
+
+from ai_engine.engines.narrative_engine import ConsistencyMode, NarrativeConsistencyEngine
+from ai_engine.engines.structure_engine import StructureClarityEngine
+from ai_engine.engines.tone_engine import ToneControlEngine
+from ai_engine.utils.text_utils import normalize_text, split_sentences
+
+
+@dataclass
+class StreamingResult:
+    """Merged aggregates over every chunk of a streamed document."""
+
+    consistency_score: float
+    readability_score: float
+    detected_tone: str
+    entities: Dict[str, List[str]]
+    long_sentence_count: int
+    sentence_count: int
+    chunks_processed: int
+
+
+@dataclass
+class _Aggregate:
+    consistency_total: float = 0.0
+    consistency_count: int = 0
+    readability_total: float = 0.0
+    word_count: int = 0
+    sentence_count: int = 0
+    long_sentence_count: int = 0
+    chunks_processed: int = 0
+    tones: Counter = field(default_factory=Counter)
+    entities: Dict[str, List[str]] = field(default_factory=dict)
+
+
+class StreamingAnalysisEngine:
+    """
+    Analyzes a document one chunk at a time.
+
+    Only running sums, the last `context_sentences` sentences and a capped entity list
+    are kept between chunks, so memory stays flat as the input grows. Consistency is
+    scored against the carried-over context, so chunk boundaries do not change the
+    rolling window seen by each sentence.
+    """
+
+    def __init__(
+        self,
+        narrative_engine: NarrativeConsistencyEngine,
+        structure_engine: StructureClarityEngine,
+        tone_engine: ToneControlEngine,
+        mode: ConsistencyMode = "full",
+        context_sentences: int = 10,
+        max_entities_per_label: int = 50,
+    ) -> None:
+        self.narrative_engine = narrative_engine
+        self.structure_engine = structure_engine
+        self.tone_engine = tone_engine
+        self.mode = mode
+        self.context_sentences = context_sentences
+        self.max_entities_per_label = max_entities_per_label
+        self._context: List[str] = []
+        self._aggregate = _Aggregate()
+
+    def feed(self, chunk: str) -> None:
+        """Run every engine on one chunk and fold its output into the aggregates."""
+        normalized = normalize_text(chunk)
+        sentences = split_sentences(normalized)
+        if not sentences:
+            return
+
+        aggregate = self._aggregate
+        narrative = self.narrative_engine.analyze_continuation(sentences, self._context, mode=self.mode)
+        aggregate.consistency_total += sum(narrative.pairwise_similarities)
+        aggregate.consistency_count += len(narrative.pairwise_similarities)
+        for label, names in narrative.entities.items():
+            known = aggregate.entities.setdefault(label, [])
+            for name in names:
+                if len(known) >= self.max_entities_per_label:
+                    break
+                if name not in known:
+                    known.append(name)
+
+        # Readability is weighted by word count so the merged score tracks the whole-text value
+        structure = self.structure_engine.analyze(normalized)
+        words = len(normalized.split())
+        aggregate.readability_total += structure.readability_score * words
+        aggregate.word_count += words
+        aggregate.long_sentence_count += len(structure.long_sentences)
+
+        aggregate.tones[self.tone_engine.detect_tone(normalized)] += words
+        aggregate.sentence_count += len(sentences)
+        aggregate.chunks_processed += 1
+        self._context = (self._context + sentences)[-self.context_sentences:]
+
+    def result(self) -> StreamingResult:
+        """Return the merged aggregates for everything fed so far."""
+        aggregate = self._aggregate
+        consistency = aggregate.consistency_total / aggregate.consistency_count if aggregate.consistency_count else 1.0
+        readability = aggregate.readability_total / aggregate.word_count if aggregate.word_count else 0.0
+        detected_tone = aggregate.tones.most_common(1)[0][0] if aggregate.tones else "neutral"
+
+        return StreamingResult(
+            consistency_score=float(min(max(consistency, 0.0), 1.0)),
+            readability_score=float(readability),
+            detected_tone=detected_tone,
+            entities=aggregate.entities,
+            long_sentence_count=aggregate.long_sentence_count,
+            sentence_count=aggregate.sentence_count,
+            chunks_processed=aggregate.chunks_processed,
+        )
@@ -0,0 +1,193 @@
+"""Lightweight tone classifiers with calibrated confidence."""
+
+from __future__ import annotations
+
+import json
+import math
+import re
+import zlib
+from pathlib import Path
+from typing import Dict, Iterable, List, Sequence, Tuple
+
+import numpy as np
+
+TONE_LABELS = ("formal", "informal", "neutral")
+
+# Words with an optional contraction ("don't", "we're"), or single punctuation marks
+_TOKEN = re.compile(r"[a-z0-9]+(?:'[a-z]+)?|[^\w\s]")
+_WORD = re.compile(r"[a-z]+(?:'[a-z]+)?")
+
+
+class MarkerToneClassifier:
+    """
+    Counts formal and informal marker words. Confidence is a Platt-scaled estimate of
+    P(label is correct) given the marker margin, fitted on data/tone_train.jsonl
+    (`python -m ai_engine.benchmarks.bench_tone_policy --calibrate`).
+
+    Fallback for when no trained HashedNgramToneClassifier artifact is available. A
+    single marker word ("However, ur code is trash") already gives a high confidence,
+    so its predictions never allow skipping the rewrite (`allows_skip`).
+    """
+
+    allows_skip = False
+
+    FORMAL_MARKERS = {"therefore", "however", "moreover", "thus", "regarding"}
+    INFORMAL_MARKERS = {"gonna", "wanna", "kinda", "lol", "hey", "cool", "awesome"}
+    # sigmoid(SLOPE * margin + INTERCEPT)
+    PLATT_SLOPE = 4.4379
+    PLATT_INTERCEPT = -0.4825
+
+    def margin(self, text: str) -> Tuple[str, int]:
+        # Whole words only, so "hey" does not match inside "they"
+        words = _WORD.findall(text.lower())
+        formal_count = sum(1 for word in words if word in self.FORMAL_MARKERS)
+        informal_count = sum(1 for word in words if word in self.INFORMAL_MARKERS)
+
+        if formal_count > informal_count:
+            return "formal", formal_count - informal_count
+        if informal_count > formal_count:
+            return "informal", informal_count - formal_count
+        return "neutral", 0
+
+    def predict(self, text: str) -> Tuple[str, float]:
+        """(tone, confidence in [0, 1])."""
+        label, margin = self.margin(text)
+        return label, 1.0 / (1.0 + math.exp(-(self.PLATT_SLOPE * margin + self.PLATT_INTERCEPT)))
+
+    def predict_batch(self, texts: Sequence[str]) -> List[Tuple[str, float]]:
+        return [self.predict(text) for text in texts]
+
+
+def _features(text: str) -> Iterable[str]:
+    """Word uni/bigrams, word-internal character trigrams and a few surface cues."""
+    tokens = _TOKEN.findall(text.lower())
+    padded = ["<s>", *tokens, "</s>"]
+    for token in tokens:
+        yield "w:" + token
+    for left, right in zip(padded, padded[1:]):
+        yield f"b:{left} {right}"
+    for token in tokens:
+        if token.isalpha() and len(token) > 2:
+            chars = f"<{token}>"
+            for i in range(len(chars) - 2):
+                yield "c:" + chars[i:i + 3]
+    stripped = text.strip()
+    if stripped and stripped[0].islower():
+        yield "s:lower_start"
+    if re.search(r"\b[A-Z]{2,}\b", text):
+        yield "s:caps_word"
+    if re.search(r"([!?.])\1", text):
+        yield "s:repeated_punct"
+    if re.search(r"([a-z])\1\1", text.lower()):
+        yield "s:stretched"
+    yield f"s:len{min(len(tokens) // 8, 4)}"
+
+
+def hash_features(texts: Sequence[str], dim: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Sparse (rows, cols, values) matrix of hashed features, one row per text. Counts are
+    log-scaled and each row is L2-normalised, so long and short texts score alike.
+    crc32 is used rather than hash() so buckets are stable across processes.
+    """
+    rows: List[int] = []
+    cols: List[int] = []
+    values: List[float] = []
+    for row, text in enumerate(texts):
+        counts: Dict[int, int] = {}
+        for feature in _features(text):
+            bucket = zlib.crc32(feature.encode("utf-8")) % dim
+            counts[bucket] = counts.get(bucket, 0) + 1
+        if not counts:
+            continue
+        weights = [1.0 + math.log(c) for c in counts.values()]
+        norm = math.sqrt(sum(w * w for w in weights))
+        rows.extend([row] * len(counts))
+        cols.extend(counts)
+        values.extend(w / norm for w in weights)
+    return (
+        np.asarray(rows, dtype=np.int64),
+        np.asarray(cols, dtype=np.int64),
+        np.asarray(values, dtype=np.float32),
+    )
+
+
+def softmax(logits: np.ndarray) -> np.ndarray:
+    shifted = logits - logits.max(axis=1, keepdims=True)
+    exp = np.exp(shifted)
+    return exp / exp.sum(axis=1, keepdims=True)
+
+
+class HashedNgramToneClassifier:
+    """
+    Multinomial logistic regression over hashed n-gram features.
+
+    Scores all tone labels at once; confidence is the top temperature-scaled softmax
+    probability, calibrated on out-of-fold predictions at training time. The artifact
+    is a small uncompressed .npz plus a JSON config (see ai_engine/train_tone_classifier.py),
+    so loading takes milliseconds and scoring a batch is one gather and one scatter-add.
+    """
+
+    WEIGHTS_FILE = "weights.npz"
+    CONFIG_FILE = "config.json"
+    # Confident enough, on held-out data, to skip a rewrite already in the target tone
+    allows_skip = True
+
+    def __init__(
+        self,
+        weights: np.ndarray,
+        bias: np.ndarray,
+        temperature: float = 1.0,
+        labels: Sequence[str] = TONE_LABELS,
+        metrics: Dict[str, float] | None = None,
+    ) -> None:
+        self.weights = weights
+        self.bias = bias
+        self.temperature = temperature
+        self.labels = tuple(labels)
+        self.metrics = metrics or {}
+
+    @property
+    def dim(self) -> int:
+        return self.weights.shape[0]
+
+    def logits_batch(self, texts: Sequence[str]) -> np.ndarray:
+        rows, cols, values = hash_features(texts, self.dim)
+        logits = np.tile(self.bias, (len(texts), 1)).astype(np.float32)
+        np.add.at(logits, rows, self.weights[cols] * values[:, None])
+        return logits
+
+    def predict_proba_batch(self, texts: Sequence[str]) -> np.ndarray:
+        """(len(texts), len(labels)) calibrated probabilities."""
+        if not texts:
+            return np.zeros((0, len(self.labels)), dtype=np.float32)
+        return softmax(self.logits_batch(texts) / self.temperature)
+
+    def predict_batch(self, texts: Sequence[str]) -> List[Tuple[str, float]]:
+        probabilities = self.predict_proba_batch(texts)
+        best = probabilities.argmax(axis=1)
+        return [
+            # Blank input (e.g. a cleared editor on /live-check) carries no tone
+            (self.labels[i], float(probabilities[row, i])) if texts[row].strip() else ("neutral", 1.0)
+            for row, i in enumerate(best)
+        ]
+
+    def predict(self, text: str) -> Tuple[str, float]:
+        """(tone, confidence in [0, 1])."""
+        return self.predict_batch([text])[0]
+
+    def save(self, path: Path) -> None:
+        path = Path(path)
+        path.mkdir(parents=True, exist_ok=True)
+        np.savez(path / self.WEIGHTS_FILE, weights=self.weights, bias=self.bias)
+        config = {"labels": list(self.labels), "dim": self.dim, "temperature": self.temperature, "metrics": self.metrics}
+        (path / self.CONFIG_FILE).write_text(json.dumps(config, indent=2), encoding="utf-8")
+
+    @classmethod
+    def load(cls, path: Path) -> "HashedNgramToneClassifier":
+        path = Path(path)
+        config = json.loads((path / cls.CONFIG_FILE).read_text(encoding="utf-8"))
+        with np.load(path / cls.WEIGHTS_FILE) as arrays:
+            weights, bias = arrays["weights"], arrays["bias"]
+        if weights.shape != (config["dim"], len(config["labels"])):
+            raise ValueError(f"Weights shape {weights.shape} does not match config in {path}")
+        return cls(weights, bias, config["temperature"], config["labels"], config.get("metrics"))
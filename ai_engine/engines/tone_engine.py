@@ -2,14 +2,18 @@
 
 from __future__ import annotations
 
+import os
 from dataclasses import dataclass
 from pathlib import Path
-from typing import List, Optional
+from typing import List, Literal, Optional, Tuple
 
 import torch
-from peft import PeftModel
 from transformers import AutoModelForSeq2SeqLM, AutoTokenizer
 
+from ai_engine.engines.adapter_manager import LoRAAdapterManager
+from ai_engine.engines.tone_classifier import MarkerToneClassifier
+from ai_engine.utils.model_registry import ModelUnavailableError, model_registry
+
 @dataclass
 class ToneResult:
     """Structured result for tone detection and modification."""
@@ -17,21 +21,70 @@ class ToneResult:
     detected_tone: str
     modified_text: str
     applied_replacements: List[str]
+    tone_confidence: float = 0.0
+    decoding_policy: str = "beam"
+
+
+DecodingPolicyName = Literal["skip", "greedy", "beam"]
+
+
+@dataclass(frozen=True)
+class DecodingPolicy:
+    """How much generation a rewrite gets."""
+
+    name: DecodingPolicyName
+    num_beams: int = 1
+
+
+SKIP = DecodingPolicy("skip", 0)
+GREEDY = DecodingPolicy("greedy", 1)
+BEAM = DecodingPolicy("beam", 4)
+POLICIES = {policy.name: policy for policy in (SKIP, GREEDY, BEAM)}
+
+# Thresholds on the calibrated classifier confidence
+SKIP_CONFIDENCE = float(os.getenv("TONE_SKIP_CONFIDENCE", 0.8))
+GREEDY_CONFIDENCE = float(os.getenv("TONE_GREEDY_CONFIDENCE", 0.8))
+SHORT_INPUT_WORDS = int(os.getenv("TONE_SHORT_INPUT_WORDS", 12))
+
+
+def choose_decoding_policy(
+    detected: str, confidence: float, target: str, text: str, allow_skip: bool = True
+) -> DecodingPolicy:
+    """
+    Skip the model when the text is confidently in the target tone already (only if the
+    classifier `allow_skip`s); decode greedily for short inputs or when the source tone is
+    clear; keep beam search for long, ambiguous inputs where it pays off.
+    """
+    if allow_skip and detected == target and confidence >= SKIP_CONFIDENCE:
+        return SKIP
+    if len(text.split()) <= SHORT_INPUT_WORDS or confidence >= GREEDY_CONFIDENCE:
+        return GREEDY
+    return BEAM
 
 
 class ToneControlEngine:
-    """Loads local LoRA adapter and performs tone rewrite inference."""
+    """
+    Performs tone rewrite inference with LoRA adapters on one shared base model.
+
+    `adapter_path` is the default adapter, used for any tone without its own. Each
+    subdirectory of `adapter_dir` holding a PEFT adapter serves the tone it is named after
+    (e.g. `diplomatic/`, `professional_boundary_setting/`).
+    """
 
     def __init__(
         self,
         adapter_path: str = "ai_engine/tone_lora_model",
         base_model_name_or_path: Optional[str] = None,
+        adapter_dir: Optional[str] = None,
     ) -> None:
         self.adapter_path = Path(adapter_path)
+        self.adapter_dir = Path(adapter_dir or os.getenv("TONE_ADAPTER_DIR", "ai_engine/tone_adapters"))
         self.device = "cuda" if torch.cuda.is_available() else "cpu"
         self.model = None
         self.tokenizer = None
+        self.adapters: Optional[LoRAAdapterManager] = None
         self.load_error: Optional[str] = None
+        self.classifier = self._load_classifier()
 
         detected_base_model = self._read_base_model_from_adapter_config()
         self.base_model_name_or_path = (
@@ -62,69 +115,133 @@ class ToneControlEngine:
                 raise FileNotFoundError(f"Adapter path not found: {self.adapter_path}")
 
             # For this adapter, base model should be google/flan-t5-small.
-            self.tokenizer = AutoTokenizer.from_pretrained(str(self.adapter_path), use_fast=True)
-            base_model = AutoModelForSeq2SeqLM.from_pretrained(self.base_model_name_or_path)
-            self.model = PeftModel.from_pretrained(base_model, str(self.adapter_path))
-            self.model.to(self.device)
-            self.model.eval()
+            self.tokenizer = AutoTokenizer.from_pretrained(str(self.adapter_path), use_fast=True, local_files_only=True)
+            base_model = self._load_base_model()
+            self.adapters = LoRAAdapterManager(base_model, self.tokenizer, self.device)
+            self.adapters.load(LoRAAdapterManager.DEFAULT_ADAPTER, self.adapter_path)
+            self.adapters.discover(self.adapter_dir)
+            self.model = self.adapters.model
             self.load_error = None
         except Exception as exc:  # noqa: BLE001
             self.model = None
             self.tokenizer = None
+            self.adapters = None
             self.load_error = str(exc)
 
+    @staticmethod
+    def _load_classifier():
+        # The trained classifier is optional; the marker heuristic keeps detection working without it
+        try:
+            return model_registry.load("tone_classifier")
+        except ModelUnavailableError:
+            return MarkerToneClassifier()
+
+    def _load_base_model(self):
+        # Registered hub ids resolve to local artifacts; anything else must be a local path
+        spec = model_registry.find_by_source(self.base_model_name_or_path)
+        if spec is not None:
+            _, base_model = model_registry.load_seq2seq(spec.name)
+            return base_model
+        return AutoModelForSeq2SeqLM.from_pretrained(self.base_model_name_or_path, local_files_only=True)
+
     def _detect_tone(self, text: str) -> str:
-        lowered = text.lower()
-        formal_markers = {"therefore", "however", "moreover", "thus", "regarding"}
-        informal_markers = {"gonna", "wanna", "kinda", "lol", "hey", "cool", "awesome"}
-        formal_count = sum(1 for token in formal_markers if token in lowered)
-        informal_count = sum(1 for token in informal_markers if token in lowered)
-
-        if formal_count > informal_count:
-            return "formal"
-        if informal_count > formal_count:
-            return "informal"
-        return "neutral"
+        return self.classifier.predict(text)[0]
 
-    @torch.inference_mode()
-    def _rewrite_tone(self, text: str, target_tone: str) -> str:
-        if self.model is None or self.tokenizer is None:
-            raise RuntimeError(f"Tone model not loaded: {self.load_error}")
+    def detect_tone(self, text: str) -> str:
+        """Classify the tone of `text` without rewriting it."""
+        return self._detect_tone(text)
+
+    def classify_batch(self, texts: List[str]) -> List[Tuple[str, float]]:
+        """(tone, confidence) for many texts in one vectorized pass."""
+        return self.classifier.predict_batch(texts)
 
-        prompt = (
+    @staticmethod
+    def _prompt(text: str, target_tone: str) -> str:
+        return (
             f"Rewrite the following text in a {target_tone} tone. "
             "Keep the meaning same and return only rewritten text:\n\n"
             f"{text}"
         )
 
-        inputs = self.tokenizer(prompt, return_tensors="pt", truncation=True).to(self.device)
-        outputs = self.model.generate(
-            **inputs,
+    @torch.inference_mode()
+    def _rewrite_tones(self, text: str, target_tones: List[str], num_beams: int = 4) -> List[str]:
+        """Rewrite `text` into each tone; tones sharing an adapter run as one batch."""
+        if self.model is None or self.tokenizer is None:
+            raise RuntimeError(f"Tone model not loaded: {self.load_error}")
+
+        return self.adapters.generate(
+            [(self.adapters.route(tone), self._prompt(text, tone)) for tone in target_tones],
             max_new_tokens=128,
             do_sample=False,
-            num_beams=4,
-            early_stopping=True,
+            num_beams=num_beams,
+            early_stopping=num_beams > 1,
         )
-        return self.tokenizer.decode(outputs[0], skip_special_tokens=True).strip()
 
-    def analyze(self, text: str, target_tone: str) -> ToneResult:
-        """Detect current tone and transform text toward target tone."""
-        target = target_tone.lower().strip()
-        detected = self._detect_tone(text)
-        if target not in {"formal", "informal", "neutral"}:
-            target = "neutral"
-
-        try:
-            rewritten = self._rewrite_tone(text, target)
-            return ToneResult(
-                detected_tone=detected,
-                modified_text=rewritten if rewritten else text,
-                applied_replacements=[f"model_inference:{self.base_model_name_or_path}+LoRA"],
-            )
-        except Exception as exc:  # noqa: BLE001
-            # Safe fallback so API does not crash on model load/inference issues.
-            return ToneResult(
-                detected_tone=detected,
-                modified_text=text,
-                applied_replacements=[f"model_error:{exc}"],
-            )
+    @staticmethod
+    def _normalize_tone(target_tone: str) -> str:
+        return " ".join(target_tone.lower().split()) or "neutral"
+
+    def analyze(self, text: str, target_tone: str, policy: Optional[DecodingPolicyName] = None) -> ToneResult:
+        """
+        Detect current tone and transform text toward target tone. The decoding policy is
+        chosen from the classifier confidence unless `policy` forces one.
+        """
+        return self.analyze_tones(text, [target_tone], policy=policy)[0]
+
+    def analyze_tones(
+        self, text: str, target_tones: List[str], policy: Optional[DecodingPolicyName] = None
+    ) -> List[ToneResult]:
+        """
+        Rewrite one text into several tones in a single call, one result per target tone.
+
+        The text is classified once. Tones that need the model are grouped by decoding
+        policy and generated together, so tones served by the same adapter share one
+        padded encoder pass and one batched decode instead of a request each. (The encoder
+        output itself cannot be reused across tones: the prompt names the tone and the
+        LoRA adapters also adapt the encoder.)
+        """
+        targets = [self._normalize_tone(tone) for tone in target_tones]
+        detected, confidence = self.classifier.predict(text)
+        decodings = [
+            POLICIES[policy]
+            if policy
+            else choose_decoding_policy(detected, confidence, target, text, self.classifier.allows_skip)
+            for target in targets
+        ]
+
+        results: List[Optional[ToneResult]] = [None] * len(targets)
+        for decoding in dict.fromkeys(d for d in decodings if d is not SKIP):
+            indices = [i for i, d in enumerate(decodings) if d is decoding]
+            try:
+                rewrites = self._rewrite_tones(text, [targets[i] for i in indices], num_beams=decoding.num_beams)
+                for i, rewritten in zip(indices, rewrites):
+                    results[i] = ToneResult(
+                        detected_tone=detected,
+                        modified_text=rewritten if rewritten else text,
+                        applied_replacements=[
+                            f"model_inference:{self.base_model_name_or_path}+LoRA:{self.adapters.route(targets[i])}"
+                        ],
+                        tone_confidence=confidence,
+                        decoding_policy=decoding.name,
+                    )
+            except Exception as exc:  # noqa: BLE001
+                # Safe fallback so API does not crash on model load/inference issues.
+                for i in indices:
+                    results[i] = ToneResult(
+                        detected_tone=detected,
+                        modified_text=text,
+                        applied_replacements=[f"model_error:{exc}"],
+                        tone_confidence=confidence,
+                        decoding_policy=decoding.name,
+                    )
+
+        for i, decoding in enumerate(decodings):
+            if decoding is SKIP:
+                results[i] = ToneResult(
+                    detected_tone=detected,
+                    modified_text=text,
+                    applied_replacements=[],
+                    tone_confidence=confidence,
+                    decoding_policy=decoding.name,
+                )
+        return results
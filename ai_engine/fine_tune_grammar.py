@@ -1,78 +1,250 @@
+"""Fine-tune a T5 grammar corrector on JFLEG.
+
+Examples:
+    python fine_tune_grammar.py                          # GPU defaults when CUDA is available, CPU defaults otherwise
+    python fine_tune_grammar.py --epochs 1 --max-train-samples 200
+    python fine_tune_grammar.py --resume auto            # continue from the latest checkpoint of the same run
+
+The tokenized dataset is cached under --cache-dir (Arrow files, memory-mapped on reload),
+so only the first run with given tokenizer settings pays for tokenization. Checkpoints go
+to a subdirectory of --checkpoint-dir keyed the same way plus the batch layout, so
+`--resume auto` never picks up a checkpoint of a different model, dataset or length.
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import time
+
 import torch
-from datasets import load_dataset
+from datasets import DatasetDict, load_dataset, load_from_disk
 from transformers import (
-    T5Tokenizer, 
-    T5ForConditionalGeneration, 
-    Seq2SeqTrainingArguments, 
+    AutoModelForSeq2SeqLM,
+    AutoTokenizer,
+    DataCollatorForSeq2Seq,
     Seq2SeqTrainer,
-    DataCollatorForSeq2Seq
+    Seq2SeqTrainingArguments,
+    TrainerCallback,
 )
+from transformers.trainer_utils import get_last_checkpoint
 
-# 1. Load Model and Tokenizer (t5-small is perfect for a 6GB GPU)
-model_name = "t5-small"
-tokenizer = T5Tokenizer.from_pretrained(model_name)
-model = T5ForConditionalGeneration.from_pretrained(model_name)
-
-# 2. Load Dataset (JFLEG is a popular, high-quality Grammar Correction dataset)
-dataset = load_dataset("jfleg")
-prefix = "grammar: "
-
-def preprocess_function(examples):
-    inputs = [prefix + text for text in examples["sentence"]]
-    # JFLEG provides multiple valid corrections per sentence; we use the first one for training
-    targets = [corrections[0] for corrections in examples["corrections"]]
-    
-    model_inputs = tokenizer(inputs, max_length=128, truncation=True)
-    labels = tokenizer(text_target=targets, max_length=128, truncation=True)
-    
-    model_inputs["labels"] = labels["input_ids"]
-    return model_inputs
-
-# Tokenize the dataset
-print("Tokenizing dataset... this may take a moment.")
-tokenized_datasets = dataset.map(preprocess_function, batched=True, remove_columns=["sentence", "corrections"])
-
-# 3. Setup Training Arguments heavily optimized for 6GB VRAM (RTX 4050)
-training_args = Seq2SeqTrainingArguments(
-    output_dir="./grammar_results",
-    eval_strategy="epoch",
-    learning_rate=2e-4,
-    per_device_train_batch_size=8,  # Small batch to fit entirely in 6GB VRAM
-    per_device_eval_batch_size=8,     
-    gradient_accumulation_steps=4,  # Simulates a batch size of 32 (8 * 4) without using extra VRAM
-    weight_decay=0.01,
-    save_total_limit=2,             # Delete older checkpoints to save SSD space
-    num_train_epochs=3,             
-    predict_with_generate=True,
-    fp16=True,                      # ★ CRITICAL: Uses half-precision. Saves nearly 50% VRAM!
-    push_to_hub=False,
-    logging_steps=50,
-)
+PREFIX = "grammar: "
 
-data_collator = DataCollatorForSeq2Seq(tokenizer, model=model)
 
-# 4. Initialize Trainer
-trainer = Seq2SeqTrainer(
-    model=model,
-    args=training_args,
-    train_dataset=tokenized_datasets["validation"],
-    eval_dataset=tokenized_datasets["test"],
-    data_collator=data_collator,
-    processing_class=tokenizer,
-)
+def parse_args():
+    has_gpu = torch.cuda.is_available()
+    parser = argparse.ArgumentParser(description="Fine-tune a T5 grammar correction model on JFLEG.")
+    parser.add_argument("--model-name", default="t5-small")
+    parser.add_argument("--dataset", default="jfleg")
+    # JFLEG only ships validation/test splits; the validation split is the training data
+    parser.add_argument("--train-split", default="validation")
+    parser.add_argument("--eval-split", default="test", help="empty to skip evaluation")
+    parser.add_argument("--all-corrections", action="store_true",
+                        help="one example per reference correction instead of only the first")
+    parser.add_argument("--max-length", type=int, default=128)
+    parser.add_argument("--max-train-samples", type=int, default=None)
+    parser.add_argument("--output-dir", default="./custom_grammar_model")
+    parser.add_argument("--checkpoint-dir", default="./grammar_results")
+    parser.add_argument("--cache-dir", default="./grammar_cache", help="pre-tokenized dataset cache")
+    parser.add_argument("--resume", default="auto", help="'auto', 'none' or a checkpoint path")
+    parser.add_argument("--epochs", type=float, default=3)
+    parser.add_argument("--learning-rate", type=float, default=2e-4)
+    # GPU: small batches + accumulation fit a 6GB card; CPU: larger batches, no accumulation
+    parser.add_argument("--batch-size", type=int, default=8 if has_gpu else 16)
+    parser.add_argument("--grad-accum", type=int, default=4 if has_gpu else 1)
+    parser.add_argument("--fp16", action=argparse.BooleanOptionalAction, default=has_gpu)
+    parser.add_argument("--threads", type=int, default=None, help="torch CPU threads (default: all cores)")
+    parser.add_argument("--num-proc", type=int, default=None, help="processes for tokenization")
+    parser.add_argument("--logging-steps", type=int, default=50)
+    parser.add_argument("--save-steps", type=int, default=500)
+    parser.add_argument("--generate-eval", action=argparse.BooleanOptionalAction, default=has_gpu,
+                        help="evaluate with generate (slow on CPU) instead of loss only")
+    parser.add_argument("--sample", default="I didn't knew the exact location so I was asking to many peoples.")
+    return parser.parse_args()
+
+
+def _settings_key(settings: dict) -> str:
+    return hashlib.sha1(json.dumps(settings, sort_keys=True).encode("utf-8")).hexdigest()[:16]
+
+
+def _data_settings(args, tokenizer) -> dict:
+    """Everything that changes the tokenized output."""
+    return {
+        "model": args.model_name,
+        "vocab": len(tokenizer),
+        "dataset": args.dataset,
+        "splits": [args.train_split, args.eval_split],
+        "all_corrections": args.all_corrections,
+        "max_length": args.max_length,
+        "prefix": PREFIX,
+    }
+
+
+def cache_path(args, tokenizer) -> str:
+    """Cache directory keyed by everything that changes the tokenized output."""
+    return os.path.join(args.cache_dir, _settings_key(_data_settings(args, tokenizer)))
+
+
+def checkpoint_path(args, tokenizer) -> str:
+    """
+    Checkpoint directory keyed like `cache_path` plus the training subset and batch
+    layout, which fix what a saved step means. Epochs and learning rate are left out so
+    a run can be resumed with more epochs.
+    """
+    settings = {
+        **_data_settings(args, tokenizer),
+        "max_train_samples": args.max_train_samples,
+        "batch": [args.batch_size, args.grad_accum],
+    }
+    return os.path.join(args.checkpoint_dir, _settings_key(settings))
+
+
+def load_tokenized(args, tokenizer) -> DatasetDict:
+    path = cache_path(args, tokenizer)
+    if os.path.isdir(path):
+        print(f"Loading pre-tokenized dataset from {path}")
+        return load_from_disk(path)
+
+    splits = [s for s in (args.train_split, args.eval_split) if s]
+    raw = load_dataset(args.dataset)
+    raw = DatasetDict({split: raw[split] for split in splits})
+
+    def preprocess_function(examples):
+        sources, targets = [], []
+        for sentence, corrections in zip(examples["sentence"], examples["corrections"]):
+            # JFLEG provides multiple valid corrections per sentence
+            for correction in (corrections if args.all_corrections else corrections[:1]):
+                sources.append(PREFIX + sentence)
+                targets.append(correction)
+
+        model_inputs = tokenizer(sources, max_length=args.max_length, truncation=True)
+        labels = tokenizer(text_target=targets, max_length=args.max_length, truncation=True)
+        model_inputs["labels"] = labels["input_ids"]
+        # Stored so length grouping and token throughput need no second pass
+        model_inputs["length"] = [len(ids) for ids in model_inputs["input_ids"]]
+        model_inputs["label_length"] = [len(ids) for ids in labels["input_ids"]]
+        return model_inputs
+
+    print("Tokenizing dataset... this may take a moment.")
+    tokenized = raw.map(
+        preprocess_function,
+        batched=True,
+        num_proc=args.num_proc,
+        remove_columns=raw[splits[0]].column_names,
+    )
+    tokenized.save_to_disk(path)
+    # Reload so training reads the memory-mapped Arrow files rather than the in-memory copy
+    return load_from_disk(path)
+
+
+class ThroughputCallback(TrainerCallback):
+    """Logs samples/sec and tokens/sec (input + label tokens) over each logging interval."""
+
+    def __init__(self, samples_per_step: int, tokens_per_sample: float):
+        self.samples_per_step = samples_per_step
+        self.tokens_per_sample = tokens_per_sample
+        self._started = None
+        self._step = 0
+
+    def on_train_begin(self, args, state, control, **kwargs):
+        self._started = time.perf_counter()
+        self._step = state.global_step
+
+    def on_log(self, args, state, control, logs=None, **kwargs):
+        elapsed = time.perf_counter() - self._started
+        steps = state.global_step - self._step
+        if steps <= 0 or elapsed <= 0:
+            return
+        samples_per_sec = steps * self.samples_per_step / elapsed
+        print(
+            f"[throughput] step {state.global_step}: {samples_per_sec:.1f} samples/sec, "
+            f"{samples_per_sec * self.tokens_per_sample:.0f} tokens/sec"
+        )
+        self._started = time.perf_counter()
+        self._step = state.global_step
+
+
+def main():
+    args = parse_args()
+    use_gpu = torch.cuda.is_available()
+    if args.threads:
+        torch.set_num_threads(args.threads)
+
+    tokenizer = AutoTokenizer.from_pretrained(args.model_name, use_fast=True)
+    model = AutoModelForSeq2SeqLM.from_pretrained(args.model_name)
+
+    tokenized = load_tokenized(args, tokenizer)
+    train_dataset = tokenized[args.train_split]
+    if args.max_train_samples:
+        train_dataset = train_dataset.select(range(min(args.max_train_samples, len(train_dataset))))
+    eval_dataset = tokenized[args.eval_split] if args.eval_split else None
+
+    run_dir = checkpoint_path(args, tokenizer)
+    training_args = Seq2SeqTrainingArguments(
+        output_dir=run_dir,
+        eval_strategy="epoch" if eval_dataset is not None else "no",
+        save_strategy="steps",
+        save_steps=args.save_steps,
+        save_total_limit=2,             # Delete older checkpoints to save SSD space
+        learning_rate=args.learning_rate,
+        per_device_train_batch_size=args.batch_size,
+        per_device_eval_batch_size=args.batch_size,
+        gradient_accumulation_steps=args.grad_accum,
+        weight_decay=0.01,
+        num_train_epochs=args.epochs,
+        predict_with_generate=args.generate_eval,
+        fp16=args.fp16 and use_gpu,     # Half precision saves nearly 50% VRAM; unsupported on CPU
+        use_cpu=not use_gpu,
+        dataloader_pin_memory=use_gpu,
+        group_by_length=True,           # Batches of similar length: far less padding
+        length_column_name="length",
+        push_to_hub=False,
+        logging_steps=args.logging_steps,
+        report_to=[],
+    )
+
+    # Padding to multiples of 8 lets fp16 kernels use tensor cores
+    data_collator = DataCollatorForSeq2Seq(tokenizer, model=model, pad_to_multiple_of=8 if args.fp16 and use_gpu else None)
+
+    lengths = train_dataset.with_format("numpy")
+    tokens_per_sample = float(lengths["length"].mean() + lengths["label_length"].mean())
+    samples_per_step = args.batch_size * args.grad_accum * max(1, training_args.n_gpu)
+
+    trainer = Seq2SeqTrainer(
+        model=model,
+        args=training_args,
+        # The collator only needs the model inputs
+        train_dataset=train_dataset.remove_columns(["label_length"]),
+        eval_dataset=eval_dataset.remove_columns(["label_length"]) if eval_dataset is not None else None,
+        data_collator=data_collator,
+        processing_class=tokenizer,
+        callbacks=[ThroughputCallback(samples_per_step, tokens_per_sample)],
+    )
+
+    resume = None
+    if args.resume == "auto":
+        resume = get_last_checkpoint(run_dir) if os.path.isdir(run_dir) else None
+    elif args.resume != "none":
+        resume = args.resume
+    if resume:
+        print(f"Resuming from {resume}")
+
+    print(f"Training on {'GPU' if use_gpu else f'CPU ({torch.get_num_threads()} threads)'}: "
+          f"{len(train_dataset)} examples, effective batch {samples_per_step}")
+    result = trainer.train(resume_from_checkpoint=resume)
+    print(f"Training complete: {result.metrics.get('train_samples_per_second', 0):.1f} samples/sec overall")
+
+    print(f"Saving the grammar model to {args.output_dir}")
+    trainer.save_model(args.output_dir)
+    tokenizer.save_pretrained(args.output_dir)
+
+    # Quick Test!
+    inputs = tokenizer(PREFIX + args.sample, return_tensors="pt").to(model.device)
+    outputs = model.generate(**inputs, max_length=args.max_length)
+    print(f"Original: {args.sample}")
+    print(f"Corrected: {tokenizer.decode(outputs[0], skip_special_tokens=True)}")
+
 
-# 5. Start Training
-print("🚀 Starting fine-tuning! This will engage your RTX 4050...")
-trainer.train()
-
-# 6. Save the final model
-print("✅ Training complete! Saving your custom grammar model to ./custom_grammar_model")
-trainer.save_model("./custom_grammar_model")
-tokenizer.save_pretrained("./custom_grammar_model")
-
-# 7. Quick Test!
-test_sentence = "grammar: I didn't knew the exact location so I was asking to many peoples."
-inputs = tokenizer(test_sentence, return_tensors="pt").to(model.device)
-outputs = model.generate(**inputs, max_length=128)
-print(f"Original: {test_sentence}")
-print(f"Corrected: {tokenizer.decode(outputs[0], skip_special_tokens=True)}")
+if __name__ == "__main__":
+    main()
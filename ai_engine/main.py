@@ -2,7 +2,14 @@
 
 from __future__ import annotations
 
-from fastapi import FastAPI, HTTPException
+import os
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Literal
+
+from fastapi import Depends, FastAPI, Header, HTTPException, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse, PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
 from dotenv import load_dotenv
 
@@ -14,9 +21,25 @@ from ai_engine.engines.narrative_engine import NarrativeConsistencyEngine
 from ai_engine.engines.structure_engine import StructureClarityEngine
 from ai_engine.engines.tone_engine import ToneControlEngine
 from ai_engine.engines.correction_engine import CorrectionEngine
-from ai_engine.models.request_models import AnalyzeRequest
-from ai_engine.models.response_models import AnalyzeResponse
+from ai_engine.engines.model_correction_engine import ModelCorrectionEngine
+from ai_engine.engines.streaming_engine import StreamingAnalysisEngine
+from ai_engine.models.request_models import AnalyzeRequest, ToneClassifyRequest
+from ai_engine.models.response_models import AnalyzeResponse, StreamAnalyzeResponse, ToneClassifyResponse
 from ai_engine.models.live_models import LiveCheckRequest, LiveCheckResponse
+from ai_engine.utils.response_utils import build_compact_changes, encode_json_response
+from ai_engine.utils import diagnostics
+from ai_engine.utils.model_registry import model_registry
+from ai_engine.utils.single_flight import SingleFlight, content_key
+from ai_engine.utils.stream_utils import ChunkSegmenter, PayloadTooLargeError, iter_decoded
+
+MAX_STREAM_BYTES = int(os.getenv("MAX_STREAM_BYTES", 16 * 1024 * 1024))
+STREAM_CHUNK_CHARS = int(os.getenv("STREAM_CHUNK_CHARS", 4000))
+# Refuse to start when a required model artifact is missing or fails its checksum
+MODELS_STRICT = os.getenv("MODELS_STRICT", "true").lower() == "true"
+# /debug endpoints exist only when a token is set; SIGUSR2 profiling is a separate opt-in
+DIAGNOSTICS_TOKEN = os.getenv("DIAGNOSTICS_TOKEN")
+DIAGNOSTICS_SIGNAL = os.getenv("DIAGNOSTICS_SIGNAL", "false").lower() == "true"
+DIAGNOSTICS_DIR = os.getenv("DIAGNOSTICS_DIR", "diagnostics")
 
 app = FastAPI(
     title="AI Text Analysis Engine",
@@ -32,55 +55,135 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+_startup_started = time.perf_counter()
+model_registry.preflight(strict=MODELS_STRICT)
 narrative_engine = NarrativeConsistencyEngine()
 structure_engine = StructureClarityEngine()
 tone_engine = ToneControlEngine()
 diff_engine = DiffEngine()
 explanation_engine = ExplanationEngine()
 correction_engine = CorrectionEngine()
+model_correction_engine = ModelCorrectionEngine(batch_size=int(os.getenv("GRAMMAR_MODEL_BATCH_SIZE", 32)))
+ENGINE_STARTUP_SECONDS = round(time.perf_counter() - _startup_started, 3)
+analyze_flight = SingleFlight()
+live_check_flight = SingleFlight()
+profiler = diagnostics.SamplingProfiler()
+allocation_tracker = diagnostics.AllocationTracker()
+if DIAGNOSTICS_SIGNAL:
+    diagnostics.install_profile_signal(profiler, Path(DIAGNOSTICS_DIR))
 
 
-@app.post("/analyze", response_model=AnalyzeResponse)
-def analyze_text(payload: AnalyzeRequest) -> AnalyzeResponse:
-    """Run full text analysis pipeline and return a structured response."""
+@app.get("/health/models")
+def model_health() -> JSONResponse:
+    """Model readiness and cold-start timings; 503 while a required model is unusable."""
+    report = {**model_registry.status(), "engine_startup_seconds": ENGINE_STARTUP_SECONDS}
+    return JSONResponse(report, status_code=200 if report["ready"] else 503)
+
+
+@app.get("/health/coalescing")
+def coalescing_stats() -> dict:
+    """How many identical in-flight requests were served by another request's computation."""
+    return {"analyze": analyze_flight.stats(), "live_check": live_check_flight.stats()}
+
+
+@app.get("/tone/adapters")
+def tone_adapters() -> dict:
+    """Loaded tone adapters with per-adapter parameter memory and batch latency."""
+    if tone_engine.adapters is None:
+        raise HTTPException(status_code=503, detail=f"Tone model not loaded: {tone_engine.load_error}")
+    return tone_engine.adapters.stats()
+
+
+@app.post("/tone/classify", response_model=ToneClassifyResponse)
+def classify_tone(payload: ToneClassifyRequest) -> ToneClassifyResponse:
+    """Classify the tone of many texts in one batch, without rewriting them."""
+    results = tone_engine.classify_batch(payload.texts)
+    return ToneClassifyResponse(
+        classifier=type(tone_engine.classifier).__name__,
+        results=[{"tone": tone, "confidence": confidence} for tone, confidence in results],
+    )
+
+
+@app.post("/tone/adapters/reload")
+def reload_tone_adapters() -> dict:
+    """Hot-reload adapters changed on disk and load new ones from TONE_ADAPTER_DIR."""
+    if tone_engine.adapters is None:
+        raise HTTPException(status_code=503, detail=f"Tone model not loaded: {tone_engine.load_error}")
+    try:
+        return tone_engine.adapters.refresh()
+    except Exception as exc:
+        raise HTTPException(status_code=500, detail=f"Adapter reload failed: {exc}") from exc
+
+
+def _enrich_changes(diff_changes: List[Dict[str, str]], correction_changes: List[Dict[str, str]]) -> List[Dict[str, str]]:
+    """Attach reasons from the correction engine to diff items, with defaults for the rest."""
+    final_changes = []
+    for change in diff_changes:
+        # Look for a reason in the correction result
+        reason = None
+        # Matching logic: check if this 'before' word was corrected
+        match = next((c for c in correction_changes if c["before"] == change["before"]), None)
+        if match:
+            reason = match.get("reason")
+
+        # Default reasons if missing
+        if not reason:
+            if change["type"] == "modification":
+                reason = "AI adjusted this word to better match the target tone and flow."
+            elif change["type"] == "addition":
+                reason = "AI added this to improve narrative clarity."
+            elif change["type"] == "deletion":
+                reason = "AI removed this for conciseness."
+
+        final_changes.append({
+            **change,
+            "reason": reason
+        })
+    return final_changes
+
+
+def _run_analysis(payload: AnalyzeRequest) -> Dict[str, Any]:
+    """The full /analyze pipeline; returns the standard response as plain data."""
     try:
-        narrative_result = narrative_engine.analyze(payload.text)
+        if payload.hierarchical:
+            narrative_result = narrative_engine.analyze_document(payload.text, mode=payload.consistency_mode)
+        else:
+            narrative_result = narrative_engine.analyze(payload.text, mode=payload.consistency_mode)
         structure_result = structure_engine.analyze(payload.text)
-        # Phase 1: Context and Tone modification
-        tone_result = tone_engine.analyze(payload.text, payload.target_tone)
-        
+        # Phase 1: Context and Tone modification (extra target_tones are rewritten in the same pass)
+        tones = list(dict.fromkeys([payload.target_tone, *(payload.target_tones or [])]))
+        tone_results = tone_engine.analyze_tones(payload.text, tones)
+        tone_result = tone_results[0]
+
         # Phase 2: Explicit Error Correction (catching what the model missed)
-        correction_result = correction_engine.analyze(tone_result.modified_text)
-        
+        if payload.correction_backend == "model":
+            correction_results = model_correction_engine.analyze_batch([r.modified_text for r in tone_results])
+        else:
+            correction_results = [correction_engine.analyze(r.modified_text) for r in tone_results]
+        correction_result = correction_results[0]
+
         final_modified_text = correction_result.corrected_text
-        
+
         # Calculate diff between ORIGINAL and FINAL corrected/toned text
         diff_result = diff_engine.analyze(payload.text, final_modified_text)
+        final_changes = _enrich_changes(diff_result.changes, correction_result.changes)
 
-        # ── Enrichment Phase ──
-        # Attach reasons from CorrectionEngine to the Diff items if they match
-        final_changes = []
-        for change in diff_result.changes:
-            # Look for a reason in the correction result
-            reason = None
-            # Matching logic: check if this 'before' word was corrected
-            match = next((c for c in correction_result.changes if c["before"] == change["before"]), None)
-            if match:
-                reason = match.get("reason")
-            
-            # Default reasons if missing
-            if not reason:
-                if change["type"] == "modification":
-                    reason = "AI adjusted this word to better match the target tone and flow."
-                elif change["type"] == "addition":
-                    reason = "AI added this to improve narrative clarity."
-                elif change["type"] == "deletion":
-                    reason = "AI removed this for conciseness."
-
-            final_changes.append({
-                **change,
-                "reason": reason
-            })
+        tone_variants = None
+        if payload.target_tones:
+            tone_variants = []
+            for tone, variant, correction in zip(tones, tone_results, correction_results):
+                if tone not in payload.target_tones:
+                    continue
+                changes = (
+                    final_changes if correction is correction_result
+                    else _enrich_changes(diff_engine.analyze(payload.text, correction.corrected_text).changes, correction.changes)
+                )
+                tone_variants.append({
+                    "target_tone": tone,
+                    "modified_text": correction.corrected_text,
+                    "changes": changes,
+                    "tone_decoding": variant.decoding_policy,
+                })
 
         explanation = explanation_engine.analyze(
             narrative_output=narrative_result,
@@ -89,23 +192,146 @@ def analyze_text(payload: AnalyzeRequest) -> AnalyzeResponse:
             diff_output=diff_result,
         )
 
-        return AnalyzeResponse(
-            consistency_score=narrative_result.consistency_score,
-            readability_score=structure_result.readability_score,
-            detected_tone=tone_result.detected_tone,
-            modified_text=final_modified_text,
-            changes=final_changes,
-            explanation=explanation.explanation,
-        )
+        return {
+            "consistency_score": narrative_result.consistency_score,
+            "readability_score": structure_result.readability_score,
+            "detected_tone": tone_result.detected_tone,
+            "modified_text": final_modified_text,
+            "changes": final_changes,
+            "explanation": explanation.explanation,
+            "sections": [vars(section) for section in narrative_result.sections] if payload.hierarchical else None,
+            "tone_decoding": tone_result.decoding_policy,
+            "tone_variants": tone_variants,
+        }
     except Exception as exc:  # noqa: BLE001
         raise HTTPException(status_code=500, detail=f"Analysis pipeline failed: {exc}") from exc
 
 
+@app.post("/analyze", response_model=AnalyzeResponse)
+def analyze_text(
+    payload: AnalyzeRequest,
+    accept_encoding: str | None = Header(None),
+) -> AnalyzeResponse | Response:
+    """Run full text analysis pipeline and return a structured response."""
+    if payload.correction_backend == "model" and not model_correction_engine.available:
+        raise HTTPException(status_code=503, detail=f"Grammar model unavailable: {model_correction_engine.load_error}")
+
+    # Identical requests in flight (double clicks, proxy retries) share one pipeline run;
+    # the response format only affects encoding, so it is not part of the key
+    key = content_key(payload.model_dump_json(exclude={"response_format"}))
+    result = analyze_flight.do(key, lambda: _run_analysis(payload))
+
+    if payload.response_format == "compact":
+        # Plain data straight to JSON: skips per-item model validation for large change lists
+        variants = result["tone_variants"]
+        return encode_json_response(
+            {
+                **result,
+                "changes": build_compact_changes(result["changes"]),
+                "tone_variants": [
+                    {**variant, "changes": build_compact_changes(variant["changes"])} for variant in variants
+                ] if variants is not None else None,
+            },
+            accept_encoding,
+        )
+
+    return AnalyzeResponse(**result)
+
+
+@app.post("/analyze/stream", response_model=StreamAnalyzeResponse)
+async def analyze_stream(
+    request: Request,
+    consistency_mode: Literal["full", "two_tier"] = "full",
+) -> StreamAnalyzeResponse:
+    """
+    Analyze a large plain-text body incrementally as it is uploaded.
+
+    The body is decoded and segmented on the fly; each chunk runs through the narrative,
+    structure and tone engines and is folded into running aggregates, so peak memory does
+    not depend on the input size. Tone rewriting and correction are not applied here.
+    """
+    declared_length = request.headers.get("content-length")
+    if declared_length and declared_length.isdigit() and int(declared_length) > MAX_STREAM_BYTES:
+        raise HTTPException(status_code=413, detail=f"Request body exceeds the {MAX_STREAM_BYTES} byte limit.")
+
+    engine = StreamingAnalysisEngine(narrative_engine, structure_engine, tone_engine, mode=consistency_mode)
+    segmenter = ChunkSegmenter(chunk_chars=STREAM_CHUNK_CHARS)
+    bytes_received = 0
+    try:
+        async for piece in iter_decoded(request.stream(), MAX_STREAM_BYTES):
+            bytes_received += len(piece.encode("utf-8"))
+            for chunk in segmenter.feed(piece):
+                await run_in_threadpool(engine.feed, chunk)
+        for chunk in segmenter.flush():
+            await run_in_threadpool(engine.feed, chunk)
+    except PayloadTooLargeError as exc:
+        raise HTTPException(status_code=413, detail=str(exc)) from exc
+    except Exception as exc:  # noqa: BLE001
+        raise HTTPException(status_code=500, detail=f"Streaming analysis failed: {exc}") from exc
+
+    result = engine.result()
+    if result.chunks_processed == 0:
+        raise HTTPException(status_code=422, detail="Request body contained no text to analyze.")
+
+    return StreamAnalyzeResponse(**vars(result), bytes_received=bytes_received)
+
+
+def _run_live_check(payload: LiveCheckRequest) -> Dict[str, Any]:
+    result = narrative_engine.check_relevance(payload.text, payload.topic)
+    # Cheap enough to run on every keystroke
+    tone, confidence = tone_engine.classifier.predict(payload.text)
+    return {**result, "tone": tone, "tone_confidence": confidence}
+
+
 @app.post("/live-check", response_model=LiveCheckResponse)
 def live_check(payload: LiveCheckRequest) -> LiveCheckResponse:
     """Real-time relevance checking as the user types."""
     try:
-        result = narrative_engine.check_relevance(payload.text, payload.topic)
+        result = live_check_flight.do(content_key(payload.model_dump_json()), lambda: _run_live_check(payload))
         return LiveCheckResponse(**result)
     except Exception as exc:
         raise HTTPException(status_code=500, detail=f"Live check failed: {exc}") from exc
+
+
+def require_diagnostics(x_diagnostics_token: str | None = Header(None)) -> None:
+    if not DIAGNOSTICS_TOKEN:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if not diagnostics.token_matches(DIAGNOSTICS_TOKEN, x_diagnostics_token):
+        raise HTTPException(status_code=403, detail="Invalid diagnostics token.")
+
+
+@app.get("/debug/runtime", dependencies=[Depends(require_diagnostics)])
+def debug_runtime() -> dict:
+    """Process info, torch thread settings and per-model parameter memory."""
+    models = {name: model for name, model in model_registry.loaded().items()}
+    # The tone base model is owned by the engine, not cached in the registry
+    models["tone (base + adapters)"] = tone_engine.model
+    return {
+        "process": diagnostics.process_runtime(),
+        "torch": diagnostics.torch_runtime(),
+        "models": diagnostics.model_memory(models),
+    }
+
+
+@app.post("/debug/profile", dependencies=[Depends(require_diagnostics)])
+def debug_profile(seconds: float = 10.0, interval_ms: float = 5.0, format: Literal["folded", "json"] = "folded"):
+    """
+    Sample every thread's stack for `seconds` (max 60). `folded` output feeds flamegraph.pl,
+    inferno or speedscope directly.
+    """
+    try:
+        result = profiler.capture(seconds, interval_ms / 1000)
+    except diagnostics.DiagnosticsBusyError as exc:
+        raise HTTPException(status_code=409, detail=str(exc)) from exc
+    if format == "folded":
+        return PlainTextResponse(diagnostics.to_folded(result["stacks"]))
+    return {**result, "stacks": diagnostics.profile_lines(result["stacks"], limit=200)}
+
+
+@app.post("/debug/tracemalloc", dependencies=[Depends(require_diagnostics)])
+def debug_tracemalloc(seconds: float = 10.0, top: int = 25, frames: int = 1) -> dict:
+    """Allocation growth by source line over `seconds` (max 60); tracing is off again afterwards."""
+    try:
+        return allocation_tracker.diff(seconds, top=top, frames=frames)
+    except diagnostics.DiagnosticsBusyError as exc:
+        raise HTTPException(status_code=409, detail=str(exc)) from exc
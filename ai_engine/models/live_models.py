@@ -8,3 +8,5 @@ class LiveCheckResponse(BaseModel):
     is_on_topic: bool
     relevance_score: float
     suggestion: str | None = None
+    tone: str | None = None
+    tone_confidence: float | None = None
@@ -2,17 +2,51 @@
 
 from __future__ import annotations
 
-from typing import Literal
+import os
+from typing import Annotated, List, Literal
 
 from pydantic import BaseModel, Field
 
+# Larger documents should go through the streaming /analyze/stream endpoint.
+MAX_ANALYZE_CHARS = int(os.getenv("MAX_ANALYZE_CHARS", 200_000))
+
+ToneName = Annotated[str, Field(min_length=1, max_length=40, pattern=r"^[A-Za-z][A-Za-z _-]*$")]
+
 
 class AnalyzeRequest(BaseModel):
     """Request body for the /analyze endpoint."""
 
-    text: str = Field(..., min_length=1, description="Input text to analyze.")
-    target_tone: Literal["formal", "informal", "neutral"] = Field(
+    text: str = Field(..., min_length=1, max_length=MAX_ANALYZE_CHARS, description="Input text to analyze.")
+    target_tone: ToneName = Field(
         "neutral",
-        description="Desired output tone.",
+        description="Desired output tone, e.g. 'formal', 'informal', 'neutral', 'diplomatic'. "
+        "Tones with a dedicated LoRA adapter use it; others use the default adapter.",
+    )
+    target_tones: List[ToneName] | None = Field(
+        None,
+        max_length=8,
+        description="Extra tones to rewrite into in the same call; each variant is returned in tone_variants.",
     )
     focus_topic: str | None = Field(None, description="Optional topic to check relevance against.")
+    consistency_mode: Literal["full", "two_tier"] = Field(
+        "full",
+        description="'two_tier' pre-filters windows with a bi-encoder and skips NLI for unrelated ones.",
+    )
+    hierarchical: bool = Field(
+        False,
+        description="Analyze consistency per paragraph and section instead of as one flat sentence list.",
+    )
+    correction_backend: Literal["rules", "model"] = Field(
+        "rules",
+        description="'model' corrects grammar with the fine-tuned T5 model instead of the rule-based engine.",
+    )
+    response_format: Literal["standard", "compact"] = Field(
+        "standard",
+        description="'compact' returns changes as interned, columnar arrays with gzip/br compression.",
+    )
+
+
+class ToneClassifyRequest(BaseModel):
+    """Request body for the /tone/classify endpoint."""
+
+    texts: List[str] = Field(..., min_length=1, max_length=1000, description="Texts to classify in one batch.")
@@ -2,7 +2,7 @@
 
 from __future__ import annotations
 
-from typing import List
+from typing import Dict, List
 
 from pydantic import BaseModel
 
@@ -16,6 +16,25 @@ class ChangeItem(BaseModel):
     reason: str | None = None
 
 
+class SectionItem(BaseModel):
+    """Consistency summary for one section of a hierarchical analysis."""
+
+    title: str
+    consistency_score: float
+    paragraph_scores: List[float]
+    transition_scores: List[float]
+    sentence_count: int
+
+
+class ToneVariant(BaseModel):
+    """The text rewritten into one of the requested target_tones."""
+
+    target_tone: str
+    modified_text: str
+    changes: List[ChangeItem]
+    tone_decoding: str
+
+
 class AnalyzeResponse(BaseModel):
     """Response body for the /analyze endpoint."""
 
@@ -25,3 +44,33 @@ class AnalyzeResponse(BaseModel):
     modified_text: str
     changes: List[ChangeItem]
     explanation: List[str]
+    sections: List[SectionItem] | None = None
+    tone_decoding: str | None = None
+    tone_variants: List[ToneVariant] | None = None
+
+
+class StreamAnalyzeResponse(BaseModel):
+    """Response body for the /analyze/stream endpoint."""
+
+    consistency_score: float
+    readability_score: float
+    detected_tone: str
+    entities: Dict[str, List[str]]
+    long_sentence_count: int
+    sentence_count: int
+    chunks_processed: int
+    bytes_received: int
+
+
+class ToneClassification(BaseModel):
+    """Tone of one text with the classifier's calibrated confidence."""
+
+    tone: str
+    confidence: float
+
+
+class ToneClassifyResponse(BaseModel):
+    """Response body for the /tone/classify endpoint."""
+
+    classifier: str
+    results: List[ToneClassification]
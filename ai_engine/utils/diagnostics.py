@@ -0,0 +1,262 @@
+"""Opt-in runtime diagnostics: sampling CPU profiles, allocation diffs, model memory.
+
+Nothing here runs until asked for: the profiler is a thread that exists only for the
+duration of a capture, and tracemalloc is started and stopped around each diff. Used by
+both the AI engine and the game backend; captures block, so async handlers run them
+with asyncio.to_thread.
+"""
+
+from __future__ import annotations
+
+import hmac
+import os
+import signal
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+MAX_CAPTURE_SECONDS = 60.0
+
+
+class DiagnosticsBusyError(RuntimeError):
+    """Raised when a capture is requested while another one is running."""
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    filename = "/".join(Path(code.co_filename).parts[-2:])
+    # ';' separates frames in the folded format
+    return f"{code.co_qualname} ({filename}:{code.co_firstlineno})".replace(";", ":")
+
+
+def _collapse(frame, thread_name: str) -> str:
+    labels = []
+    while frame is not None:
+        labels.append(_frame_label(frame))
+        frame = frame.f_back
+    labels.append(f"thread:{thread_name}")
+    return ";".join(reversed(labels))
+
+
+def to_folded(stacks: Counter) -> str:
+    """Brendan Gregg's folded format: `frame;frame;frame count` per line, root first.
+    Feed it to flamegraph.pl, inferno or speedscope."""
+    return "".join(f"{stack} {count}\n" for stack, count in stacks.most_common())
+
+
+class SamplingProfiler:
+    """
+    Statistical CPU profiler over every Python thread.
+
+    A background thread wakes every `interval` seconds and records the current stack of
+    every thread except itself and the caller waiting on it, via sys._current_frames().
+    Only one capture runs at a time.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+
+    @property
+    def busy(self) -> bool:
+        return self._lock.locked()
+
+    def capture(self, seconds: float, interval: float = 0.005) -> Dict[str, Any]:
+        """Blocking capture; returns folded stack counts and sampling totals."""
+        seconds = min(max(seconds, 0.1), MAX_CAPTURE_SECONDS)
+        interval = max(interval, 0.001)
+        if not self._lock.acquire(blocking=False):
+            raise DiagnosticsBusyError("A profile capture is already running.")
+        try:
+            stacks: Counter = Counter()
+            samples = 0
+            done = threading.Event()
+            caller = threading.get_ident()
+
+            def sample() -> None:
+                nonlocal samples
+                skip = {threading.get_ident(), caller}
+                deadline = time.monotonic() + seconds
+                while time.monotonic() < deadline:
+                    names = {t.ident: t.name for t in threading.enumerate()}
+                    for ident, frame in sys._current_frames().items():
+                        if ident not in skip:
+                            stacks[_collapse(frame, names.get(ident, str(ident)))] += 1
+                    samples += 1
+                    time.sleep(interval)
+                done.set()
+
+            started = time.perf_counter()
+            threading.Thread(target=sample, name="diagnostics-profiler", daemon=True).start()
+            done.wait()
+            return {
+                "seconds": round(time.perf_counter() - started, 3),
+                "interval": interval,
+                "samples": samples,
+                "stacks": stacks,
+            }
+        finally:
+            self._lock.release()
+
+
+class AllocationTracker:
+    """Diffs two tracemalloc snapshots taken `seconds` apart."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+
+    def diff(self, seconds: float, top: int = 25, frames: int = 1) -> Dict[str, Any]:
+        seconds = min(max(seconds, 0.1), MAX_CAPTURE_SECONDS)
+        frames = min(max(frames, 1), 25)
+        if not self._lock.acquire(blocking=False):
+            raise DiagnosticsBusyError("An allocation capture is already running.")
+        # Leave tracing on afterwards if someone else (PYTHONTRACEMALLOC) turned it on
+        was_tracing = tracemalloc.is_tracing()
+        try:
+            if not was_tracing:
+                tracemalloc.start(frames)
+            before = tracemalloc.take_snapshot()
+            time.sleep(seconds)
+            after = tracemalloc.take_snapshot()
+            traced, peak = tracemalloc.get_traced_memory()
+        finally:
+            if not was_tracing:
+                tracemalloc.stop()
+            self._lock.release()
+
+        key = "traceback" if frames > 1 else "lineno"
+        stats = after.compare_to(before, key)
+        return {
+            "seconds": seconds,
+            "traced_bytes": traced,
+            "peak_bytes": peak,
+            "size_diff_bytes": sum(s.size_diff for s in stats),
+            "top": [
+                {
+                    "location": [f"{f.filename}:{f.lineno}" for f in s.traceback],
+                    "size_diff_bytes": s.size_diff,
+                    "count_diff": s.count_diff,
+                    "size_bytes": s.size,
+                }
+                for s in stats[:top]
+            ],
+        }
+
+
+def model_memory(models: Dict[str, Any]) -> Dict[str, Any]:
+    """Parameter and buffer memory of each torch model; shared tensors are counted once."""
+    report: Dict[str, Any] = {}
+    seen: set = set()
+    for name, model in models.items():
+        module = model if hasattr(model, "named_parameters") else getattr(model, "model", None)
+        if module is None or not hasattr(module, "named_parameters"):
+            report[name] = None
+            continue
+        params = buffers = count = 0
+        devices, dtypes = set(), set()
+        for tensors, is_param in ((module.parameters(), True), (module.buffers(), False)):
+            for tensor in tensors:
+                devices.add(str(tensor.device))
+                dtypes.add(str(tensor.dtype).replace("torch.", ""))
+                pointer = tensor.data_ptr()
+                if pointer in seen:
+                    continue
+                seen.add(pointer)
+                size = tensor.numel() * tensor.element_size()
+                if is_param:
+                    params += size
+                    count += tensor.numel()
+                else:
+                    buffers += size
+        report[name] = {
+            "parameters": count,
+            "parameter_bytes": params,
+            "buffer_bytes": buffers,
+            "devices": sorted(devices),
+            "dtypes": sorted(dtypes),
+        }
+    return report
+
+
+def torch_runtime() -> Dict[str, Any]:
+    """Thread pool settings of torch, if the process has imported it."""
+    env = {name: os.getenv(name) for name in ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "TORCH_NUM_THREADS")}
+    torch = sys.modules.get("torch")
+    if torch is None:
+        return {"loaded": False, "env": env}
+    return {
+        "loaded": True,
+        "version": torch.__version__,
+        "num_threads": torch.get_num_threads(),
+        "num_interop_threads": torch.get_num_interop_threads(),
+        "cuda_available": torch.cuda.is_available(),
+        "env": env,
+        "parallel_info": torch.__config__.parallel_info().splitlines(),
+    }
+
+
+def process_runtime() -> Dict[str, Any]:
+    report: Dict[str, Any] = {
+        "pid": os.getpid(),
+        "python": sys.version.split()[0],
+        "threads": [t.name for t in threading.enumerate()],
+        "tracemalloc": tracemalloc.is_tracing(),
+    }
+    try:
+        import resource
+
+        # ru_maxrss is KiB on Linux
+        report["max_rss_bytes"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+    except ImportError:
+        pass
+    return report
+
+
+def install_profile_signal(
+    profiler: SamplingProfiler,
+    directory: Path,
+    seconds: float = 10.0,
+    signum: Optional[int] = None,
+) -> bool:
+    """
+    On SIGUSR2 (by default), capture a profile in the background and write it to
+    `directory/profile-<pid>-<time>.folded`. Must be called from the main thread;
+    returns False where the signal does not exist (Windows).
+    """
+    signum = signum if signum is not None else getattr(signal, "SIGUSR2", None)
+    if signum is None:
+        return False
+
+    def write_profile() -> None:
+        try:
+            result = profiler.capture(seconds)
+        except DiagnosticsBusyError as exc:
+            print(f"Diagnostics: {exc}")
+            return
+        directory.mkdir(parents=True, exist_ok=True)
+        path = directory / f"profile-{os.getpid()}-{int(time.time())}.folded"
+        path.write_text(to_folded(result["stacks"]), encoding="utf-8")
+        print(f"Diagnostics: wrote {result['samples']} samples to {path}")
+
+    def handler(_signum, _frame) -> None:
+        # Keep the handler itself trivial; the capture runs on its own thread
+        threading.Thread(target=write_profile, name="diagnostics-signal", daemon=True).start()
+
+    signal.signal(signum, handler)
+    return True
+
+
+def token_matches(expected: Optional[str], provided: Optional[str]) -> bool:
+    return bool(expected) and provided is not None and hmac.compare_digest(expected, provided)
+
+
+def profile_lines(stacks: Counter, limit: int) -> List[Dict[str, Any]]:
+    """Top stacks as JSON rows, for clients without a flamegraph viewer."""
+    total = sum(stacks.values()) or 1
+    return [
+        {"stack": stack.split(";"), "samples": count, "share": round(count / total, 4)}
+        for stack, count in stacks.most_common(limit)
+    ]
@@ -0,0 +1,354 @@
+"""Central registry resolving every model from a local artifact directory.
+
+Nothing is downloaded at runtime. Artifacts are prepared once, at build time:
+    python -m ai_engine.utils.model_registry fetch      # download into MODEL_ARTIFACT_DIR + write SHA256SUMS
+    python -m ai_engine.utils.model_registry status     # preflight report, exit 1 if not ready
+    python -m ai_engine.train_tone_classifier          # trained (not downloaded) tone classifier
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import os
+import sys
+import threading
+import time
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Literal, Optional
+
+ENGINE_DIR = Path(__file__).resolve().parent.parent
+ARTIFACT_DIR = Path(os.getenv("MODEL_ARTIFACT_DIR", ENGINE_DIR / "artifacts"))
+MANIFEST_NAME = "SHA256SUMS"
+
+ModelKind = Literal["spacy", "sentence_transformer", "cross_encoder", "seq2seq", "lora_adapter", "tone_classifier"]
+ModelState = Literal["ready", "verified", "unverified", "missing", "checksum_mismatch", "load_failed"]
+
+
+class ModelUnavailableError(RuntimeError):
+    """Raised when a model cannot be resolved or loaded from local artifacts."""
+
+
+@dataclass(frozen=True)
+class ModelSpec:
+    """Where a model lives locally and where `fetch` gets it from."""
+
+    name: str
+    kind: ModelKind
+    source: str
+    path: Optional[Path] = None
+    base: Optional[str] = None
+    required: bool = True
+
+    @property
+    def local_path(self) -> Path:
+        return self.path if self.path is not None else ARTIFACT_DIR / self.name
+
+
+@dataclass
+class ModelStatus:
+    """Readiness of one registered model."""
+
+    name: str
+    kind: str
+    path: str
+    required: bool
+    state: str = "missing"
+    mmap: bool = False
+    verify_seconds: float = 0.0
+    load_seconds: Optional[float] = None
+    error: Optional[str] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.state in ("ready", "verified", "unverified")
+
+
+DEFAULT_SPECS = (
+    ModelSpec("en_core_web_sm", "spacy", "en_core_web_sm"),
+    ModelSpec("all-MiniLM-L6-v2", "sentence_transformer", "sentence-transformers/all-MiniLM-L6-v2"),
+    ModelSpec("nli-deberta-v3-small", "cross_encoder", "cross-encoder/nli-deberta-v3-small"),
+    ModelSpec("flan-t5-small", "seq2seq", "google/flan-t5-small"),
+    ModelSpec("tone_lora_model", "lora_adapter", "local", path=ENGINE_DIR / "tone_lora_model", base="flan-t5-small"),
+    ModelSpec("custom_grammar_model", "seq2seq", "local", path=ENGINE_DIR / "custom_grammar_model", required=False),
+    ModelSpec("tone_classifier", "tone_classifier", "trained", required=False),
+)
+
+
+def sha256_file(path: Path, chunk_size: int = 1 << 20) -> str:
+    digest = hashlib.sha256()
+    with path.open("rb") as fp:
+        for block in iter(lambda: fp.read(chunk_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def write_manifest(directory: Path) -> Path:
+    """Write a `sha256sum`-compatible manifest of every file under `directory`."""
+    lines = [
+        f"{sha256_file(path)}  {path.relative_to(directory).as_posix()}"
+        for path in sorted(directory.rglob("*"))
+        if path.is_file() and path.name != MANIFEST_NAME
+    ]
+    manifest = directory / MANIFEST_NAME
+    manifest.write_text("\n".join(lines) + "\n", encoding="utf-8")
+    return manifest
+
+
+def verify_manifest(directory: Path) -> Optional[List[str]]:
+    """Files that are missing or differ from the manifest, or None if there is no manifest."""
+    manifest = directory / MANIFEST_NAME
+    if not manifest.exists():
+        return None
+    bad = []
+    for line in manifest.read_text(encoding="utf-8").splitlines():
+        if not line.strip():
+            continue
+        expected, relative = line.split(None, 1)
+        path = directory / relative.lstrip("*")
+        if not path.is_file() or sha256_file(path) != expected:
+            bad.append(relative)
+    return bad
+
+
+class ModelRegistry:
+    """
+    Resolves, verifies and loads models from local paths only.
+
+    `preflight()` checks every spec without loading it: the artifact must exist and, when a
+    SHA256SUMS manifest is present, match it. `load()` builds each model once and caches it,
+    so engines sharing a model (e.g. the spaCy pipeline) share one copy. Transformer
+    weights are loaded from safetensors when available, which are memory-mapped instead
+    of read into a private copy.
+    """
+
+    def __init__(
+        self,
+        specs=DEFAULT_SPECS,
+        verify_checksums: bool = True,
+        require_checksums: bool = False,
+    ) -> None:
+        self.specs: Dict[str, ModelSpec] = {spec.name: spec for spec in specs}
+        self.verify_checksums = verify_checksums
+        self.require_checksums = require_checksums
+        self._statuses: Dict[str, ModelStatus] = {}
+        self._loaded: Dict[str, Any] = {}
+        self._lock = threading.RLock()
+        self.preflight_seconds: Optional[float] = None
+
+    def spec(self, name: str) -> ModelSpec:
+        if name not in self.specs:
+            raise ModelUnavailableError(f"Unknown model '{name}'. Registered: {', '.join(self.specs)}")
+        return self.specs[name]
+
+    def find_by_source(self, source: str) -> Optional[ModelSpec]:
+        """Registry entry for a hub id such as 'google/flan-t5-small', if one is registered."""
+        for spec in self.specs.values():
+            if source in (spec.source, spec.name):
+                return spec
+        return None
+
+    # Preflight
+
+    def _check(self, spec: ModelSpec) -> ModelStatus:
+        status = ModelStatus(spec.name, spec.kind, str(spec.local_path), spec.required)
+        path = spec.local_path
+        if not path.exists():
+            if spec.kind == "spacy" and _spacy_package_installed(spec.source):
+                # Installed as a pip package (see requirements.txt); loaded by name, offline
+                status.path = spec.source
+                status.state = "unverified"
+                return status
+            status.error = f"Artifact not found at {path}. Run `python -m ai_engine.utils.model_registry fetch`."
+            return status
+
+        status.mmap = any(path.rglob("*.safetensors"))
+        status.state = "unverified"
+        if self.verify_checksums:
+            started = time.perf_counter()
+            bad = verify_manifest(path)
+            status.verify_seconds = round(time.perf_counter() - started, 3)
+            if bad:
+                status.state = "checksum_mismatch"
+                status.error = f"Checksum mismatch or missing file: {', '.join(bad[:5])}"
+            elif bad is not None:
+                status.state = "verified"
+            elif self.require_checksums:
+                status.state = "checksum_mismatch"
+                status.error = f"No {MANIFEST_NAME} manifest in {path}."
+        return status
+
+    def preflight(self, strict: bool = False) -> Dict[str, ModelStatus]:
+        """
+        Check every registered model. With `strict`, raise ModelUnavailableError listing
+        each required model that is not usable, so the process fails at startup instead
+        of degrading on the first request.
+        """
+        started = time.perf_counter()
+        with self._lock:
+            for spec in self.specs.values():
+                if spec.name not in self._loaded:
+                    self._statuses[spec.name] = self._check(spec)
+        self.preflight_seconds = round(time.perf_counter() - started, 3)
+
+        failed = [s for s in self._statuses.values() if s.required and not s.ok]
+        if strict and failed:
+            details = "; ".join(f"{s.name}: {s.state} ({s.error})" for s in failed)
+            raise ModelUnavailableError(f"Required models are not ready: {details}")
+        return dict(self._statuses)
+
+    # Loading
+
+    def load(self, name: str) -> Any:
+        """Load (once) and return the model; raises ModelUnavailableError if it cannot be."""
+        with self._lock:
+            if name in self._loaded:
+                return self._loaded[name]
+            spec = self.spec(name)
+            status = self._statuses.get(name) or self._check(spec)
+            self._statuses[name] = status
+            if not status.ok:
+                raise ModelUnavailableError(f"Model '{name}' is {status.state}: {status.error}")
+
+            started = time.perf_counter()
+            try:
+                model = self._build(spec, status)
+            except Exception as exc:  # noqa: BLE001
+                status.state = "load_failed"
+                status.error = f"{type(exc).__name__}: {exc}"
+                raise ModelUnavailableError(f"Model '{name}' failed to load: {status.error}") from exc
+            status.load_seconds = round(time.perf_counter() - started, 3)
+            status.state = "ready"
+            self._loaded[name] = model
+            return model
+
+    def _build(self, spec: ModelSpec, status: ModelStatus) -> Any:
+        path = status.path
+        if spec.kind == "spacy":
+            import spacy
+
+            return spacy.load(path)
+        if spec.kind == "sentence_transformer":
+            from sentence_transformers import SentenceTransformer
+
+            return SentenceTransformer(path, local_files_only=True)
+        if spec.kind == "cross_encoder":
+            from sentence_transformers import CrossEncoder
+
+            return CrossEncoder(path, local_files_only=True)
+        if spec.kind == "seq2seq":
+            return self.load_seq2seq(spec.name)
+        if spec.kind == "lora_adapter":
+            from peft import PeftModel
+
+            from transformers import AutoTokenizer
+
+            # A fresh base: PEFT injects adapter layers into it, so it must not be shared
+            _, base_model = self.load_seq2seq(spec.base)
+            tokenizer = AutoTokenizer.from_pretrained(path, use_fast=True, local_files_only=True)
+            return tokenizer, PeftModel.from_pretrained(base_model, path, local_files_only=True)
+        if spec.kind == "tone_classifier":
+            from ai_engine.engines.tone_classifier import HashedNgramToneClassifier
+
+            return HashedNgramToneClassifier.load(Path(path))
+        raise ModelUnavailableError(f"Unsupported model kind '{spec.kind}'")
+
+    def load_seq2seq(self, name: str):
+        """A new (tokenizer, model) pair for a seq2seq spec; not cached, callers own it."""
+        from transformers import AutoModelForSeq2SeqLM, AutoTokenizer
+
+        with self._lock:
+            spec = self.spec(name)
+            status = self._statuses.get(name) or self._check(spec)
+            self._statuses[name] = status
+        if not status.ok:
+            raise ModelUnavailableError(f"Model '{name}' is {status.state}: {status.error}")
+        path = str(spec.local_path)
+        started = time.perf_counter()
+        tokenizer = AutoTokenizer.from_pretrained(path, use_fast=True, local_files_only=True)
+        model = AutoModelForSeq2SeqLM.from_pretrained(
+            path,
+            local_files_only=True,
+            use_safetensors=status.mmap or None,
+            low_cpu_mem_usage=True,
+        )
+        status.load_seconds = round(time.perf_counter() - started, 3)
+        status.state = "ready"
+        return tokenizer, model
+
+    # Reporting
+
+    def loaded(self) -> Dict[str, Any]:
+        """Models loaded and cached so far, by name."""
+        with self._lock:
+            return dict(self._loaded)
+
+    def status(self) -> Dict[str, Any]:
+        """Readiness report, suitable for a health endpoint."""
+        with self._lock:
+            statuses = [asdict(s) for s in self._statuses.values()]
+        ready = all(s["state"] in ("ready", "verified", "unverified") for s in statuses if s["required"])
+        return {"ready": ready, "preflight_seconds": self.preflight_seconds, "models": statuses}
+
+
+def _spacy_package_installed(package: str) -> bool:
+    try:
+        import spacy.util
+
+        return spacy.util.is_package(package)
+    except ImportError:
+        return False
+
+
+model_registry = ModelRegistry(
+    verify_checksums=os.getenv("MODEL_VERIFY_CHECKSUMS", "true").lower() == "true",
+    require_checksums=os.getenv("MODEL_REQUIRE_CHECKSUMS", "false").lower() == "true",
+)
+
+
+def fetch(registry: ModelRegistry, names: List[str]) -> None:
+    """Build-time download of the given hub models into the artifact directory."""
+    for name in names:
+        spec = registry.spec(name)
+        target = spec.local_path
+        if spec.source == "local":
+            print(f"{name}: bundled at {target}")
+        elif spec.source == "trained":
+            print(f"{name}: built offline, run `python -m ai_engine.train_tone_classifier`")
+        elif spec.kind == "spacy":
+            import spacy
+
+            spacy.load(spec.source).to_disk(target)
+            print(f"{name}: saved spaCy pipeline to {target}")
+        else:
+            from huggingface_hub import snapshot_download
+
+            snapshot_download(spec.source, local_dir=str(target))
+            print(f"{name}: downloaded {spec.source} to {target}")
+        if target.exists():
+            write_manifest(target)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Prepare and check local model artifacts.")
+    parser.add_argument("command", choices=["fetch", "manifest", "status"])
+    parser.add_argument("names", nargs="*", help="models to act on (default: all)")
+    args = parser.parse_args()
+    names = args.names or list(model_registry.specs)
+
+    if args.command == "fetch":
+        fetch(model_registry, names)
+    elif args.command == "manifest":
+        for name in names:
+            path = model_registry.spec(name).local_path
+            if path.exists():
+                print(f"{name}: wrote {write_manifest(path)}")
+    report = model_registry.preflight()
+    print(json.dumps(model_registry.status(), indent=2))
+    sys.exit(0 if all(s.ok or not s.required for s in report.values()) else 1)
+
+
+if __name__ == "__main__":
+    main()
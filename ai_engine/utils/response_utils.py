@@ -0,0 +1,112 @@
+"""Compact, pre-serialized encodings for large analysis responses."""
+
+from __future__ import annotations
+
+import gzip
+import json
+from typing import Any, Dict, List
+
+from fastapi import Response
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional speedup
+    orjson = None
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - optional codec
+    brotli = None
+
+# Bodies smaller than this are sent uncompressed; the codec overhead outweighs the savings.
+MIN_COMPRESS_BYTES = 1024
+
+
+def _utf16_length(text: str) -> int:
+    # Characters outside the BMP (emoji) are two UTF-16 code units
+    return len(text.encode("utf-16-le")) // 2
+
+
+def build_compact_changes(changes: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Encode a change list as columns.
+
+    `type` and `reason` strings are interned into tables and referenced by index.
+    `before`/`after` texts are concatenated into one string each, with `offsets`
+    arrays of length n + 1 so change i spans `text.slice(offsets[i], offsets[i + 1])`.
+    Offsets count UTF-16 code units, the unit of JavaScript string indices, so they
+    stay aligned past emoji and other non-BMP characters.
+    """
+    types: Dict[str, int] = {}
+    reasons: Dict[str | None, int] = {}
+    type_index: List[int] = []
+    reason_index: List[int] = []
+    before_parts: List[str] = []
+    after_parts: List[str] = []
+    before_offsets = [0]
+    after_offsets = [0]
+
+    for change in changes:
+        type_index.append(types.setdefault(change["type"], len(types)))
+        reason_index.append(reasons.setdefault(change.get("reason"), len(reasons)))
+        before_parts.append(change["before"])
+        after_parts.append(change["after"])
+        before_offsets.append(before_offsets[-1] + _utf16_length(change["before"]))
+        after_offsets.append(after_offsets[-1] + _utf16_length(change["after"]))
+
+    return {
+        "count": len(changes),
+        "types": list(types),
+        "reasons": list(reasons),
+        "type_index": type_index,
+        "reason_index": reason_index,
+        "before_text": "".join(before_parts),
+        "before_offsets": before_offsets,
+        "after_text": "".join(after_parts),
+        "after_offsets": after_offsets,
+    }
+
+
+def dumps(payload: Dict[str, Any]) -> bytes:
+    """Serialize plain Python data to JSON bytes without model validation."""
+    if orjson is not None:
+        return orjson.dumps(payload)
+    return json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def accepted_encodings(accept_encoding: str | None) -> set:
+    """Codings the client accepts; `q=0` marks a coding as refused (RFC 9110)."""
+    accepted, refused = set(), set()
+    for item in (accept_encoding or "").split(","):
+        coding, *params = [part.strip().lower() for part in item.split(";")]
+        if not coding:
+            continue
+        quality = 1.0
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        (accepted if quality > 0 else refused).add(coding)
+    if "*" in accepted:
+        accepted |= {"br", "gzip"} - refused
+    return accepted
+
+
+def encode_json_response(payload: Dict[str, Any], accept_encoding: str | None = None) -> Response:
+    """Build a JSON response, compressed with br or gzip when the client accepts it."""
+    body = dumps(payload)
+    headers = {"Vary": "Accept-Encoding"}
+    accepted = accepted_encodings(accept_encoding)
+
+    if len(body) >= MIN_COMPRESS_BYTES:
+        if "br" in accepted and brotli is not None:
+            body = brotli.compress(body, quality=5)
+            headers["Content-Encoding"] = "br"
+        elif "gzip" in accepted:
+            body = gzip.compress(body, compresslevel=5)
+            headers["Content-Encoding"] = "gzip"
+
+    return Response(content=body, media_type="application/json", headers=headers)
@@ -0,0 +1,82 @@
+"""Single-flight coalescing of identical concurrent computations."""
+
+from __future__ import annotations
+
+import hashlib
+import threading
+from typing import Any, Callable, Dict, Optional
+
+
+def content_key(*parts: str) -> str:
+    """Stable key for a request's content."""
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\x00")
+    return digest.hexdigest()
+
+
+class _Call:
+    __slots__ = ("done", "result", "error", "waiters")
+
+    def __init__(self) -> None:
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    """
+    Runs at most one computation per key at a time; callers arriving while it is in
+    flight block until it finishes and share its result (or exception).
+
+    Nothing is cached: once the computation finishes the key is released, and the next
+    caller starts a fresh one. Results are shared objects, so callers must not mutate them.
+    Meant for sync FastAPI handlers, which run in the threadpool.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._calls: Dict[str, _Call] = {}
+        self.counters = {"executed": 0, "coalesced": 0, "failed": 0, "max_waiters": 0}
+
+    def do(self, key: str, fn: Callable[[], Any]) -> Any:
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self.counters["executed"] += 1
+            else:
+                call.waiters += 1
+                self.counters["coalesced"] += 1
+                self.counters["max_waiters"] = max(self.counters["max_waiters"], call.waiters)
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+        except BaseException as exc:
+            call.error = exc
+            with self._lock:
+                self.counters["failed"] += 1
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            total = self.counters["executed"] + self.counters["coalesced"]
+            return {
+                **self.counters,
+                "in_flight": len(self._calls),
+                "dedup_ratio": round(self.counters["coalesced"] / total, 4) if total else 0.0,
+            }
@@ -0,0 +1,65 @@
+"""Incremental text segmentation for streamed request bodies."""
+
+from __future__ import annotations
+
+import codecs
+import re
+from typing import AsyncIterator, Iterator, List
+
+_PARAGRAPH_END = re.compile(r"\n\s*\n")
+_SENTENCE_END = re.compile(r"[.!?][\"')\]]?\s")
+
+
+class PayloadTooLargeError(ValueError):
+    """Raised when a streamed body exceeds the configured size limit."""
+
+
+async def iter_decoded(stream: AsyncIterator[bytes], max_bytes: int) -> AsyncIterator[str]:
+    """Decode a byte stream as UTF-8 piece by piece, enforcing `max_bytes`."""
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    received = 0
+    async for data in stream:
+        received += len(data)
+        if received > max_bytes:
+            raise PayloadTooLargeError(f"Request body exceeds the {max_bytes} byte limit.")
+        text = decoder.decode(data)
+        if text:
+            yield text
+    tail = decoder.decode(b"", final=True)
+    if tail:
+        yield tail
+
+
+class ChunkSegmenter:
+    """
+    Buffers streamed text and emits chunks of roughly `chunk_chars` characters.
+    Chunks are cut at the last paragraph break, else the last sentence end, else the
+    last whitespace, so sentences are not split across chunks.
+    """
+
+    def __init__(self, chunk_chars: int = 4000) -> None:
+        self.chunk_chars = chunk_chars
+        self._buffer = ""
+
+    def _cut_point(self) -> int:
+        window = self._buffer[: self.chunk_chars]
+        for pattern in (_PARAGRAPH_END, _SENTENCE_END):
+            matches = list(pattern.finditer(window))
+            if matches:
+                return matches[-1].end()
+        space = window.rfind(" ")
+        return space + 1 if space > 0 else self.chunk_chars
+
+    def feed(self, text: str) -> Iterator[str]:
+        """Add streamed text and yield every chunk that is now complete."""
+        self._buffer += text
+        while len(self._buffer) >= self.chunk_chars:
+            cut = self._cut_point()
+            chunk, self._buffer = self._buffer[:cut], self._buffer[cut:]
+            if chunk.strip():
+                yield chunk
+
+    def flush(self) -> List[str]:
+        """Return whatever remains in the buffer as a final chunk."""
+        chunk, self._buffer = self._buffer, ""
+        return [chunk] if chunk.strip() else []
@@ -3,7 +3,7 @@
 from __future__ import annotations
 
 import re
-from typing import List
+from typing import Iterator, List, Tuple
 
 import nltk
 from nltk.tokenize import sent_tokenize
@@ -14,6 +14,49 @@ def normalize_text(text: str) -> str:
     return re.sub(r"\s+", " ", text).strip()
 
 
+_PARAGRAPH_BREAK = re.compile(r"\n\s*\n")
+# "Chapter 3", "Part II: The Return", "## Epilogue". A numbered heading's title must follow a
+# separator, so a sentence such as "Part 2 of the plan failed." stays a paragraph.
+_SECTION_HEADING = re.compile(
+    r"^\s*(?:#{1,6}\s+\S.*|(?:chapter|part|book|section)\s+(?:\d+|[ivxlcdm]+)\.?(?:\s*[:.\-\u2013\u2014]\s*\S.{0,80})?)\s*$",
+    re.IGNORECASE,
+)
+
+
+def _iter_blocks(text: str) -> Iterator[str]:
+    """Blank-line separated blocks, found lazily instead of splitting the whole text up front."""
+    start = 0
+    for match in _PARAGRAPH_BREAK.finditer(text):
+        yield text[start:match.start()]
+        start = match.end()
+    yield text[start:]
+
+
+def iter_sections(text: str) -> Iterator[Tuple[str, List[str]]]:
+    """
+    Yield (title, paragraphs) for each chapter-like section of a raw document.
+    Paragraphs are separated by blank lines and normalized individually, so the
+    paragraph structure survives. Text before the first heading is yielded as an
+    untitled section. Only the current section's paragraphs are held at a time.
+    """
+    title = ""
+    paragraphs: List[str] = []
+    for block in _iter_blocks(text):
+        lines = block.strip().splitlines()
+        if not lines:
+            continue
+        if _SECTION_HEADING.match(lines[0]):
+            if paragraphs:
+                yield title, paragraphs
+            title, paragraphs = lines[0].strip().lstrip("#").strip(), []
+            lines = lines[1:]
+        paragraph = normalize_text(" ".join(lines))
+        if paragraph:
+            paragraphs.append(paragraph)
+    if paragraphs:
+        yield title, paragraphs
+
+
 def split_sentences(text: str) -> List[str]:
     """Split text into sentences using NLTK with regex fallback."""
     try:
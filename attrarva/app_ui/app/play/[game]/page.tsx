@@ -127,7 +127,7 @@ export default function GameSession() {
             case "redundancy":
                 return { title: "Redundancy Eraser", backendName: "Redundancy Eraser", getContext: () => ({ original: currentPrompt?.bad }), getInstruction: () => `Remove redundant words from: "${currentPrompt?.bad}"` };
             case "sentence-builder":
-                return { title: "Sentence Builder", backendName: "Sentence Builder", getContext: () => ({ target_sentence: currentPrompt?.target }), getInstruction: () => `Unscramble: ${(currentPrompt?.words || []).join(", ")}` };
+                return { title: "Sentence Builder", backendName: "Sentence Builder", getContext: () => ({ target_sentence: currentPrompt?.target, words: currentPrompt?.words }), getInstruction: () => `Unscramble: ${(currentPrompt?.words || []).join(", ")}` };
             case "reconstructor":
                 return { title: "Sentence Reconstructor", backendName: "Sentence Reconstructor", getContext: () => ({ original: currentPrompt?.original }), getInstruction: () => `Make this sound more ${currentPrompt?.tone}: "${currentPrompt?.original}"` };
             case "plot-hole":
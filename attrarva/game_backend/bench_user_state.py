@@ -0,0 +1,61 @@
+"""Memory benchmark: dict-per-user records vs compact UserState.
+
+Run from attrarva/game_backend:
+    python bench_user_state.py --users 1000000
+"""
+
+import argparse
+import gc
+import time
+import tracemalloc
+from datetime import datetime
+
+from services.user_state import UserState
+
+
+def dict_user():
+    # The record layout GamificationEngine used before UserState
+    return {
+        "xp": 0,
+        "level": 1,
+        "streak": 1,
+        "win_streak": 0,
+        "hearts": 5,
+        "games_played": 0,
+        "games_won": 0,
+        "last_active": datetime.now(),
+        "spider_chart_data": {
+            "Grammar": 10,
+            "Vocabulary": 10,
+            "Tone & Style": 10,
+            "Concision": 10,
+            "Comprehension": 10
+        }
+    }
+
+
+def measure(factory, count: int):
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    users = {f"user_{i}": factory() for i in range(count)}
+    elapsed = time.perf_counter() - start
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del users
+    return current, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--users", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    print(f"Simulating {args.users:,} users")
+    for name, factory in (("dict", dict_user), ("UserState", UserState)):
+        total, elapsed = measure(factory, args.users)
+        print(f"{name:>10}: {total / 2**20:8.1f} MiB total, {total / args.users:6.0f} B/user, built in {elapsed:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+"""Multi-worker load test for the SQLite-backed GamificationEngine.
+
+Spawns several processes that hammer the same users through one database file and
+checks that no XP update is lost, then checks that a journaled game applied in
+write-behind mode survives a crash before the next flush, and that games queued
+back to back score the same as games applied one at a time. Run from attrarva/game_backend:
+    python load_test_storage.py --workers 4 --ops 500
+"""
+
+import argparse
+import asyncio
+import multiprocessing
+import os
+import tempfile
+import time
+
+from services.gamification import GamificationEngine
+from services.game_events import GameEventPipeline, new_game_event
+from services.storage import SQLiteUserStore
+
+XP_PER_OP = 7
+
+
+def worker(db_path: str, users: int, ops: int, seed: int):
+    engine = GamificationEngine(store=SQLiteUserStore(db_path))
+    for i in range(ops):
+        user_id = f"load_user_{(seed + i) % users}"
+        with engine.transaction(user_id):
+            engine.add_xp(user_id, XP_PER_OP)
+            engine.update_win_streak(user_id, True)
+    engine.close()
+
+
+def check_game_event_crash(db_path: str):
+    """Apply one lost game in write-behind mode, "crash" without flushing, and reopen."""
+    engine = GamificationEngine(store=SQLiteUserStore(db_path), write_behind=True, flush_interval=3600)
+    event = new_game_event("crash_user", "Tone Switcher", False, 0.2, False)
+    engine.reserve_game_result(event)
+    engine.store.append_game_events([event])
+    engine.apply_game_result(event)
+    engine._stop.set()  # no close(), so nothing is flushed
+
+    store = SQLiteUserStore(db_path)
+    user = store.load("crash_user")
+    pending = list(store.iter_pending_game_events())
+    store.close()
+    if user is None or user["games_played"] != 1 or user["hearts"] != 4 or pending:
+        raise SystemExit(f"❌ Applied game event lost on crash: user={user} pending={len(pending)}")
+    print("✅ Applied game event survives a crash before flush")
+
+
+async def _queue_then_apply(db_path: str, games):
+    """Submit every game before the pipeline's worker runs; start() then replays them."""
+    engine = GamificationEngine(store=SQLiteUserStore(db_path))
+    pipeline = GameEventPipeline(engine)
+    pipeline._queue = asyncio.Queue()
+    outcomes = [await pipeline.submit(new_game_event("queued_user", *game)) for game in games]
+    await pipeline.start()
+    await pipeline.aclose()
+    xp = engine.get_user_stats("queued_user")["xp"]
+    engine.close()
+    return outcomes, xp
+
+
+def check_queued_game_results(db_dir: str):
+    """Five quick wins and a loss queued at once must match applying them one by one."""
+    games = [("Tone Switcher", True, 0.9, False)] * 5 + [("Tone Switcher", False, 0.2, False)]
+    outcomes, queued_xp = asyncio.run(_queue_then_apply(os.path.join(db_dir, "queued.db"), games))
+
+    engine = GamificationEngine(store=SQLiteUserStore(os.path.join(db_dir, "sequential.db")))
+    expected = []
+    for game in games:
+        event = new_game_event("queued_user", *game)
+        expected.append(engine.reserve_game_result(event))
+        engine.store.append_game_events([event])
+        engine.apply_game_result(event)
+    sequential_xp = engine.get_user_stats("queued_user")["xp"]
+    engine.close()
+
+    if outcomes != expected or queued_xp != sequential_xp:
+        raise SystemExit(f"❌ Queued games scored differently: XP {queued_xp} vs {sequential_xp}, "
+                         f"outcomes {outcomes} vs {expected}")
+    print(f"✅ Queued games score like sequential ones ({queued_xp} XP)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--ops", type=int, default=500, help="updates per worker")
+    parser.add_argument("--users", type=int, default=10)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "load_test.db")
+        GamificationEngine(store=SQLiteUserStore(db_path)).close()
+
+        start = time.perf_counter()
+        procs = [
+            multiprocessing.Process(target=worker, args=(db_path, args.users, args.ops, n))
+            for n in range(args.workers)
+        ]
+        for p in procs:
+            p.start()
+        for p in procs:
+            p.join()
+        elapsed = time.perf_counter() - start
+
+        store = SQLiteUserStore(db_path)
+        records = {uid: data for uid, data in store.iter_users() if uid.startswith("load_user_")}
+        store.close()
+        check_game_event_crash(db_path)
+        check_queued_game_results(tmp)
+
+    total_ops = args.workers * args.ops
+    expected_xp = total_ops * XP_PER_OP
+    actual_xp = sum(data["xp"] for data in records.values())
+    actual_wins = sum(data["win_streak"] for data in records.values())
+
+    print(f"Workers: {args.workers}  Ops: {total_ops}  Time: {elapsed:.2f}s  Throughput: {total_ops / elapsed:.0f} ops/s")
+    print(f"XP total: {actual_xp} (expected {expected_xp})  Win-streak total: {actual_wins} (expected {total_ops})")
+    if actual_xp != expected_xp or actual_wins != total_ops:
+        raise SystemExit("❌ Lost updates detected")
+    print("✅ No lost updates")
+
+
+if __name__ == "__main__":
+    main()
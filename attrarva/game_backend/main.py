@@ -1,7 +1,15 @@
-from fastapi import FastAPI, HTTPException, Header
+import os
+import sys
+import json
+import asyncio
+import logging
+from pathlib import Path
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, HTTPException, Header, Depends
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse, PlainTextResponse
 from pydantic import BaseModel
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Literal
 from models import (
     AnalyzeRequest, 
     AnalyzeResponse,
@@ -18,9 +26,31 @@ from models import (
 )
 from services.style import StyleRefinementService
 from services.gamification import GamificationEngine
+from services.storage import SQLiteUserStore
 from services.ai_engine import GroqService
+from services.prompt_pool import PromptPool
+from services.verification import VerificationEngine
+from services.verdict_cache import VerdictCache
+from services.game_events import GameEventPipeline, new_game_event, audit_log
+from services import verification
 
-app = FastAPI(title="WriteLingo Backend", description="Gamified Writing Assistant API")
+# Runtime diagnostics are shared with the AI engine, whose package sits at the repository root
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+from ai_engine.utils import diagnostics  # noqa: E402
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    prompt_pool.warm(list(prompt_pool.seeds))
+    await asyncio.to_thread(verification.load_similarity_model)
+    await game_events.start()
+    yield
+    await prompt_pool.aclose()
+    await game_events.aclose()
+    await asyncio.to_thread(gamification_engine.close)
+    # Release pooled keep-alive connections on shutdown
+    await groq_service.aclose()
+
+app = FastAPI(title="WriteLingo Backend", description="Gamified Writing Assistant API", lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -32,26 +62,48 @@ app.add_middleware(
 
 # Initialize services
 style_service = StyleRefinementService()
-gamification_engine = GamificationEngine()
+gamification_engine = GamificationEngine(
+    store=SQLiteUserStore(os.getenv("GAMIFICATION_DB", "gamification.db")),
+    write_behind=os.getenv("GAMIFICATION_WRITE_BEHIND", "false").lower() == "true",
+    flush_interval=float(os.getenv("GAMIFICATION_FLUSH_INTERVAL", 1.0)),
+)
 groq_service = GroqService()
+prompt_pool = PromptPool(groq_service)
+verification_engine = VerificationEngine(groq_service, verdict_cache=VerdictCache())
+game_events = GameEventPipeline(gamification_engine)
+
+# Audit records go to GAME_AUDIT_LOG if set, otherwise to stderr
+_audit_path = os.getenv("GAME_AUDIT_LOG")
+audit_log.addHandler(logging.FileHandler(_audit_path) if _audit_path else logging.StreamHandler())
+audit_log.setLevel(logging.INFO)
+audit_log.propagate = False
+
+# /debug endpoints exist only when DIAGNOSTICS_TOKEN is set; SIGUSR2 profiling is a separate opt-in
+DIAGNOSTICS_TOKEN = os.getenv("DIAGNOSTICS_TOKEN")
+profiler = diagnostics.SamplingProfiler()
+allocation_tracker = diagnostics.AllocationTracker()
+if os.getenv("DIAGNOSTICS_SIGNAL", "false").lower() == "true":
+    diagnostics.install_profile_signal(profiler, Path(os.getenv("DIAGNOSTICS_DIR", "diagnostics")))
 
 # Default user if header is missing
 DEFAULT_USER = "guest_user"
 
 @app.post("/game/prompt", response_model=GamePromptResponse)
 async def get_prompt(request: GamePromptRequest, x_user_id: str = Header(DEFAULT_USER)):
-    """Generates a dynamic AI prompt using Groq."""
-    ai_data = groq_service.generate_prompt(request.game_type)
+    """Serves a pooled prompt; the pool is refilled from Groq in the background."""
+    try:
+        ai_data = await prompt_pool.get_prompt(x_user_id, request.game_type)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     # Extract hint if present in the ai_data dictionary or use the one generated outside
     hint = ai_data.get("hint")
     return GamePromptResponse(prompt_data=ai_data, hint=hint)
 
 @app.post("/game/verify", response_model=GameVerifyResponse)
 async def verify_game(request: GameVerifyRequest, x_user_id: str = Header(DEFAULT_USER)):
-    print(f"INCOMING PAYLOAD for {x_user_id}:", request.model_dump())
     try:
-        # Use Groq for intelligent verification
-        ai_result = groq_service.verify_answer(
+        # Known answers are checked locally; ambiguous ones go to Groq
+        ai_result = await verification_engine.verify(
             request.game_type, 
             request.user_input, 
             request.context or {}
@@ -62,30 +114,20 @@ async def verify_game(request: GameVerifyRequest, x_user_id: str = Header(DEFAUL
         mastery_level = ai_result.get("mastery_level", 0.0)
         correct_answer = ai_result.get("correct_answer")
     
-        if success:
-            xp_reward = gamification_engine.calculate_xp(x_user_id, request.game_type, mastery_level, request.hint_used)
-            gamification_engine.add_xp(x_user_id, xp_reward)
-            streak = gamification_engine.update_streak(x_user_id)
-            current_hearts = gamification_engine.users[x_user_id]["hearts"]
-        else:
-            # Deduct a heart on failure
-            current_hearts = gamification_engine.deduct_heart(x_user_id)
-            
-            # Still update XP (penalty is handled in calculate_xp)
-            xp_reward = gamification_engine.calculate_xp(x_user_id, request.game_type, mastery_level, request.hint_used)
-            gamification_engine.add_xp(x_user_id, xp_reward)
-            streak = gamification_engine.get_user_stats(x_user_id)["streak"]
-            
-        win_streak = gamification_engine.update_win_streak(x_user_id, success)
+        # Fast path: XP math and the resulting counters from the user's state plus games still queued.
+        # Stats, skills, streaks, hearts and the audit record are applied by the event pipeline.
+        outcome = await game_events.submit(new_game_event(
+            x_user_id, request.game_type, success, mastery_level, request.hint_used
+        ))
     
         return GameVerifyResponse(
             success=success,
             reason=reason,
-            xp_reward=xp_reward,
-            new_streak=streak,
-            win_streak=win_streak,
+            xp_reward=outcome["xp_reward"],
+            new_streak=outcome["new_streak"],
+            win_streak=outcome["win_streak"],
             mastery_level=mastery_level,
-            current_hearts=current_hearts,
+            current_hearts=outcome["current_hearts"],
             correct_answer=correct_answer
         )
     except Exception as e:
@@ -93,15 +135,68 @@ async def verify_game(request: GameVerifyRequest, x_user_id: str = Header(DEFAUL
         traceback.print_exc()
         raise HTTPException(status_code=500, detail=str(e))
 
+def _sse(event: str, data: Dict[str, Any]) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+@app.post("/game/verify/stream")
+async def verify_game_stream(request: GameVerifyRequest, x_user_id: str = Header(DEFAULT_USER)):
+    """
+    Server-sent-events variant of /game/verify. Emits `verdict` (success, mastery and the
+    XP/streak/hearts outcome) as soon as the judge has decided, then `reason` and
+    `correct_answer` text deltas, then `result` with the full GameVerifyResponse.
+    """
+    async def events():
+        try:
+            verdict = None
+            outcome = None
+            ai_result = {}
+            async for kind, data in verification_engine.verify_stream(
+                request.game_type, request.user_input, request.context or {}
+            ):
+                if kind == "verdict":
+                    verdict = data
+                    outcome = await game_events.submit(new_game_event(
+                        x_user_id, request.game_type, verdict["success"], verdict["mastery_level"], request.hint_used
+                    ))
+                    yield _sse("verdict", {**verdict, **outcome})
+                elif kind == "text":
+                    yield _sse(data["field"], {"delta": data["delta"]})
+                else:
+                    ai_result = data
+
+            response = GameVerifyResponse(
+                success=verdict["success"],
+                reason=ai_result.get("reason") or "AI could not determine correctness.",
+                mastery_level=verdict["mastery_level"],
+                correct_answer=ai_result.get("correct_answer"),
+                **outcome
+            )
+            yield _sse("result", response.model_dump())
+        except Exception as e:
+            import traceback
+            traceback.print_exc()
+            yield _sse("error", {"detail": str(e)})
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
+
+@app.get("/game/verify/stats")
+async def get_verify_stats():
+    """Reports how many verifications were resolved locally, from cache, or by the LLM."""
+    return {
+        **verification_engine.stats(),
+        "events": game_events.stats(),
+        "groq_coalescing": groq_service.inflight.stats(),
+    }
+
 @app.post("/user/refill-hearts")
 async def refill_hearts(x_user_id: str = Header(DEFAULT_USER)):
-    hearts = gamification_engine.refill_hearts(x_user_id)
+    hearts = await asyncio.to_thread(gamification_engine.refill_hearts, x_user_id)
     return {"hearts": hearts}
 
 @app.post("/user/redeem-xp", response_model=RedeemXPResponse)
 async def redeem_xp(request: RedeemXPRequest, x_user_id: str = Header(DEFAULT_USER)):
     """Redeems user XP for credits (simulated on frontend)."""
-    result = gamification_engine.redeem_xp(x_user_id, request.amount)
+    result = await asyncio.to_thread(gamification_engine.redeem_xp, x_user_id, request.amount)
     if not result["success"]:
         return RedeemXPResponse(success=False, message=result["message"])
     
@@ -114,7 +209,7 @@ async def redeem_xp(request: RedeemXPRequest, x_user_id: str = Header(DEFAULT_US
 
 @app.get("/user/stats", response_model=UserStatsResponse)
 async def get_user_stats(x_user_id: str = Header(DEFAULT_USER)):
-    stats = gamification_engine.get_user_stats(x_user_id)
+    stats = await asyncio.to_thread(gamification_engine.get_user_stats, x_user_id)
     return UserStatsResponse(
         user_id=x_user_id,        xp=stats.get("xp", 0),
         level=stats.get("level", 1),
@@ -127,6 +222,54 @@ async def get_user_stats(x_user_id: str = Header(DEFAULT_USER)):
     )
 
 @app.get("/leaderboard", response_model=LeaderboardResponse)
-async def get_leaderboard():
-    board = gamification_engine.get_leaderboard()
-    return LeaderboardResponse(top_users=[LeaderboardUser(**user) for user in board])
+async def get_leaderboard(offset: int = 0, limit: int = 15, window: Literal["all", "daily", "weekly"] = "all",
+                          x_user_id: str = Header(DEFAULT_USER)):
+    limit = max(1, min(limit, 100))
+
+    # Syncing the index may poll the shared store, so it runs off the event loop
+    def read_board():
+        board = gamification_engine.get_leaderboard(offset=max(offset, 0), limit=limit, window=window)
+        return board, gamification_engine.get_rank(x_user_id, window=window), gamification_engine.ranked_count(window)
+
+    board, your_rank, total_users = await asyncio.to_thread(read_board)
+    return LeaderboardResponse(
+        top_users=[LeaderboardUser(**user) for user in board],
+        your_rank=your_rank,
+        total_users=total_users
+    )
+
+
+def require_diagnostics(x_diagnostics_token: str = Header(None)):
+    if not DIAGNOSTICS_TOKEN:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if not diagnostics.token_matches(DIAGNOSTICS_TOKEN, x_diagnostics_token):
+        raise HTTPException(status_code=403, detail="Invalid diagnostics token.")
+
+@app.get("/debug/runtime", dependencies=[Depends(require_diagnostics)])
+async def debug_runtime():
+    """Process info, torch thread settings and memory of the local similarity model."""
+    return {
+        "process": diagnostics.process_runtime(),
+        "torch": diagnostics.torch_runtime(),
+        "models": diagnostics.model_memory({"similarity": verification._similarity_model}),
+        "event_loop_tasks": len(asyncio.all_tasks()),
+    }
+
+@app.post("/debug/profile", dependencies=[Depends(require_diagnostics)])
+async def debug_profile(seconds: float = 10.0, interval_ms: float = 5.0, format: Literal["folded", "json"] = "folded"):
+    """Sample every thread's stack, the event loop included, for `seconds` (max 60)."""
+    try:
+        result = await asyncio.to_thread(profiler.capture, seconds, interval_ms / 1000)
+    except diagnostics.DiagnosticsBusyError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    if format == "folded":
+        return PlainTextResponse(diagnostics.to_folded(result["stacks"]))
+    return {**result, "stacks": diagnostics.profile_lines(result["stacks"], limit=200)}
+
+@app.post("/debug/tracemalloc", dependencies=[Depends(require_diagnostics)])
+async def debug_tracemalloc(seconds: float = 10.0, top: int = 25, frames: int = 1):
+    """Allocation growth by source line over `seconds` (max 60); tracing is off again afterwards."""
+    try:
+        return await asyncio.to_thread(allocation_tracker.diff, seconds, top, frames)
+    except diagnostics.DiagnosticsBusyError as e:
+        raise HTTPException(status_code=409, detail=str(e))
@@ -55,6 +55,8 @@ class LeaderboardUser(BaseModel):
 
 class LeaderboardResponse(BaseModel):
     top_users: List[LeaderboardUser]
+    your_rank: Optional[int] = None # among real users, mock entries excluded
+    total_users: int = 0
 
 class RedeemXPRequest(BaseModel):
     amount: int = 1000
@@ -1,63 +1,200 @@
 import os
 import json
-import requests
+import random
+import asyncio
+import httpx
 from dotenv import load_dotenv
 
+from services.single_flight import SingleFlight, content_key
+
 load_dotenv()
 
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+
+VERIFY_SYSTEM_PROMPT = (
+    "You are an AI judge for a language game. Analyze the user's answer for the game_type "
+    "and given context. "
+    "Verify if it solves the problem correctly. Return a JSON object with: "
+    "'success' (boolean), "
+    "'reason' (string explaining why), "
+    "'mastery_level' (float 0.0 to 1.0 reflecting quality), "
+    "'correct_answer' (string with an ideal answer)."
+)
+
+# Verdict fields first so a streaming client can show the result before the explanation
+VERIFY_STREAM_SYSTEM_PROMPT = (
+    VERIFY_SYSTEM_PROMPT
+    + " Respond with only the JSON object, no markdown, with keys in exactly this order: "
+    "success, mastery_level, reason, correct_answer."
+)
+
 class GroqService:
     def __init__(self):
         self.api_key = os.getenv("GROQ_API_KEY")
         if not self.api_key:
             print("WARNING: GROQ_API_KEY not found in environment")
-            
-    def _call_groq_json(self, system_msg, user_msg):
+
+        # Point GROQ_API_URL at a local stub server to run offline
+        self.api_url = os.getenv("GROQ_API_URL", "https://api.groq.com/openai/v1/chat/completions")
+        self.model = os.getenv("GROQ_MODEL", "llama-3.3-70b-versatile")
+        self.max_retries = int(os.getenv("GROQ_MAX_RETRIES", 3))
+        self.backoff_base = float(os.getenv("GROQ_BACKOFF_BASE", 0.5))
+        self.backoff_max = float(os.getenv("GROQ_BACKOFF_MAX", 8.0))
+        self.timeout = httpx.Timeout(
+            float(os.getenv("GROQ_READ_TIMEOUT", 30.0)),
+            connect=float(os.getenv("GROQ_CONNECT_TIMEOUT", 5.0)),
+        )
+        max_concurrency = int(os.getenv("GROQ_MAX_CONCURRENCY", 8))
+        self.limits = httpx.Limits(
+            max_connections=max_concurrency,
+            max_keepalive_connections=max_concurrency,
+            keepalive_expiry=60.0,
+        )
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._client = None
+        # Identical verifications in flight share one Groq call
+        self.inflight = SingleFlight()
+
+    def _get_client(self) -> httpx.AsyncClient:
+        # Created lazily so the pooled client binds to the server's event loop
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(timeout=self.timeout, limits=self.limits)
+        return self._client
+
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    def _backoff_delay(self, attempt: int, retry_after: str = None) -> float:
+        if retry_after:
+            try:
+                return min(float(retry_after), self.backoff_max)
+            except ValueError:
+                pass
+        # Full jitter: uniform in [0, base * 2^attempt], capped
+        return random.uniform(0, min(self.backoff_base * (2 ** attempt), self.backoff_max))
+
+    async def _call_groq_json(self, system_msg, user_msg):
         if not self.api_key:
             return {}
-        try:
-            resp = requests.post(
-                "https://api.groq.com/openai/v1/chat/completions",
-                headers={
-                    "Authorization": f"Bearer {self.api_key}",
-                    "Content-Type": "application/json"
-                },
-                json={
-                    "model": "llama-3.3-70b-versatile",
-                    "messages": [
-                        {"role": "system", "content": system_msg},
-                        {"role": "user", "content": user_msg}
-                    ],
-                    "response_format": {"type": "json_object"}
-                }
-            )
-            data = resp.json()
-            if "choices" in data and data["choices"]:
-                content = data["choices"][0]["message"]["content"]
-                return json.loads(content)
-        except Exception as e:
-            print(f"Groq error: {e}")
+        payload = {
+            "model": self.model,
+            "messages": [
+                {"role": "system", "content": system_msg},
+                {"role": "user", "content": user_msg}
+            ],
+            "response_format": {"type": "json_object"}
+        }
+        headers = {
+            "Authorization": f"Bearer {self.api_key}",
+            "Content-Type": "application/json"
+        }
+        client = self._get_client()
+        for attempt in range(self.max_retries + 1):
+            retry_after = None
+            try:
+                async with self._semaphore:
+                    resp = await client.post(self.api_url, headers=headers, json=payload)
+                if resp.status_code in RETRYABLE_STATUS and attempt < self.max_retries:
+                    retry_after = resp.headers.get("retry-after")
+                    print(f"Groq returned {resp.status_code}, retrying (attempt {attempt + 1})")
+                else:
+                    data = resp.json()
+                    if "choices" in data and data["choices"]:
+                        content = data["choices"][0]["message"]["content"]
+                        return json.loads(content)
+                    return {}
+            except (httpx.TimeoutException, httpx.TransportError) as e:
+                if attempt >= self.max_retries:
+                    print(f"Groq error: {e}")
+                    return {}
+                print(f"Groq transport error: {e}, retrying (attempt {attempt + 1})")
+            except Exception as e:
+                print(f"Groq error: {e}")
+                return {}
+            await asyncio.sleep(self._backoff_delay(attempt, retry_after))
         return {}
 
-    def generate_prompt(self, game_type: str) -> dict:
+    async def generate_prompt(self, game_type: str) -> dict:
         system = (
             "You are a gamified writing assistant. Given a sub-game name, generate a creative "
             "exercise for the user to solve. Return JSON with 'text' (the exercise description/problem), "
             "and optionally 'hint' (a clue). "
             "For example, if game_type is 'Tone Switcher', describe a text they need to rewrite."
         )
-        result = self._call_groq_json(system, f"Generate an exercise for game type: {game_type}")
+        # Not coalesced: concurrent refills for one game type must produce different exercises
+        result = await self._call_groq_json(system, f"Generate an exercise for game type: {game_type}")
         return result
 
-    def verify_answer(self, game_type: str, user_input: str, context: dict) -> dict:
-        system = (
-            "You are an AI judge for a language game. Analyze the user's answer for the game_type "
-            "and given context. "
-            "Verify if it solves the problem correctly. Return a JSON object with: "
-            "'success' (boolean), "
-            "'reason' (string explaining why), "
-            "'mastery_level' (float 0.0 to 1.0 reflecting quality), "
-            "'correct_answer' (string with an ideal answer)."
-        )
-        msg = f"Game Type: {game_type}\nContext: {json.dumps(context)}\nUser Input: {user_input}"
-        result = self._call_groq_json(system, msg)
+    async def _stream_groq(self, system_msg, user_msg):
+        """
+        Yields the completion text as it is generated. Retries only before the first token,
+        so a caller never sees text twice. JSON mode is not used with streaming; the prompt
+        asks for a bare JSON object instead.
+        """
+        if not self.api_key:
+            return
+        payload = {
+            "model": self.model,
+            "messages": [
+                {"role": "system", "content": system_msg},
+                {"role": "user", "content": user_msg}
+            ],
+            "stream": True
+        }
+        headers = {
+            "Authorization": f"Bearer {self.api_key}",
+            "Content-Type": "application/json"
+        }
+        client = self._get_client()
+        for attempt in range(self.max_retries + 1):
+            retry_after = None
+            started = False
+            try:
+                async with self._semaphore:
+                    async with client.stream("POST", self.api_url, headers=headers, json=payload) as resp:
+                        if resp.status_code in RETRYABLE_STATUS and attempt < self.max_retries:
+                            retry_after = resp.headers.get("retry-after")
+                            print(f"Groq returned {resp.status_code}, retrying (attempt {attempt + 1})")
+                        elif resp.status_code != 200:
+                            print(f"Groq stream failed with status {resp.status_code}")
+                            return
+                        else:
+                            async for line in resp.aiter_lines():
+                                if not line.startswith("data:"):
+                                    continue
+                                data = line[5:].strip()
+                                if data == "[DONE]":
+                                    return
+                                choices = json.loads(data).get("choices") or [{}]
+                                delta = (choices[0].get("delta") or {}).get("content")
+                                if delta:
+                                    started = True
+                                    yield delta
+                            return
+            except (httpx.TimeoutException, httpx.TransportError) as e:
+                if started or attempt >= self.max_retries:
+                    print(f"Groq stream error: {e}")
+                    return
+                print(f"Groq transport error: {e}, retrying (attempt {attempt + 1})")
+            except Exception as e:
+                print(f"Groq stream error: {e}")
+                return
+            await asyncio.sleep(self._backoff_delay(attempt, retry_after))
+
+    @staticmethod
+    def _verify_message(game_type: str, user_input: str, context: dict) -> str:
+        return f"Game Type: {game_type}\nContext: {json.dumps(context)}\nUser Input: {user_input}"
+
+    async def verify_answer(self, game_type: str, user_input: str, context: dict) -> dict:
+        msg = self._verify_message(game_type, user_input, context)
+        key = content_key(self.model, VERIFY_SYSTEM_PROMPT, msg)
+        result = await self.inflight.do(key, lambda: self._call_groq_json(VERIFY_SYSTEM_PROMPT, msg))
         return result
+
+    async def stream_verify_answer(self, game_type: str, user_input: str, context: dict):
+        """Streams the raw JSON judgement text; parse it with services.json_stream."""
+        msg = self._verify_message(game_type, user_input, context)
+        async for delta in self._stream_groq(VERIFY_STREAM_SYSTEM_PROMPT, msg):
+            yield delta
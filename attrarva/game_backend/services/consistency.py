@@ -1,52 +1,91 @@
+import os
+import re
 import spacy
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Iterable, Tuple
+
+from services.world_state import WorldStateStore
+
+# Words that explain a change of location; matched case-insensitively in one pass
+TRANSITION_CUES = ("travel", "went", "moved")
+TRANSITION_PATTERN = re.compile("|".join(map(re.escape, TRANSITION_CUES)), re.IGNORECASE)
 
 class NarrativeConsistencyService:
-    def __init__(self):
+    def __init__(self, world_state: WorldStateStore = None, batch_size: int = 64):
+        # A local pipeline directory or an installed package name; never downloaded at runtime
+        model = os.getenv("SPACY_MODEL", "en_core_web_sm")
         try:
-            self.nlp = spacy.load("en_core_web_sm")
-        except OSError:
-            # Fallback if model not downloaded gracefully handle later
-            import os
-            os.system("python -m spacy download en_core_web_sm")
-            self.nlp = spacy.load("en_core_web_sm")
-            
-        # In-memory store: user_id -> entity_name -> location (GPE) or ORG
-        self.world_state: Dict[str, Dict[str, str]] = {}
+            self.nlp = spacy.load(model)
+        except OSError as e:
+            raise RuntimeError(
+                f"spaCy model '{model}' is not available. Install en-core-web-sm at build time "
+                "or point SPACY_MODEL at a local pipeline directory."
+            ) from e
+
+        # Bounded store: user_id -> entity -> (location, organization, last-seen sentence)
+        self.world_state = world_state or WorldStateStore(
+            max_stories=int(os.getenv("CONSISTENCY_MAX_STORIES", 50000)),
+            ttl_seconds=float(os.getenv("CONSISTENCY_TTL_SECONDS", 86400)),
+            spill_path=os.getenv("CONSISTENCY_SPILL_PATH", "world_state.db") or None,
+        )
+        self.batch_size = batch_size
 
     def track_and_analyze(self, user_id: str, text: str) -> List[Dict[str, str]]:
-        if user_id not in self.world_state:
-            self.world_state[user_id] = {}
+        return self.track_and_analyze_batch([(user_id, text)])[0]
+
+    def track_and_analyze_batch(self, items: Iterable[Tuple[str, str]]) -> List[List[Dict[str, str]]]:
+        """
+        Analyze many (user_id, text) chunks, parsing them together with `nlp.pipe`. Chunks
+        of the same user are applied in order, so a batch may hold a whole story.
+        """
+        items = list(items)
+        docs = self.nlp.pipe((text for _, text in items), batch_size=self.batch_size)
+        return [self._analyze_doc(user_id, doc) for (user_id, _), doc in zip(items, docs)]
 
-        doc = self.nlp(text)
-        current_locations = {}
+    def _analyze_doc(self, user_id: str, doc) -> List[Dict[str, str]]:
+        story = self.world_state.get(user_id)
         issues = []
 
-        # Find PERSON and GPE in the current sentence/text
-        persons = [ent.text for ent in doc.ents if ent.label_ == "PERSON"]
+        sentence_index = {sent.start: story.sentences + i for i, sent in enumerate(doc.sents)}
+        story.sentences += len(sentence_index)
+
+        # Find PERSON, GPE and ORG in the current sentence/text
+        persons = [ent for ent in doc.ents if ent.label_ == "PERSON"]
         locations = [ent.text for ent in doc.ents if ent.label_ == "GPE"]
-        
+        organizations = [ent.text for ent in doc.ents if ent.label_ == "ORG"]
+
         # Simple heuristic: bind the first mentioned GPE to all PERSONs in this text chunk
         # In a real app, dependency parsing would be used.
         detected_loc = locations[0] if locations else None
+        detected_org = organizations[0] if organizations else None
+        has_transition = None
+
+        for ent in persons:
+            person = ent.text
+            previous = story.get(person)
+            previous_loc = previous[0] if previous else None
+            previous_org = previous[1] if previous else None
 
-        for person in persons:
             if detected_loc:
-                # Check consistency
-                previous_loc = self.world_state[user_id].get(person)
-                
                 # If they were somewhere else and no transition word is found (simplified logic)
                 if previous_loc and previous_loc != detected_loc:
-                    if "travel" not in text.lower() and "went" not in text.lower() and "moved" not in text.lower():
+                    if has_transition is None:
+                        has_transition = TRANSITION_PATTERN.search(doc.text) is not None
+                    if not has_transition:
                         issues.append({
                             "type": "consistency",
                             "original": f"{person} in {detected_loc}",
                             "suggested": f"Explain how {person} moved from {previous_loc} to {detected_loc}.",
                             "reason": f"Plot contradiction found: {person} was previously in {previous_loc} but is now in {detected_loc} without a transition."
                         })
-                
-                # Update world state
-                self.world_state[user_id][person] = detected_loc
+
+            # Update world state
+            story.set(
+                person,
+                detected_loc or previous_loc,
+                detected_org or previous_org,
+                sentence_index.get(ent.sent.start, story.sentences - 1),
+                self.world_state.max_entities,
+            )
 
         # Return found issues
         return issues
@@ -0,0 +1,125 @@
+import asyncio
+import json
+import logging
+import time
+import uuid
+from typing import Dict, Any, Optional
+
+# Audit trail of applied games; main.py decides where it is written
+audit_log = logging.getLogger("writelingo.audit")
+
+
+def new_game_event(user_id: str, game_type: str, success: bool, mastery_level: float,
+                   hint_used: bool) -> Dict[str, Any]:
+    """
+    A finished game as recorded in the journal. `xp_reward` is fixed at verify time by
+    `GameEventPipeline.submit`.
+    """
+    return {
+        "event_id": uuid.uuid4().hex,
+        "user_id": user_id,
+        "game_type": game_type,
+        "success": success,
+        "mastery_level": mastery_level,
+        "hint_used": hint_used,
+        "xp_reward": None,
+        "ts": time.time(),
+    }
+
+
+class GameEventPipeline:
+    """
+    Applies finished games off the response path.
+
+    `submit()` reserves the event's outcome with `GamificationEngine.reserve_game_result`,
+    journals the event in the user store and queues it; a single worker task
+    applies queued events in order through `GamificationEngine.apply_game_result` (stats,
+    skill chart, XP, streaks, hearts) and writes an audit record. Events that were
+    journaled but never applied, e.g. after a crash, are replayed by `start()`. Replay is
+    idempotent because the store applies each event id at most once. Store calls run in
+    worker threads so a busy database never blocks the event loop.
+    """
+
+    def __init__(self, gamification_engine, max_queue: int = 10000):
+        self.engine = gamification_engine
+        self.store = gamification_engine.store
+        self.max_queue = max_queue
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+        self.submitted = 0
+        self.applied = 0
+        self.duplicates = 0
+        self.failed = 0
+
+    async def start(self):
+        self._queue = asyncio.Queue(maxsize=self.max_queue)
+        replayed = await asyncio.to_thread(self.replay)
+        if replayed:
+            print(f"Replayed {replayed} pending game events")
+        self._worker = asyncio.create_task(self._run())
+
+    def replay(self) -> int:
+        """Apply every journaled event not yet applied; returns how many were applied now."""
+        count = 0
+        for event in self.store.iter_pending_game_events():
+            if self._apply(event, replayed=True):
+                count += 1
+        return count
+
+    async def submit(self, event: Dict[str, Any]) -> Dict[str, int]:
+        """Queue a finished game; returns the XP reward and counters it will result in."""
+        outcome = await asyncio.to_thread(self.engine.reserve_game_result, event)
+        try:
+            await asyncio.to_thread(self.store.append_game_events, [event])
+        except BaseException:
+            self.engine.release_game_result(event)
+            raise
+        self.submitted += 1
+        await self._queue.put(event)
+        return outcome
+
+    async def _run(self):
+        while True:
+            event = await self._queue.get()
+            try:
+                await asyncio.to_thread(self._apply, event)
+            finally:
+                self._queue.task_done()
+
+    def _apply(self, event: Dict[str, Any], replayed: bool = False) -> bool:
+        try:
+            applied = self.engine.apply_game_result(event)
+        except Exception as e:
+            # Left unapplied in the journal, so the next start() retries it
+            self.failed += 1
+            print(f"Failed to apply game event {event.get('event_id')}: {e}")
+            return False
+        if not applied:
+            self.duplicates += 1
+            return False
+        self.applied += 1
+        audit_log.info(json.dumps({**event, "replayed": replayed}))
+        return True
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "submitted": self.submitted,
+            "applied": self.applied,
+            "duplicates": self.duplicates,
+            "failed": self.failed,
+            "queued": self._queue.qsize() if self._queue is not None else 0,
+        }
+
+    async def aclose(self, timeout: float = 5.0):
+        """Drain the queue (bounded by `timeout`) and stop the worker."""
+        if self._queue is not None:
+            try:
+                await asyncio.wait_for(self._queue.join(), timeout)
+            except asyncio.TimeoutError:
+                pass
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
@@ -1,201 +1,474 @@
-from datetime import datetime
-from typing import Dict, Any
+import time
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from typing import Dict, Any, Optional, List
+
+from services.storage import UserStore, MemoryUserStore
+from services.user_state import UserState, GAME_RULES, DEFAULT_GAME_RULE
+from services.leaderboard import RankedIndex, WindowedLeaderboards, WINDOW_KINDS, window_start
+
+# Hyper-competitive mock data, shown on the public board but never ranked against real users
+MOCK_LEADERBOARD = [
+    {"user_id": "Arjun_Pro", "level": 12, "xp": 6200},
+    {"user_id": "Neha_Writer", "level": 10, "xp": 5100},
+    {"user_id": "Rahul_Grammar", "level": 9, "xp": 4800},
+    {"user_id": "Priya_Lit", "level": 8, "xp": 4200},
+    {"user_id": "Vikram_Bot", "level": 7, "xp": 3600},
+    {"user_id": "Sarthak_AI", "level": 15, "xp": 7500},
+    {"user_id": "Aisha_Pen", "level": 6, "xp": 3100},
+    {"user_id": "Kabir_Lyrics", "level": 5, "xp": 2600},
+    {"user_id": "Rohan_Scribe", "level": 4, "xp": 2100},
+    {"user_id": "Zoya_Auth", "level": 3, "xp": 1600}
+]
+
+# Overlap when polling a shared store so rows committed late are not missed
+INDEX_SYNC_OVERLAP = timedelta(seconds=5)
 
 class GamificationEngine:
-    def __init__(self):
-        # In-memory store: user_id -> dict
-        self.users: Dict[str, Dict[str, Any]] = {
-            "default_user": {
-                "xp": 2000,
-                "level": 1,
-                "streak": 1, # daily streak
-                "win_streak": 0, # consecutive correct answers streak
-                "hearts": 5, # life system
-                "games_played": 0,
-                "games_won": 0,
-                "last_active": datetime.now(),
-                "spider_chart_data": {
-                    "Grammar": 10,
-                    "Vocabulary": 10,
-                    "Tone & Style": 10,
-                    "Concision": 10,
-                    "Comprehension": 10
-                }
-            }
-        }
-        
+    def __init__(self, store: Optional[UserStore] = None, write_behind: bool = False,
+                 flush_interval: float = 1.0, flush_batch_size: int = 500,
+                 index_sync_interval: float = 1.0, compact_interval: float = 300.0,
+                 ledger_retention_days: int = 35):
+        """
+        `users` is a read-through cache over `store`. In write-through mode (default) every
+        transaction reloads the user inside a store transaction and writes it back, so
+        several workers can share one store. In write-behind mode updates stay in the cache
+        and dirty users are flushed in batches every `flush_interval` seconds.
+
+        `leaderboard` is a ranked index kept current on every transaction; with a shared
+        store it also picks up other workers' writes at most every `index_sync_interval`.
+
+        Every XP change from `add_xp` is appended to the store's XP ledger and folded into
+        daily/weekly rollups (`windows`). A background thread drops expired rollups and
+        prunes ledger events older than `ledger_retention_days` every `compact_interval`.
+        """
+        self.store = store or MemoryUserStore()
+        self.write_behind = write_behind
+        self.flush_interval = flush_interval
+        self.flush_batch_size = flush_batch_size
+        self.users: Dict[str, UserState] = {}
+        self._dirty = set()
+        self._open: Dict[str, int] = {}
+        self._lock = threading.RLock()
+        self._stop = threading.Event()
+        self._background = None
+        self.leaderboard = RankedIndex()
+        self.index_sync_interval = index_sync_interval
+        self._index_synced_at = datetime.now()
+        self._index_checked = time.monotonic()
+        self.windows = WindowedLeaderboards()
+        self.compact_interval = compact_interval
+        self.ledger_retention = timedelta(days=ledger_retention_days)
+        self._event_buffer = []
+        # XP events recorded but not committed yet; the rollups only see committed ones
+        self._pending_windows = []
+        self._store_depth = 0
+        # user_id -> event_id -> game event reserved but not applied yet, in queue order
+        self._queued: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        self._own_event_ids = set()
+        self._last_event_id = 0
+        self._compacted_at = time.monotonic()
+
+        if self.store.load("default_user") is None:
+            self.store.save_many([("default_user", UserState(xp=2000).to_dict())])
+
+        for uid, data in self.store.iter_users():
+            self.leaderboard.update(uid, data["xp"], data["level"])
+
+        # Rebuild live rollups from the ledger; the previous week is kept for last week's board
+        now = datetime.now()
+        for event_id, uid, xp, ts in self.store.iter_events(since=window_start("weekly", now) - timedelta(days=7)):
+            self._apply_event(uid, xp, ts)
+            self._last_event_id = max(self._last_event_id, event_id)
+
+        self._background = threading.Thread(target=self._background_loop, name="gamification-background", daemon=True)
+        self._background.start()
+
+    def _load_user(self, user_id: str) -> UserState:
+        data = self.store.load(user_id)
+        return UserState.from_dict(data) if data is not None else UserState()
+
     def _ensure_user(self, user_id: str):
         if user_id not in self.users:
-            self.users[user_id] = {
-                "xp": 0,
-                "level": 1,
-                "streak": 1, # daily streak
-                "win_streak": 0, # consecutive correct answers streak
-                "hearts": 5, # life system
-                "games_played": 0,
-                "games_won": 0,
-                "last_active": datetime.now(),
-                "spider_chart_data": {
-                    "Grammar": 10,
-                    "Vocabulary": 10,
-                    "Tone & Style": 10,
-                    "Concision": 10,
-                    "Comprehension": 10
-                }
-            }
+            self.users[user_id] = self._load_user(user_id)
 
-    def update_streak(self, user_id: str) -> int:
-        self._ensure_user(user_id)
+    @contextmanager
+    def transaction(self, user_id: str):
+        """
+        Atomic read-modify-write on one user. Nested transactions on the same user join
+        the outer one, so a sequence of engine calls can be grouped into one update.
+        If the outermost body raises, the update is rolled back: by the store in
+        write-through mode, and by restoring the cached user and XP buffer in write-behind.
+        """
+        with self._lock:
+            if self.write_behind:
+                self._ensure_user(user_id)
+                user = self.users[user_id]
+                outermost = self._open.get(user_id, 0) == 0
+                if outermost:
+                    snapshot = user.snapshot()
+                    buffered = len(self._event_buffer)
+                    pending = len(self._pending_windows)
+                self._open[user_id] = self._open.get(user_id, 0) + 1
+                try:
+                    yield user
+                except BaseException:
+                    if outermost:
+                        user.restore(snapshot)
+                        del self._event_buffer[buffered:]
+                        del self._pending_windows[pending:]
+                    raise
+                finally:
+                    self._open[user_id] -= 1
+                    if self._open[user_id] == 0:
+                        del self._open[user_id]
+                self._dirty.add(user_id)
+                self._reindex(user_id)
+                if outermost and self._store_depth == 0:
+                    self._publish_windows()
+                if outermost and len(self._dirty) >= self.flush_batch_size:
+                    self.flush()
+                return
+
+            with self._store_transaction():
+                outermost = self._open.get(user_id, 0) == 0
+                if outermost:
+                    # Pick up writes made by other workers since this user was cached
+                    self.users[user_id] = self._load_user(user_id)
+                self._open[user_id] = self._open.get(user_id, 0) + 1
+                try:
+                    yield self.users[user_id]
+                finally:
+                    self._open[user_id] -= 1
+                    if self._open[user_id] == 0:
+                        del self._open[user_id]
+                if outermost:
+                    self.store.save_many([(user_id, self.users[user_id].to_dict())])
+                    self._reindex(user_id)
+
+    @contextmanager
+    def _store_transaction(self):
+        """Store transaction that publishes recorded XP events to the rollups once it commits."""
+        outermost = self._store_depth == 0
+        self._store_depth += 1
+        try:
+            with self.store.transaction():
+                yield
+        except BaseException:
+            if outermost:
+                self._pending_windows.clear()
+            raise
+        finally:
+            self._store_depth -= 1
+        if outermost:
+            self._publish_windows()
+
+    def _publish_windows(self):
+        pending, self._pending_windows = self._pending_windows, []
+        for user_id, xp, level, ts in pending:
+            self.windows.record(user_id, xp, level, ts)
+
+    def _reindex(self, user_id: str):
         user = self.users[user_id]
-        
+        self.leaderboard.update(user_id, user.xp, user.level)
+
+    def _apply_event(self, user_id: str, xp: int, ts: datetime):
+        ranked = self.leaderboard.get(user_id)
+        level = ranked["level"] if ranked else 1
+        self.windows.record(user_id, xp, level, ts)
+
+    def _record_xp_event(self, user_id: str, xp: int):
+        """
+        Append an XP change to the ledger inside the caller's transaction. The rollups are
+        updated once that transaction has committed, so a rollback never shows up there.
+        """
+        event = (user_id, xp, datetime.now())
+        self._pending_windows.append((user_id, xp, self.users[user_id].level, event[2]))
+        if self.write_behind:
+            self._event_buffer.append(event)
+        else:
+            self._remember_own_events(self.store.append_events([event]))
+
+    def _remember_own_events(self, event_ids):
+        # Only shared stores are polled, so only they need our own ids to skip
+        if self.store.shared:
+            self._own_event_ids.update(event_ids)
+
+    def _sync_index(self):
+        """Apply rows and XP events other workers wrote to a shared store since the last sync."""
+        if not self.store.shared or time.monotonic() - self._index_checked < self.index_sync_interval:
+            return
+        started = datetime.now()
+        for uid, data in self.store.iter_users(since=self._index_synced_at - INDEX_SYNC_OVERLAP):
+            self.leaderboard.update(uid, data["xp"], data["level"])
+        for event_id, uid, xp, ts in self.store.iter_events(after_id=self._last_event_id):
+            if event_id in self._own_event_ids:
+                self._own_event_ids.discard(event_id)
+            else:
+                self._apply_event(uid, xp, ts)
+            self._last_event_id = event_id
+        self._index_synced_at = started
+        self._index_checked = time.monotonic()
+
+    def flush(self):
+        """Write every dirty cached user and buffered XP event to the store in one batch."""
+        with self._lock:
+            records = [(user_id, self.users[user_id].to_dict()) for user_id in self._dirty]
+            events, self._event_buffer = self._event_buffer, []
+            self._dirty.clear()
+            with self.store.transaction():
+                self.store.save_many(records)
+                if events:
+                    self._remember_own_events(self.store.append_events(events))
+
+    def compact(self):
+        """Drop expired daily/weekly rollups and prune old ledger and applied game events."""
         now = datetime.now()
-        last_active = user["last_active"]
-        
-        diff = now.date() - last_active.date()
-        
+        with self._lock:
+            self.windows.compact(now)
+        self.store.delete_events(before=now - self.ledger_retention)
+        self.store.delete_game_events(before=now - self.ledger_retention)
+        self._compacted_at = time.monotonic()
+
+    def _background_loop(self):
+        while not self._stop.wait(self.flush_interval):
+            try:
+                if self.write_behind:
+                    self.flush()
+                if time.monotonic() - self._compacted_at >= self.compact_interval:
+                    self.compact()
+            except Exception as e:
+                print(f"Gamification background task failed: {e}")
+
+    def close(self):
+        self._stop.set()
+        if self._background is not None:
+            self._background.join(timeout=self.flush_interval + 1)
+        self.flush()
+        self.store.close()
+
+    @staticmethod
+    def _next_streak(streak: int, last_active: float, now: datetime) -> int:
+        diff = now.date() - datetime.fromtimestamp(last_active).date()
         if diff.days == 1:
-            user["streak"] += 1
-        elif diff.days > 1:
-            user["streak"] = 1
-            
-        user["last_active"] = now
-        return user["streak"]
+            return streak + 1
+        if diff.days > 1:
+            return 1
+        return streak
+
+    def update_streak(self, user_id: str) -> int:
+        with self.transaction(user_id) as user:
+            now = datetime.now()
+            user.streak = self._next_streak(user.streak, user.last_active, now)
+            user.last_active = now.timestamp()
+            return user.streak
         
     def update_win_streak(self, user_id: str, won: bool) -> int:
-        self._ensure_user(user_id)
-        if won:
-            self.users[user_id]["win_streak"] += 1
-        else:
-            self.users[user_id]["win_streak"] = 0
+        with self.transaction(user_id) as user:
+            if won:
+                user.win_streak += 1
+            else:
+                user.win_streak = 0
             
-        return self.users[user_id]["win_streak"]
+            return user.win_streak
 
-    def calculate_xp(self, user_id: str, game_type: str, accuracy: float, hint_used: bool = False) -> int:
-        self._ensure_user(user_id)
-        user = self.users[user_id]
-        
-        base_xp = {
-            "Tone Switcher": 60,
-            "Word Choice Duel": 40,
-            "Redundancy Eraser": 30,
-            "Sentence Builder": 50,
-            "Sentence Reconstructor": 100,
-            "Plot Hole Hunter": 80,
-            "Dialogue Detective": 70,
-            "Context Climber": 90,
-            "Word Master": 50,
-            "Story Spinner": 120,
-            "Logic MCQ": 40,
-            "Visual Vocab": 40
-        }.get(game_type, 30)
+    @staticmethod
+    def _score_game(win_streak: int, game_type: str, accuracy: float, hint_used: bool = False):
+        """Pure XP math for one game played on a `win_streak`; returns (awarded_xp, skill)."""
+        base_xp, assigned_skill = GAME_RULES.get(game_type, DEFAULT_GAME_RULE)
 
-        # Update Play Stats
-        user["games_played"] += 1
-        if accuracy >= 0.8:
-            user["games_won"] += 1
-
-        # Track Skill Proficiencies dynamically
-        skill_map = {
-            "Tone Switcher": "Tone & Style",
-            "Word Choice Duel": "Vocabulary",
-            "Redundancy Eraser": "Concision",
-            "Sentence Builder": "Grammar",
-            "Sentence Reconstructor": "Tone & Style",
-            "Plot Hole Hunter": "Comprehension",
-            "Dialogue Detective": "Comprehension",
-            "Context Climber": "Tone & Style",
-            "Word Master": "Grammar",
-            "Story Spinner": "Tone & Style",
-            "Logic MCQ": "Grammar",
-            "Visual Vocab": "Vocabulary"
-        }
-        
-        assigned_skill = skill_map.get(game_type, "Grammar")
-        
         # Win Streak Multipliers: Cap at 2.0x
-        multiplier = min(1.0 + (user["win_streak"] * 0.1), 2.0)
-        
-        
+        multiplier = min(1.0 + (win_streak * 0.1), 2.0)
+
         # Calculate XP 
         if accuracy >= 0.8: # Won
             awarded_xp = int((base_xp * accuracy) * multiplier)
             # Apply hint penalty: 50% reduction
             if hint_used:
                 awarded_xp = int(awarded_xp * 0.5)
-            
-            # Increase Skill Proficiency up to a cap of 100
-            user["spider_chart_data"][assigned_skill] = min(user["spider_chart_data"].get(assigned_skill, 10) + 5, 100)
         else: # Lost -> Penalty
             awarded_xp = -int(base_xp * 0.5) # Lose 50% of base XP on failure
+        return awarded_xp, assigned_skill
+
+    @staticmethod
+    def _apply_play_stats(user: UserState, skill, accuracy: float):
+        # Update Play Stats
+        user.games_played += 1
+        if accuracy >= 0.8:
+            user.games_won += 1
+            # Increase Skill Proficiency up to a cap of 100
+            user.skills[skill] = min(user.skills[skill] + 5, 100)
+        else:
             # Slightly decrease proficiency on failure
-            user["spider_chart_data"][assigned_skill] = max(user["spider_chart_data"].get(assigned_skill, 10) - 2, 0)
-            
-        return awarded_xp
+            user.skills[skill] = max(user.skills[skill] - 2, 0)
+
+    def calculate_xp(self, user_id: str, game_type: str, accuracy: float, hint_used: bool = False) -> int:
+        with self.transaction(user_id) as user:
+            awarded_xp, assigned_skill = self._score_game(user.win_streak, game_type, accuracy, hint_used)
+            self._apply_play_stats(user, assigned_skill, accuracy)
+            return awarded_xp
+
+    def reserve_game_result(self, event: Dict[str, Any]) -> Dict[str, int]:
+        """
+        Fast path for a finished game, run before it is journaled and queued (see
+        services.game_events). Fixes `event["xp_reward"]` and returns it with the streak,
+        win streak and hearts the user will have once the event is applied.
+
+        The user's stored state is folded with every game reserved but not applied yet,
+        so back-to-back games score the same as if each had been applied before the next,
+        however fast the queue drains. Nothing is written to the user; the reservation is
+        dropped by `apply_game_result` or `release_game_result`.
+        """
+        user_id = event["user_id"]
+        with self._lock:
+            if self.write_behind:
+                self._ensure_user(user_id)
+                user = self.users[user_id]
+            else:
+                user = self._load_user(user_id)
+
+            now = datetime.now()
+            streak, last_active = user.streak, user.last_active
+            win_streak, hearts = user.win_streak, user.hearts
+            queued = self._queued.setdefault(user_id, {})
+            for earlier in [*queued.values(), event]:
+                streak, last_active = self._next_streak(streak, last_active, now), now.timestamp()
+                if earlier is event:
+                    xp_reward, _ = self._score_game(win_streak, event["game_type"], event["mastery_level"], event["hint_used"])
+                win_streak = win_streak + 1 if earlier["success"] else 0
+                hearts = hearts if earlier["success"] else max(hearts - 1, 0)
+
+            event["xp_reward"] = xp_reward
+            queued[event["event_id"]] = event
+            return {
+                "xp_reward": xp_reward,
+                "new_streak": streak,
+                "win_streak": win_streak,
+                "current_hearts": hearts,
+            }
+
+    def release_game_result(self, event: Dict[str, Any]):
+        """Drop a reservation whose event will not be applied by this process."""
+        with self._lock:
+            queued = self._queued.get(event["user_id"])
+            if queued is not None:
+                queued.pop(event["event_id"], None)
+                if not queued:
+                    del self._queued[event["user_id"]]
+
+    def apply_game_result(self, event: Dict[str, Any]) -> bool:
+        """
+        Apply a journaled game event (see services.game_events) in one transaction.
+        The XP reward is taken from the event rather than recomputed, and an event is
+        applied at most once; returns False for an event that was already applied.
+
+        The applied marker and the user's row are committed in the same store transaction,
+        also in write-behind mode, so a crash can neither lose an applied game's effects
+        nor let a replay apply them twice. The event's reservation is dropped either way.
+        """
+        user_id = event["user_id"]
+        with self._lock:
+            try:
+                return self._apply_game_result(user_id, event)
+            finally:
+                self.release_game_result(event)
+
+    def _apply_game_result(self, user_id: str, event: Dict[str, Any]) -> bool:
+        with self._lock:
+            with self._store_transaction():
+                with self.transaction(user_id) as user:
+                    if not self.store.mark_game_event_applied(event["event_id"]):
+                        return False
+                    _, assigned_skill = GAME_RULES.get(event["game_type"], DEFAULT_GAME_RULE)
+                    self._apply_play_stats(user, assigned_skill, event["mastery_level"])
+                    self.add_xp(user_id, event["xp_reward"])
+                    # Playing counts as activity for the daily streak whether or not the game was won
+                    self.update_streak(user_id)
+                    if not event["success"]:
+                        self.deduct_heart(user_id)
+                    self.update_win_streak(user_id, event["success"])
+                if self.write_behind:
+                    events = [e for e in self._event_buffer if e[0] == user_id]
+                    self.store.save_many([(user_id, self.users[user_id].to_dict())])
+                    if events:
+                        self._remember_own_events(self.store.append_events(events))
+            if self.write_behind:
+                # Committed above, so the next flush must not write them again
+                self._event_buffer = [e for e in self._event_buffer if e[0] != user_id]
+                self._dirty.discard(user_id)
+            return True
 
     def add_xp(self, user_id: str, xp: int) -> int:
-        self._ensure_user(user_id)
-        user = self.users[user_id]
-        
-        # Allow XP to drop but not below 0
-        user["xp"] = max(user["xp"] + xp, 0)
+        with self.transaction(user_id) as user:
+            previous_xp = user.xp
+            # Allow XP to drop but not below 0
+            user.xp = max(user.xp + xp, 0)
         
-        # Level calculation: (Total_XP // 500) + 1
-        user["level"] = (user["xp"] // 500) + 1
+            # Level calculation: (Total_XP // 500) + 1
+            user.level = (user.xp // 500) + 1
+
+            if user.xp != previous_xp:
+                self._record_xp_event(user_id, user.xp - previous_xp)
         
-        return user["xp"]
+            return user.xp
 
     def deduct_heart(self, user_id: str) -> int:
-        self._ensure_user(user_id)
-        user = self.users[user_id]
-        user["hearts"] = max(user["hearts"] - 1, 0)
-        return user["hearts"]
+        with self.transaction(user_id) as user:
+            user.hearts = max(user.hearts - 1, 0)
+            return user.hearts
 
     def redeem_xp(self, user_id: str, amount: int) -> Dict[str, Any]:
         """Redeems a specific amount of XP if the user has enough."""
-        self._ensure_user(user_id)
-        user = self.users[user_id]
-        
-        if user["xp"] >= amount:
-            user["xp"] -= amount
-            # Recalculate level after deduction
-            user["level"] = (user["xp"] // 500) + 1
-            return {"success": True, "new_xp": user["xp"], "new_level": user["level"]}
+        with self.transaction(user_id) as user:
+            if user.xp >= amount:
+                user.xp -= amount
+                # Recalculate level after deduction
+                user.level = (user.xp // 500) + 1
+                return {"success": True, "new_xp": user.xp, "new_level": user.level}
         
-        return {"success": False, "message": "Insufficient XP balance."}
+            return {"success": False, "message": "Insufficient XP balance."}
 
     def refill_hearts(self, user_id: str) -> int:
-        self._ensure_user(user_id)
-        self.users[user_id]["hearts"] = 5
-        return 5
+        with self.transaction(user_id) as user:
+            user.hearts = 5
+            return 5
 
     def get_user_stats(self, user_id: str) -> Dict[str, Any]:
-        self._ensure_user(user_id)
-        # Update streak on checking stats
-        self.update_streak(user_id)
-        return self.users[user_id]
-
-    def get_leaderboard(self) -> list:
-        board = []
-        for uid, data in self.users.items():
-            board.append({"user_id": uid, "level": data["level"], "xp": data["xp"]})
-            
-        # Add hyper-competitive mock data
-        mock_data = [
-            {"user_id": "Arjun_Pro", "level": 12, "xp": 6200},
-            {"user_id": "Neha_Writer", "level": 10, "xp": 5100},
-            {"user_id": "Rahul_Grammar", "level": 9, "xp": 4800},
-            {"user_id": "Priya_Lit", "level": 8, "xp": 4200},
-            {"user_id": "Vikram_Bot", "level": 7, "xp": 3600},
-            {"user_id": "Sarthak_AI", "level": 15, "xp": 7500},
-            {"user_id": "Aisha_Pen", "level": 6, "xp": 3100},
-            {"user_id": "Kabir_Lyrics", "level": 5, "xp": 2600},
-            {"user_id": "Rohan_Scribe", "level": 4, "xp": 2100},
-            {"user_id": "Zoya_Auth", "level": 3, "xp": 1600}
-        ]
-        
-        for mock_user in mock_data:
-            if mock_user["user_id"] not in self.users:
-                board.append(mock_user)
-                
+        with self.transaction(user_id) as user:
+            # Update streak on checking stats
+            self.update_streak(user_id)
+            return user.to_dict()
+
+    def _index_for(self, window: str) -> RankedIndex:
+        if window in WINDOW_KINDS:
+            return self.windows.index(window, datetime.now())
+        return self.leaderboard
+
+    def get_leaderboard(self, offset: int = 0, limit: int = 15, include_mock: bool = True,
+                        window: str = "all") -> List[Dict[str, Any]]:
+        """
+        Ranks offset+1 .. offset+limit, read from the index in O(log U + k). `window` is
+        "all", "daily" or "weekly"; windowed boards rank XP earned in the current bucket
+        and never include mock users.
+        """
+        with self._lock:
+            self._sync_index()
+            if window in WINDOW_KINDS or not include_mock:
+                return self._index_for(window).range(offset, limit)
+
+            # Mock users can only displace real ones within the requested window
+            board = self.leaderboard.range(0, offset + limit)
+        board += [m for m in MOCK_LEADERBOARD if m["user_id"] not in self.leaderboard]
         board.sort(key=lambda x: x["xp"], reverse=True)
-        return board[:15]
+        return board[offset:offset + limit]
+
+    def get_rank(self, user_id: str, window: str = "all") -> Optional[int]:
+        """1-based rank among real users only, or None if the user has no record yet."""
+        with self._lock:
+            self._sync_index()
+            return self._index_for(window).rank(user_id)
+
+    def ranked_count(self, window: str = "all") -> int:
+        with self._lock:
+            return len(self._index_for(window))
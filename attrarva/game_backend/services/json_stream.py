@@ -0,0 +1,135 @@
+import json
+import re
+from typing import Dict, Any, List, Optional, Tuple
+
+_decoder = json.JSONDecoder()
+_WHITESPACE = " \t\r\n"
+# A trailing escape that is not complete yet, e.g. `\` or `\u00`
+_PARTIAL_ESCAPE = re.compile(r"(?<!\\)(\\\\)*(\\|\\u[0-9a-fA-F]{0,3})$")
+
+
+def _skip(buf: str, i: int, chars: str = _WHITESPACE) -> int:
+    while i < len(buf) and buf[i] in chars:
+        i += 1
+    return i
+
+
+def _partial_string(buf: str, i: int) -> Optional[str]:
+    """Decode the unterminated JSON string starting at buf[i] == '"' as far as it goes."""
+    raw = buf[i + 1:]
+    match = _PARTIAL_ESCAPE.search(raw)
+    if match and match.group(2):
+        raw = raw[:match.start(2)]
+    try:
+        text = json.loads(f'"{raw}"')
+    except ValueError:
+        return None
+    # Hold back the first half of a surrogate pair until the second half arrives
+    if text and "\ud800" <= text[-1] <= "\udbff":
+        text = text[:-1]
+    return text
+
+
+def scan_object(buf: str) -> Tuple[Dict[str, Any], Optional[str], str]:
+    """
+    Scan a possibly truncated top-level JSON object.
+
+    Returns the members that are complete, plus the key and decoded text so far of a string
+    value that is still being written (None, "" if the buffer does not end inside one).
+    Numbers are only reported once a delimiter follows them, since "0.8" may become "0.85".
+    """
+    values: Dict[str, Any] = {}
+    i = buf.find("{")
+    if i < 0:
+        return values, None, ""
+    i += 1
+    while True:
+        i = _skip(buf, i, _WHITESPACE + ",")
+        if i >= len(buf) or buf[i] != '"':
+            return values, None, ""
+        try:
+            key, i = _decoder.raw_decode(buf, i)
+        except ValueError:
+            return values, None, ""
+        i = _skip(buf, i)
+        if i >= len(buf) or buf[i] != ":":
+            return values, None, ""
+        i = _skip(buf, i + 1)
+        if i >= len(buf):
+            return values, None, ""
+        try:
+            value, end = _decoder.raw_decode(buf, i)
+        except ValueError:
+            if buf[i] == '"':
+                text = _partial_string(buf, i)
+                if text is not None:
+                    return values, key, text
+            return values, None, ""
+        if not isinstance(value, (str, dict, list)) and (end >= len(buf) or buf[end] not in _WHITESPACE + ",}"):
+            return values, None, ""
+        values[key] = value
+        i = end
+
+
+class JsonObjectStream:
+    """
+    Incremental reader for a JSON object arriving in chunks (e.g. streamed LLM output).
+
+    `feed()` returns the new events since the last call: ("text", key, delta) while a string
+    value grows, and ("value", key, value) once a member is complete. Each member's value
+    event is emitted once.
+    """
+
+    def __init__(self):
+        self.buffer = ""
+        self.values: Dict[str, Any] = {}
+        self._emitted_text: Dict[str, str] = {}
+
+    def _text_delta(self, key: str, text: str) -> Optional[str]:
+        emitted = self._emitted_text.get(key, "")
+        if len(text) <= len(emitted) or not text.startswith(emitted):
+            return None
+        self._emitted_text[key] = text
+        return text[len(emitted):]
+
+    def feed(self, chunk: str) -> List[Tuple[str, str, Any]]:
+        self.buffer += chunk
+        values, partial_key, partial_text = scan_object(self.buffer)
+        events = []
+        for key, value in values.items():
+            if key in self.values:
+                continue
+            if isinstance(value, str):
+                delta = self._text_delta(key, value)
+                if delta:
+                    events.append(("text", key, delta))
+            self.values[key] = value
+            events.append(("value", key, value))
+        if partial_key is not None and partial_key not in self.values:
+            delta = self._text_delta(partial_key, partial_text)
+            if delta:
+                events.append(("text", partial_key, delta))
+        return events
+
+    @property
+    def complete(self) -> bool:
+        """True once the buffer holds a whole JSON object."""
+        start = self.buffer.find("{")
+        if start < 0:
+            return False
+        try:
+            return isinstance(_decoder.raw_decode(self.buffer, start)[0], dict)
+        except ValueError:
+            return False
+
+    def result(self) -> Dict[str, Any]:
+        """The full object if the buffer parses, otherwise the members completed so far."""
+        start = self.buffer.find("{")
+        if start >= 0:
+            try:
+                value, _ = _decoder.raw_decode(self.buffer, start)
+                if isinstance(value, dict):
+                    return value
+            except ValueError:
+                pass
+        return dict(self.values)
@@ -0,0 +1,184 @@
+import random
+from datetime import datetime, timedelta
+from typing import Dict, Any, List, Optional, Tuple
+
+MAX_LEVEL = 24
+
+
+class _Node:
+    __slots__ = ("key", "value", "next", "width")
+
+    def __init__(self, key, value, level: int):
+        self.key = key
+        self.value = value
+        self.next: List[Optional["_Node"]] = [None] * level
+        # width[i] = number of bottom-level steps from this node to next[i]
+        self.width: List[int] = [1] * level
+
+
+class RankedIndex:
+    """
+    Indexable skip list of users ordered by XP (descending, ties by user_id).
+
+    update/remove and rank lookups are O(log U); reading k entries from any offset is
+    O(log U + k). Ranks are 1-based.
+    """
+
+    def __init__(self):
+        self._head = _Node(None, None, MAX_LEVEL)
+        self._keys: Dict[str, Tuple[int, str]] = {}
+        self._values: Dict[str, Dict[str, Any]] = {}
+
+    def __len__(self):
+        return len(self._keys)
+
+    def __contains__(self, user_id: str):
+        return user_id in self._keys
+
+    @staticmethod
+    def _random_level() -> int:
+        level = 1
+        while level < MAX_LEVEL and random.random() < 0.5:
+            level += 1
+        return level
+
+    def _find(self, key):
+        """Predecessors at every level and their positions (head is position 0)."""
+        update = [self._head] * MAX_LEVEL
+        steps = [0] * MAX_LEVEL
+        node, pos = self._head, 0
+        for i in reversed(range(MAX_LEVEL)):
+            while node.next[i] is not None and node.next[i].key < key:
+                pos += node.width[i]
+                node = node.next[i]
+            update[i] = node
+            steps[i] = pos
+        return update, steps, pos
+
+    def _insert(self, key, value):
+        update, steps, pos = self._find(key)
+        new = _Node(key, value, self._random_level())
+        for i in range(MAX_LEVEL):
+            prev = update[i]
+            if i < len(new.next):
+                new.next[i] = prev.next[i]
+                new.width[i] = prev.width[i] + steps[i] - pos
+                prev.next[i] = new
+                prev.width[i] = pos + 1 - steps[i]
+            else:
+                prev.width[i] += 1
+
+    def _remove(self, key):
+        update, _, _ = self._find(key)
+        node = update[0].next[0]
+        for i in range(MAX_LEVEL):
+            prev = update[i]
+            if i < len(node.next) and prev.next[i] is node:
+                prev.width[i] += node.width[i] - 1
+                prev.next[i] = node.next[i]
+            else:
+                prev.width[i] -= 1
+
+    def update(self, user_id: str, xp: int, level: int):
+        """Insert a user or move them to their new position if their XP changed."""
+        key = (-xp, user_id)
+        old_key = self._keys.get(user_id)
+        if old_key == key:
+            return
+        if old_key is not None:
+            self._remove(old_key)
+        value = {"user_id": user_id, "level": level, "xp": xp}
+        self._insert(key, value)
+        self._keys[user_id] = key
+        self._values[user_id] = value
+
+    def remove(self, user_id: str):
+        key = self._keys.pop(user_id, None)
+        if key is not None:
+            self._remove(key)
+            del self._values[user_id]
+
+    def get(self, user_id: str) -> Optional[Dict[str, Any]]:
+        return self._values.get(user_id)
+
+    def rank(self, user_id: str) -> Optional[int]:
+        key = self._keys.get(user_id)
+        if key is None:
+            return None
+        node, pos = self._head, 0
+        for i in reversed(range(MAX_LEVEL)):
+            while node.next[i] is not None and node.next[i].key <= key:
+                pos += node.width[i]
+                node = node.next[i]
+        return pos
+
+    def range(self, offset: int = 0, limit: int = 15) -> List[Dict[str, Any]]:
+        """Entries at ranks offset+1 .. offset+limit."""
+        target = offset + 1
+        node, pos = self._head, 0
+        for i in reversed(range(MAX_LEVEL)):
+            while node.next[i] is not None and pos + node.width[i] <= target:
+                pos += node.width[i]
+                node = node.next[i]
+        if pos != target:
+            return []
+        entries = []
+        while node is not None and len(entries) < limit:
+            entries.append(node.value)
+            node = node.next[0]
+        return entries
+
+    def top(self, k: int) -> List[Dict[str, Any]]:
+        return self.range(0, k)
+
+
+WINDOW_KINDS = ("daily", "weekly")
+
+
+def bucket_for(kind: str, ts: datetime) -> str:
+    if kind == "daily":
+        return ts.date().isoformat()
+    year, week, _ = ts.isocalendar()
+    return f"{year}-W{week:02d}"
+
+
+def window_start(kind: str, ts: datetime) -> datetime:
+    start = datetime.combine(ts.date(), datetime.min.time())
+    if kind == "weekly":
+        start -= timedelta(days=ts.weekday())
+    return start
+
+
+class WindowedLeaderboards:
+    """
+    Pre-aggregated XP rollups per time bucket (one day, one ISO week), each with its own
+    RankedIndex. Recording an event touches one entry per window kind, and reads go to the
+    current bucket's index, so neither depends on how many events were logged.
+    """
+
+    def __init__(self):
+        # (kind, bucket) -> user_id -> XP earned in that bucket
+        self.totals: Dict[Tuple[str, str], Dict[str, int]] = {}
+        self.indexes: Dict[Tuple[str, str], RankedIndex] = {}
+
+    def record(self, user_id: str, xp: int, level: int, ts: datetime):
+        for kind in WINDOW_KINDS:
+            key = (kind, bucket_for(kind, ts))
+            totals = self.totals.setdefault(key, {})
+            totals[user_id] = totals.get(user_id, 0) + xp
+            self.indexes.setdefault(key, RankedIndex()).update(user_id, totals[user_id], level)
+
+    def index(self, kind: str, now: datetime) -> RankedIndex:
+        return self.indexes.get((kind, bucket_for(kind, now))) or RankedIndex()
+
+    def compact(self, now: datetime, keep: int = 2) -> int:
+        """Drop rollups older than the current and previous `keep - 1` buckets of each kind."""
+        dropped = 0
+        for kind in WINDOW_KINDS:
+            step = timedelta(days=1 if kind == "daily" else 7)
+            live = {bucket_for(kind, now - step * i) for i in range(keep)}
+            for key in [k for k in self.totals if k[0] == kind and k[1] not in live]:
+                del self.totals[key]
+                self.indexes.pop(key, None)
+                dropped += 1
+        return dropped
@@ -0,0 +1,158 @@
+import os
+import sys
+import json
+import random
+import asyncio
+from collections import deque, OrderedDict
+from typing import Dict, List, Any
+
+from services.user_state import GAME_RULES
+
+# game_data.py lives one level above the backend package
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+from game_data import (  # noqa: E402
+    TONE_SWITCHER_PROMPTS,
+    WORD_CHOICE_PROMPTS,
+    REDUNDANCY_PROMPTS,
+    SENTENCE_BUILDER_PROMPTS,
+    SENTENCE_RECONSTRUCTOR_PROMPTS,
+    PLOT_HOLE_PROMPTS,
+)
+
+TONE_SWITCHER_TONES = ["happy", "sad", "angry", "mysterious", "romantic"]
+
+
+def build_seed_prompts() -> Dict[str, List[Dict[str, Any]]]:
+    """Static exercises from game_data.py, shaped like the frontend's prompt objects."""
+    return {
+        "Tone Switcher": [
+            {"text": f"Rewrite this to sound {TONE_SWITCHER_TONES[i % len(TONE_SWITCHER_TONES)]}: \"{s}\"",
+             "original": s, "tone": TONE_SWITCHER_TONES[i % len(TONE_SWITCHER_TONES)]}
+            for i, s in enumerate(TONE_SWITCHER_PROMPTS)
+        ],
+        "Word Choice Duel": [
+            {"text": f"Provide a synonym for: \"{w}\"", "original": w}
+            for w in dict.fromkeys(WORD_CHOICE_PROMPTS)
+        ],
+        "Redundancy Eraser": [
+            {"text": f"Remove redundant words from: \"{bad}\"", "bad": bad, "good": good}
+            for bad, good in REDUNDANCY_PROMPTS
+        ],
+        "Sentence Builder": [
+            {"text": f"Unscramble: {', '.join(p['words'])}", "words": p["words"], "target": p["target"]}
+            for p in SENTENCE_BUILDER_PROMPTS
+        ],
+        "Sentence Reconstructor": [
+            {"text": f"Make this sound more {p['tone']}: \"{p['original']}\"", "original": p["original"], "tone": p["tone"]}
+            for p in SENTENCE_RECONSTRUCTOR_PROMPTS
+        ],
+        "Plot Hole Hunter": [
+            {"text": f"Identify the plot hole in: \"{story}\"", "story": story, "hole": hole}
+            for story, hole in PLOT_HOLE_PROMPTS
+        ],
+    }
+
+
+def _prompt_key(prompt: Dict[str, Any]) -> str:
+    return json.dumps(prompt, sort_keys=True)
+
+
+class PromptPool:
+    """
+    Serves /game/prompt from memory.
+
+    Each game type has a reusable seed pool (from game_data.py) and a queue of fresh
+    AI-generated prompts that are consumed when served. When the fresh queue drops
+    below `low_water`, a background task refills it from GroqService up to `high_water`.
+    The last `recent_window` prompts served to each user are skipped to avoid repeats.
+    Only known game types are pooled, so arbitrary client strings cannot create queues
+    or trigger Groq calls.
+    """
+
+    def __init__(self, groq_service, low_water: int = None, high_water: int = None,
+                 recent_window: int = 20, max_tracked_users: int = 10000):
+        self.groq_service = groq_service
+        self.low_water = low_water or int(os.getenv("PROMPT_POOL_LOW_WATER", 3))
+        self.high_water = high_water or int(os.getenv("PROMPT_POOL_HIGH_WATER", 10))
+        self.recent_window = recent_window
+        self.max_tracked_users = max_tracked_users
+
+        self.seeds: Dict[str, List[Dict[str, Any]]] = build_seed_prompts()
+        self.fresh: Dict[str, deque] = {}
+        # (user_id, game_type) -> keys of recently served prompts, LRU-bounded
+        self.recent: "OrderedDict[tuple, deque]" = OrderedDict()
+        self._refilling: Dict[str, asyncio.Task] = {}
+        self.game_types = set(GAME_RULES) | set(self.seeds)
+
+    def _recent_for(self, user_id: str, game_type: str) -> deque:
+        key = (user_id, game_type)
+        served = self.recent.get(key)
+        if served is None:
+            served = self.recent[key] = deque(maxlen=self.recent_window)
+            if len(self.recent) > self.max_tracked_users:
+                self.recent.popitem(last=False)
+        else:
+            self.recent.move_to_end(key)
+        return served
+
+    def _take_fresh(self, game_type: str, served: deque):
+        queue = self.fresh.get(game_type)
+        if not queue:
+            return None
+        for _ in range(len(queue)):
+            prompt = queue.popleft()
+            if _prompt_key(prompt) not in served:
+                return prompt
+            queue.append(prompt)
+        return None
+
+    def _take_seed(self, game_type: str, served: deque):
+        seeds = self.seeds.get(game_type)
+        if not seeds:
+            return None
+        unseen = [p for p in seeds if _prompt_key(p) not in served]
+        return random.choice(unseen or seeds)
+
+    async def get_prompt(self, user_id: str, game_type: str) -> Dict[str, Any]:
+        if game_type not in self.game_types:
+            raise ValueError(f"Unknown game type: {game_type}")
+        served = self._recent_for(user_id, game_type)
+        prompt = self._take_fresh(game_type, served) or self._take_seed(game_type, served)
+        self.schedule_refill(game_type)
+
+        if prompt is None:
+            # Cold game type with nothing pooled yet: fall back to a direct call
+            prompt = await self.groq_service.generate_prompt(game_type)
+
+        if prompt:
+            served.append(_prompt_key(prompt))
+        return prompt
+
+    def schedule_refill(self, game_type: str):
+        if len(self.fresh.get(game_type, ())) >= self.low_water:
+            return
+        task = self._refilling.get(game_type)
+        if task is not None and not task.done():
+            return
+        self._refilling[game_type] = asyncio.create_task(self._refill(game_type))
+
+    async def _refill(self, game_type: str):
+        queue = self.fresh.setdefault(game_type, deque())
+        try:
+            while len(queue) < self.high_water:
+                prompt = await self.groq_service.generate_prompt(game_type)
+                if not prompt:
+                    # No key or upstream failure: stop and retry on the next request
+                    break
+                queue.append(prompt)
+        except Exception as e:
+            print(f"Prompt pool refill failed for {game_type}: {e}")
+
+    def warm(self, game_types: List[str]):
+        for game_type in game_types:
+            self.schedule_refill(game_type)
+
+    async def aclose(self):
+        for task in self._refilling.values():
+            task.cancel()
+        self._refilling.clear()
@@ -0,0 +1,58 @@
+import copy
+import asyncio
+import hashlib
+from typing import Any, Awaitable, Callable, Dict
+
+
+def content_key(*parts: str) -> str:
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\x00")
+    return digest.hexdigest()
+
+
+class SingleFlight:
+    """
+    Coalesces identical concurrent coroutine calls: the first caller for a key starts the
+    call as a task, callers arriving while it runs await the same task.
+
+    The task is shielded, so a caller that disconnects does not cancel the call for the
+    others. Nothing is cached after the call finishes. Each caller gets its own deep copy
+    of the result, so callers may mutate it.
+    """
+
+    def __init__(self):
+        self._tasks: Dict[str, asyncio.Task] = {}
+        self.counters = {"executed": 0, "coalesced": 0, "failed": 0, "max_waiters": 0}
+        self._waiters: Dict[str, int] = {}
+
+    def _finished(self, key: str, task: asyncio.Task):
+        if self._tasks.get(key) is task:
+            del self._tasks[key]
+            self._waiters.pop(key, None)
+        # Mark the exception as retrieved even if every caller went away
+        if not task.cancelled() and task.exception() is not None:
+            self.counters["failed"] += 1
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        task = self._tasks.get(key)
+        if task is None:
+            task = asyncio.ensure_future(fn())
+            self._tasks[key] = task
+            self._waiters[key] = 0
+            self.counters["executed"] += 1
+            task.add_done_callback(lambda t: self._finished(key, t))
+        else:
+            self._waiters[key] += 1
+            self.counters["coalesced"] += 1
+            self.counters["max_waiters"] = max(self.counters["max_waiters"], self._waiters[key])
+        return copy.deepcopy(await asyncio.shield(task))
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.counters["executed"] + self.counters["coalesced"]
+        return {
+            **self.counters,
+            "in_flight": len(self._tasks),
+            "dedup_ratio": round(self.counters["coalesced"] / total, 4) if total else 0.0,
+        }
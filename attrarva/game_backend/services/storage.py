@@ -0,0 +1,291 @@
+import json
+import sqlite3
+import threading
+from datetime import datetime
+from typing import Dict, Any, Optional, Iterator, Iterable, Tuple, List
+
+# (user_id, xp delta, timestamp) as appended to the XP ledger
+XPEvent = Tuple[str, int, datetime]
+
+
+def _encode(data: Dict[str, Any]) -> str:
+    return json.dumps(data, default=lambda v: v.isoformat() if isinstance(v, datetime) else str(v))
+
+
+def _decode(raw: str) -> Dict[str, Any]:
+    data = json.loads(raw)
+    if isinstance(data.get("last_active"), str):
+        data["last_active"] = datetime.fromisoformat(data["last_active"])
+    return data
+
+
+class UserStore:
+    """
+    Storage interface for gamification user records.
+
+    `transaction()` must make a read-modify-write on one user atomic with respect to other
+    workers sharing the same store; `load()` inside it returns the committed state.
+    `shared` stores may be written by other processes, so derived indexes must poll
+    `iter_users(since=...)` for their changes.
+
+    The XP ledger is an append-only event log with increasing integer ids, so readers can
+    resume with `iter_events(after_id=...)`.
+
+    The game-event journal holds finished games (dicts keyed by a unique `event_id`) until
+    their stat updates are applied. `mark_game_event_applied()` flips an event to applied at
+    most once, so replaying the journal after a crash never double-counts a game.
+    """
+
+    shared = False
+
+    def load(self, user_id: str) -> Optional[Dict[str, Any]]:
+        raise NotImplementedError
+
+    def save_many(self, records: Iterable[Tuple[str, Dict[str, Any]]]):
+        raise NotImplementedError
+
+    def iter_users(self, since: Optional[datetime] = None) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        raise NotImplementedError
+
+    def append_events(self, events: Iterable[XPEvent]) -> List[int]:
+        raise NotImplementedError
+
+    def iter_events(self, after_id: int = 0, since: Optional[datetime] = None) -> Iterator[Tuple[int, str, int, datetime]]:
+        raise NotImplementedError
+
+    def delete_events(self, before: datetime) -> int:
+        raise NotImplementedError
+
+    def append_game_events(self, events: Iterable[Dict[str, Any]]):
+        raise NotImplementedError
+
+    def iter_pending_game_events(self) -> Iterator[Dict[str, Any]]:
+        raise NotImplementedError
+
+    def mark_game_event_applied(self, event_id: str) -> bool:
+        raise NotImplementedError
+
+    def delete_game_events(self, before: datetime) -> int:
+        raise NotImplementedError
+
+    def transaction(self):
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+
+class MemoryUserStore(UserStore):
+    """Process-local store; state is lost on restart. Useful for tests and demos."""
+
+    def __init__(self):
+        self._records: Dict[str, str] = {}
+        self._events: List[Tuple[int, str, int, datetime]] = []
+        self._next_event_id = 1
+        # event_id -> [payload, applied]; dicts keep insertion order for replay
+        self._game_events: Dict[str, List[Any]] = {}
+        self._lock = threading.RLock()
+
+    def load(self, user_id):
+        raw = self._records.get(user_id)
+        return _decode(raw) if raw is not None else None
+
+    def save_many(self, records):
+        for user_id, data in records:
+            self._records[user_id] = _encode(data)
+
+    def iter_users(self, since=None):
+        for user_id, raw in list(self._records.items()):
+            yield user_id, _decode(raw)
+
+    def append_events(self, events):
+        ids = []
+        for user_id, xp, ts in events:
+            self._events.append((self._next_event_id, user_id, xp, ts))
+            ids.append(self._next_event_id)
+            self._next_event_id += 1
+        return ids
+
+    def iter_events(self, after_id=0, since=None):
+        for event in list(self._events):
+            if event[0] > after_id and (since is None or event[3] >= since):
+                yield event
+
+    def delete_events(self, before):
+        kept = [event for event in self._events if event[3] >= before]
+        deleted = len(self._events) - len(kept)
+        self._events = kept
+        return deleted
+
+    def append_game_events(self, events):
+        with self._lock:
+            for event in events:
+                self._game_events.setdefault(event["event_id"], [dict(event), False])
+
+    def iter_pending_game_events(self):
+        with self._lock:
+            pending = [payload for payload, applied in self._game_events.values() if not applied]
+        yield from pending
+
+    def mark_game_event_applied(self, event_id):
+        with self._lock:
+            entry = self._game_events.get(event_id)
+            if entry is None or entry[1]:
+                return False
+            entry[1] = True
+            return True
+
+    def delete_game_events(self, before):
+        with self._lock:
+            expired = [
+                event_id for event_id, (payload, applied) in self._game_events.items()
+                if applied and payload["ts"] < before.timestamp()
+            ]
+            for event_id in expired:
+                del self._game_events[event_id]
+        return len(expired)
+
+    def transaction(self):
+        return self._lock
+
+
+class _SQLiteTransaction:
+    def __init__(self, store: "SQLiteUserStore"):
+        self.store = store
+
+    def __enter__(self):
+        store = self.store
+        store._lock.acquire()
+        if store._depth == 0:
+            # IMMEDIATE takes the write lock up front so concurrent workers serialize
+            store._conn.execute("BEGIN IMMEDIATE")
+        store._depth += 1
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        store = self.store
+        try:
+            store._depth -= 1
+            if store._depth == 0:
+                store._conn.execute("ROLLBACK" if exc_type else "COMMIT")
+        finally:
+            store._lock.release()
+        return False
+
+
+class SQLiteUserStore(UserStore):
+    """SQLite-backed store in WAL mode, safe to share between uvicorn workers on one host."""
+
+    shared = True
+
+    def __init__(self, path: str = "gamification.db", busy_timeout_ms: int = 5000):
+        self.path = path
+        self._conn = sqlite3.connect(path, isolation_level=None, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(f"PRAGMA busy_timeout={int(busy_timeout_ms)}")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS users ("
+            "user_id TEXT PRIMARY KEY, data TEXT NOT NULL, updated_at TEXT NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS users_updated_at ON users (updated_at)")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS xp_events ("
+            "id INTEGER PRIMARY KEY AUTOINCREMENT, user_id TEXT NOT NULL, xp INTEGER NOT NULL, ts TEXT NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS xp_events_ts ON xp_events (ts)")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS game_events ("
+            "seq INTEGER PRIMARY KEY AUTOINCREMENT, event_id TEXT NOT NULL UNIQUE, payload TEXT NOT NULL, "
+            "ts REAL NOT NULL, applied INTEGER NOT NULL DEFAULT 0)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS game_events_pending ON game_events (applied, seq)")
+        self._lock = threading.RLock()
+        self._depth = 0
+
+    def load(self, user_id):
+        with self._lock:
+            row = self._conn.execute("SELECT data FROM users WHERE user_id = ?", (user_id,)).fetchone()
+        return _decode(row[0]) if row else None
+
+    def save_many(self, records):
+        now = datetime.now().isoformat()
+        rows = [(user_id, _encode(data), now) for user_id, data in records]
+        if not rows:
+            return
+        with self.transaction():
+            self._conn.executemany(
+                "INSERT INTO users (user_id, data, updated_at) VALUES (?, ?, ?) "
+                "ON CONFLICT(user_id) DO UPDATE SET data = excluded.data, updated_at = excluded.updated_at",
+                rows,
+            )
+
+    def iter_users(self, since=None):
+        with self._lock:
+            if since is None:
+                rows = self._conn.execute("SELECT user_id, data FROM users").fetchall()
+            else:
+                rows = self._conn.execute(
+                    "SELECT user_id, data FROM users WHERE updated_at >= ?", (since.isoformat(),)
+                ).fetchall()
+        for user_id, raw in rows:
+            yield user_id, _decode(raw)
+
+    def append_events(self, events):
+        ids = []
+        with self.transaction():
+            for user_id, xp, ts in events:
+                cursor = self._conn.execute(
+                    "INSERT INTO xp_events (user_id, xp, ts) VALUES (?, ?, ?)", (user_id, xp, ts.isoformat())
+                )
+                ids.append(cursor.lastrowid)
+        return ids
+
+    def iter_events(self, after_id=0, since=None):
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id, user_id, xp, ts FROM xp_events WHERE id > ? AND ts >= ? ORDER BY id",
+                (after_id, since.isoformat() if since else ""),
+            ).fetchall()
+        for event_id, user_id, xp, ts in rows:
+            yield event_id, user_id, xp, datetime.fromisoformat(ts)
+
+    def delete_events(self, before):
+        with self.transaction():
+            cursor = self._conn.execute("DELETE FROM xp_events WHERE ts < ?", (before.isoformat(),))
+        return cursor.rowcount
+
+    def append_game_events(self, events):
+        rows = [(event["event_id"], json.dumps(event), event["ts"]) for event in events]
+        with self.transaction():
+            # Re-submitting a journaled event is a no-op, which keeps submission idempotent too
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO game_events (event_id, payload, ts) VALUES (?, ?, ?)", rows
+            )
+
+    def iter_pending_game_events(self):
+        with self._lock:
+            rows = self._conn.execute("SELECT payload FROM game_events WHERE applied = 0 ORDER BY seq").fetchall()
+        for (raw,) in rows:
+            yield json.loads(raw)
+
+    def mark_game_event_applied(self, event_id):
+        with self.transaction():
+            cursor = self._conn.execute(
+                "UPDATE game_events SET applied = 1 WHERE event_id = ? AND applied = 0", (event_id,)
+            )
+        return cursor.rowcount == 1
+
+    def delete_game_events(self, before):
+        with self.transaction():
+            cursor = self._conn.execute(
+                "DELETE FROM game_events WHERE applied = 1 AND ts < ?", (before.timestamp(),)
+            )
+        return cursor.rowcount
+
+    def transaction(self):
+        return _SQLiteTransaction(self)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,105 @@
+from datetime import datetime
+from enum import IntEnum
+from typing import Dict, Any, Tuple
+
+
+class Skill(IntEnum):
+    GRAMMAR = 0
+    VOCABULARY = 1
+    TONE_STYLE = 2
+    CONCISION = 3
+    COMPREHENSION = 4
+
+
+# Display names used by the spider chart, indexed by Skill
+SKILL_NAMES = ("Grammar", "Vocabulary", "Tone & Style", "Concision", "Comprehension")
+SKILL_BY_NAME = {name: Skill(i) for i, name in enumerate(SKILL_NAMES)}
+
+# game_type -> (base XP, trained skill); built once at import
+GAME_RULES: Dict[str, Tuple[int, Skill]] = {
+    "Tone Switcher": (60, Skill.TONE_STYLE),
+    "Word Choice Duel": (40, Skill.VOCABULARY),
+    "Redundancy Eraser": (30, Skill.CONCISION),
+    "Sentence Builder": (50, Skill.GRAMMAR),
+    "Sentence Reconstructor": (100, Skill.TONE_STYLE),
+    "Plot Hole Hunter": (80, Skill.COMPREHENSION),
+    "Dialogue Detective": (70, Skill.COMPREHENSION),
+    "Context Climber": (90, Skill.TONE_STYLE),
+    "Word Master": (50, Skill.GRAMMAR),
+    "Story Spinner": (120, Skill.TONE_STYLE),
+    "Logic MCQ": (40, Skill.GRAMMAR),
+    "Visual Vocab": (40, Skill.VOCABULARY),
+}
+DEFAULT_GAME_RULE = (30, Skill.GRAMMAR)
+
+DEFAULT_SKILL_SCORE = 10
+_DEFAULT_SKILLS = bytes([DEFAULT_SKILL_SCORE] * len(SKILL_NAMES))
+
+
+class UserState:
+    """
+    Compact per-user gamification record.
+
+    Fixed attributes live in __slots__ instead of a per-user dict, skill scores (0-100) are
+    one byte each in a bytearray indexed by Skill, and last_active is a POSIX timestamp.
+    Dicts are only built at the API and storage boundaries via to_dict/from_dict.
+    """
+
+    __slots__ = ("xp", "level", "streak", "win_streak", "hearts", "games_played", "games_won", "last_active", "skills")
+
+    def __init__(self, xp: int = 0, level: int = 1, streak: int = 1, win_streak: int = 0, hearts: int = 5,
+                 games_played: int = 0, games_won: int = 0, last_active: float = None, skills: bytearray = None):
+        self.xp = xp
+        self.level = level
+        self.streak = streak # daily streak
+        self.win_streak = win_streak # consecutive correct answers streak
+        self.hearts = hearts # life system
+        self.games_played = games_played
+        self.games_won = games_won
+        self.last_active = datetime.now().timestamp() if last_active is None else last_active
+        self.skills = bytearray(_DEFAULT_SKILLS) if skills is None else skills
+
+    def snapshot(self) -> tuple:
+        """Every field's value, for undoing an in-place update with restore()."""
+        return tuple(bytes(self.skills) if name == "skills" else getattr(self, name) for name in self.__slots__)
+
+    def restore(self, snapshot: tuple):
+        for name, value in zip(self.__slots__, snapshot):
+            setattr(self, name, bytearray(value) if name == "skills" else value)
+
+    def spider_chart_data(self) -> Dict[str, int]:
+        return dict(zip(SKILL_NAMES, self.skills))
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "xp": self.xp,
+            "level": self.level,
+            "streak": self.streak,
+            "win_streak": self.win_streak,
+            "hearts": self.hearts,
+            "games_played": self.games_played,
+            "games_won": self.games_won,
+            "last_active": datetime.fromtimestamp(self.last_active),
+            "spider_chart_data": self.spider_chart_data(),
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "UserState":
+        skills = bytearray(_DEFAULT_SKILLS)
+        for name, score in (data.get("spider_chart_data") or {}).items():
+            if name in SKILL_BY_NAME:
+                skills[SKILL_BY_NAME[name]] = max(0, min(int(score), 100))
+        last_active = data.get("last_active")
+        if isinstance(last_active, datetime):
+            last_active = last_active.timestamp()
+        return cls(
+            xp=data.get("xp", 0),
+            level=data.get("level", 1),
+            streak=data.get("streak", 1),
+            win_streak=data.get("win_streak", 0),
+            hearts=data.get("hearts", 5),
+            games_played=data.get("games_played", 0),
+            games_won=data.get("games_won", 0),
+            last_active=last_active,
+            skills=skills,
+        )
@@ -0,0 +1,116 @@
+import os
+import json
+import time
+import asyncio
+import hashlib
+from collections import OrderedDict
+from typing import Dict, Any, Optional
+
+from services.verification import normalize_answer, embed_texts
+
+
+def _normalize_context(value):
+    if isinstance(value, str):
+        return normalize_answer(value)
+    if isinstance(value, dict):
+        return {k: _normalize_context(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_normalize_context(v) for v in value]
+    return value
+
+
+class VerdictCache:
+    """
+    Caches LLM verification verdicts keyed on (game_type, normalized context, normalized input).
+
+    The exact tier is a hash lookup. The optional semantic tier compares the answer's
+    embedding with cached answers for the same game and context, and reuses a verdict only
+    above a strict similarity threshold. It only serves FREE_FORM_GAMES: where one word
+    decides the answer ("I want to repeat." vs "I want to repeat again.") near-identical
+    embeddings say nothing about correctness. Entries expire after `ttl` seconds and the least
+    recently used ones are evicted beyond `max_entries`.
+    """
+
+    # Games graded on meaning rather than an exact target
+    FREE_FORM_GAMES = frozenset({"Tone Switcher", "Sentence Reconstructor", "Plot Hole Hunter"})
+
+    def __init__(self, max_entries: int = None, ttl: float = None,
+                 semantic: bool = None, similarity_threshold: float = None):
+        self.max_entries = max_entries or int(os.getenv("VERDICT_CACHE_SIZE", 50000))
+        self.ttl = ttl or float(os.getenv("VERDICT_CACHE_TTL", 3600))
+        self.semantic = semantic if semantic is not None else os.getenv("VERDICT_CACHE_SEMANTIC", "false").lower() == "true"
+        self.similarity_threshold = similarity_threshold or float(os.getenv("VERDICT_CACHE_SIMILARITY", 0.95))
+
+        # exact key -> (expires_at, bucket key, verdict)
+        self.entries: "OrderedDict[str, tuple]" = OrderedDict()
+        # bucket key (game_type + context) -> exact key -> answer embedding
+        self.buckets: Dict[str, Dict[str, Any]] = {}
+        self.counters = {"exact_hits": 0, "semantic_hits": 0, "misses": 0, "evictions": 0}
+
+    @staticmethod
+    def _keys(game_type: str, context: dict, user_input: str):
+        bucket = json.dumps([game_type, _normalize_context(context or {})], sort_keys=True)
+        exact = hashlib.sha256(f"{bucket}\x00{normalize_answer(user_input)}".encode("utf-8")).hexdigest()
+        return hashlib.sha256(bucket.encode("utf-8")).hexdigest(), exact
+
+    def _drop(self, exact_key: str):
+        _, bucket_key, _ = self.entries.pop(exact_key)
+        bucket = self.buckets.get(bucket_key)
+        if bucket is not None:
+            bucket.pop(exact_key, None)
+            if not bucket:
+                del self.buckets[bucket_key]
+
+    def _live(self, exact_key: str) -> Optional[dict]:
+        entry = self.entries.get(exact_key)
+        if entry is None:
+            return None
+        if entry[0] < time.monotonic():
+            self._drop(exact_key)
+            return None
+        self.entries.move_to_end(exact_key)
+        return entry[2]
+
+    async def get(self, game_type: str, context: dict, user_input: str) -> Optional[dict]:
+        bucket_key, exact_key = self._keys(game_type, context, user_input)
+        verdict = self._live(exact_key)
+        if verdict is not None:
+            self.counters["exact_hits"] += 1
+            return verdict
+
+        bucket = self.buckets.get(bucket_key)
+        if self.semantic and bucket and game_type in self.FREE_FORM_GAMES:
+            embeddings = await asyncio.to_thread(embed_texts, [normalize_answer(user_input)])
+            if embeddings is not None:
+                best_key, best_score = None, self.similarity_threshold
+                for key, vector in list(bucket.items()):
+                    score = float(vector @ embeddings[0])
+                    if score >= best_score:
+                        best_key, best_score = key, score
+                verdict = self._live(best_key) if best_key else None
+                if verdict is not None:
+                    self.counters["semantic_hits"] += 1
+                    return verdict
+
+        self.counters["misses"] += 1
+        return None
+
+    async def put(self, game_type: str, context: dict, user_input: str, verdict: dict):
+        bucket_key, exact_key = self._keys(game_type, context, user_input)
+        if exact_key in self.entries:
+            self._drop(exact_key)
+        self.entries[exact_key] = (time.monotonic() + self.ttl, bucket_key, verdict)
+
+        if self.semantic and game_type in self.FREE_FORM_GAMES:
+            embeddings = await asyncio.to_thread(embed_texts, [normalize_answer(user_input)])
+            if embeddings is not None and exact_key in self.entries:
+                self.buckets.setdefault(bucket_key, {})[exact_key] = embeddings[0]
+
+        while len(self.entries) > self.max_entries:
+            self._drop(next(iter(self.entries)))
+            self.counters["evictions"] += 1
+
+    def stats(self) -> Dict[str, Any]:
+        hits = self.counters["exact_hits"] + self.counters["semantic_hits"]
+        lookups = hits + self.counters["misses"]
+        return {**self.counters, "size": len(self.entries), "hit_rate": hits / lookups if lookups else 0.0}
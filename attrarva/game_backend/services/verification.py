@@ -0,0 +1,223 @@
+import os
+import re
+import sys
+import asyncio
+from typing import Dict, Any, Optional, List
+
+from services.json_stream import JsonObjectStream
+from services.prompt_pool import REDUNDANCY_PROMPTS, SENTENCE_BUILDER_PROMPTS, PLOT_HOLE_PROMPTS
+
+# Models resolve through the AI engine's registry, whose package sits at the repository root
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "..")))
+from ai_engine.utils.model_registry import ModelUnavailableError, model_registry  # noqa: E402
+
+_NON_WORD = re.compile(r"[^\w\s']")
+
+
+def normalize_answer(text: str) -> str:
+    """Lowercase, drop punctuation and collapse whitespace for answer comparison."""
+    return " ".join(_NON_WORD.sub(" ", (text or "").lower()).split())
+
+
+_similarity_model = None
+_similarity_unavailable = False
+
+
+def load_similarity_model():
+    """
+    Load the local similarity model once, from MODEL_ARTIFACT_DIR only (see
+    ai_engine.utils.model_registry); nothing is downloaded. Called at startup so the first
+    request does not pay for it. Returns None if the artifact or sentence-transformers
+    is missing, in which case free-form answers go to the LLM judge.
+    """
+    global _similarity_model, _similarity_unavailable
+    if _similarity_model is None and not _similarity_unavailable:
+        try:
+            # The registry loads each model once under its own lock
+            _similarity_model = model_registry.load(os.getenv("LOCAL_VERIFIER_MODEL", "all-MiniLM-L6-v2"))
+        except ModelUnavailableError as e:
+            print(f"Local similarity model unavailable: {e}")
+            _similarity_unavailable = True
+    return _similarity_model
+
+
+def embed_texts(texts: List[str]):
+    """Unit-normalized sentence embeddings from the local similarity model, or None without it."""
+    model = load_similarity_model()
+    if model is None:
+        return None
+    return model.encode(texts, normalize_embeddings=True, convert_to_numpy=True)
+
+
+def token_edit_distance(a: List[str], b: List[str]) -> int:
+    """Levenshtein distance over word tokens."""
+    previous = list(range(len(b) + 1))
+    for i, token_a in enumerate(a, 1):
+        current = [i]
+        for j, token_b in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (token_a != token_b)))
+        previous = current
+    return previous[-1]
+
+
+class VerificationEngine:
+    """
+    Tiered answer verification.
+
+    Games with a known answer are checked locally first: normalized exact match, then
+    token edit distance, then (for free-form explanations) embedding similarity against
+    the reference. Only results that stay ambiguous are escalated to the LLM judge.
+    """
+
+    # Answers this far (relative to the expected length) from the target are clear misses
+    MISS_EDIT_RATIO = 0.5
+    SIMILARITY_PASS = 0.8
+    SIMILARITY_FAIL = 0.3
+    # Free-text fields of a verdict that verify_stream() sends progressively
+    STREAMED_FIELDS = ("reason", "correct_answer")
+
+    def __init__(self, groq_service, verdict_cache=None):
+        self.groq_service = groq_service
+        self.verdict_cache = verdict_cache
+        self.redundancy_answers = {normalize_answer(bad): good for bad, good in REDUNDANCY_PROMPTS}
+        self.plot_hole_answers = {normalize_answer(story): hole for story, hole in PLOT_HOLE_PROMPTS}
+        self.builder_targets = {self._words_key(p["words"]): p["target"] for p in SENTENCE_BUILDER_PROMPTS}
+        self.counters = {"total": 0, "local": 0, "cached": 0, "escalated": 0}
+
+    @staticmethod
+    def _words_key(words) -> tuple:
+        return tuple(sorted(normalize_answer(str(w)) for w in words))
+
+    def _expected_answer(self, game_type: str, context: dict) -> Optional[str]:
+        """
+        Reference answer from the server-side game_data tables, looked up by the prompt.
+        Answers the client sends in `context` are never trusted: anything not in the
+        tables (e.g. AI-generated prompts) goes to the LLM judge.
+        """
+        if game_type == "Sentence Builder":
+            words = context.get("words")
+            return self.builder_targets.get(self._words_key(words)) if isinstance(words, list) else None
+        if game_type == "Redundancy Eraser":
+            return self.redundancy_answers.get(normalize_answer(context.get("original") or context.get("bad")))
+        if game_type == "Plot Hole Hunter":
+            return self.plot_hole_answers.get(normalize_answer(context.get("original") or context.get("story")))
+        return None
+
+    def _check_exact(self, user_input: str, expected: str) -> Optional[Dict[str, Any]]:
+        answer_tokens = normalize_answer(user_input).split()
+        expected_tokens = normalize_answer(expected).split()
+        if answer_tokens == expected_tokens:
+            return {"success": True, "reason": "Exactly right!", "mastery_level": 1.0, "correct_answer": expected}
+
+        distance = token_edit_distance(answer_tokens, expected_tokens)
+        if distance >= max(3, self.MISS_EDIT_RATIO * len(expected_tokens)):
+            return {
+                "success": False,
+                "reason": "Your answer is quite different from the expected sentence.",
+                "mastery_level": max(0.0, 1.0 - distance / max(len(expected_tokens), 1)) * 0.5,
+                "correct_answer": expected,
+            }
+        # Close but not identical: could be a valid alternative, let the judge decide
+        return None
+
+    @staticmethod
+    def _similarity(a: str, b: str) -> Optional[float]:
+        embeddings = embed_texts([a, b])
+        if embeddings is None:
+            return None
+        return float(embeddings[0] @ embeddings[1])
+
+    async def _check_explanation(self, user_input: str, expected: str) -> Optional[Dict[str, Any]]:
+        score = await asyncio.to_thread(self._similarity, user_input, expected)
+        if score is None:
+            return None
+        if score >= self.SIMILARITY_PASS:
+            return {"success": True, "reason": "You spotted the plot hole.", "mastery_level": round(score, 2), "correct_answer": expected}
+        if score <= self.SIMILARITY_FAIL:
+            return {"success": False, "reason": "That doesn't match the plot hole in the story.", "mastery_level": round(max(score, 0.0), 2), "correct_answer": expected}
+        return None
+
+    async def _verify_without_llm(self, game_type: str, user_input: str, context: dict) -> Optional[dict]:
+        """Local check, then the verdict cache. Returns None if the LLM judge is needed."""
+        self.counters["total"] += 1
+        expected = self._expected_answer(game_type, context)
+
+        result = None
+        if expected:
+            if game_type == "Plot Hole Hunter":
+                result = await self._check_explanation(user_input, expected)
+            else:
+                result = self._check_exact(user_input, expected)
+
+        if result is not None:
+            self.counters["local"] += 1
+            return result
+
+        if self.verdict_cache is not None:
+            cached = await self.verdict_cache.get(game_type, context, user_input)
+            if cached is not None:
+                self.counters["cached"] += 1
+                return cached
+
+        self.counters["escalated"] += 1
+        return None
+
+    @staticmethod
+    def _cacheable(result) -> bool:
+        """Only whole verdicts are cached."""
+        return (
+            isinstance(result, dict)
+            and isinstance(result.get("success"), bool)
+            and isinstance(result.get("mastery_level"), (int, float))
+        )
+
+    async def verify(self, game_type: str, user_input: str, context: dict) -> dict:
+        result = await self._verify_without_llm(game_type, user_input, context)
+        if result is not None:
+            return result
+
+        result = await self.groq_service.verify_answer(game_type, user_input, context)
+        if self._cacheable(result) and self.verdict_cache is not None:
+            await self.verdict_cache.put(game_type, context, user_input, result)
+        return result
+
+    async def verify_stream(self, game_type: str, user_input: str, context: dict):
+        """
+        Streaming form of verify(). Yields ("verdict", {"success", "mastery_level"}) as soon
+        as both are known, ("text", {"field", "delta"}) pieces of `reason` and
+        `correct_answer`, and finally ("final", result). Exactly one verdict always precedes
+        the final result; local and cached verdicts are emitted all at once.
+        """
+        result = await self._verify_without_llm(game_type, user_input, context)
+        if result is not None:
+            yield "verdict", {"success": result.get("success", False), "mastery_level": result.get("mastery_level", 0.0)}
+            for field in self.STREAMED_FIELDS:
+                if result.get(field):
+                    yield "text", {"field": field, "delta": result[field]}
+            yield "final", result
+            return
+
+        parser = JsonObjectStream()
+        verdict_sent = False
+        async for chunk in self.groq_service.stream_verify_answer(game_type, user_input, context):
+            for kind, key, value in parser.feed(chunk):
+                if kind == "text" and key in self.STREAMED_FIELDS:
+                    yield "text", {"field": key, "delta": value}
+            if not verdict_sent and "success" in parser.values and "mastery_level" in parser.values:
+                verdict_sent = True
+                yield "verdict", {"success": parser.values["success"], "mastery_level": parser.values["mastery_level"]}
+
+        result = parser.result()
+        if not verdict_sent:
+            yield "verdict", {"success": result.get("success", False), "mastery_level": result.get("mastery_level", 0.0)}
+        # A cut-off stream leaves a partial object, which must not be served to later answers
+        if parser.complete and self._cacheable(result) and self.verdict_cache is not None:
+            await self.verdict_cache.put(game_type, context, user_input, result)
+        yield "final", result
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.counters["total"]
+        stats = {**self.counters, "local_fraction": self.counters["local"] / total if total else 0.0}
+        if self.verdict_cache is not None:
+            stats["verdict_cache"] = self.verdict_cache.stats()
+        return stats
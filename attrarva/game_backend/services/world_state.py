@@ -0,0 +1,165 @@
+import json
+import sqlite3
+import sys
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+# (location, organization, last-seen sentence index) for one entity of a story
+EntityFact = Tuple[Optional[str], Optional[str], int]
+
+
+class StoryState:
+    """
+    Compact world state of one user's story.
+
+    Entity names and places are interned, since the same few strings repeat across
+    many stories, and facts are immutable tuples replaced on update. `sentences` is the
+    number of sentences seen so far, so last-seen indexes are story-wide.
+    """
+
+    __slots__ = ("entities", "sentences", "touched")
+
+    def __init__(self, entities: Dict[str, EntityFact] = None, sentences: int = 0, touched: float = None):
+        self.entities = entities if entities is not None else {}
+        self.sentences = sentences
+        self.touched = time.time() if touched is None else touched
+
+    def get(self, entity: str) -> Optional[EntityFact]:
+        return self.entities.get(entity)
+
+    def set(self, entity: str, location: Optional[str], organization: Optional[str], last_seen: int,
+            max_entities: int):
+        entity = sys.intern(entity)
+        self.entities.pop(entity, None)
+        self.entities[entity] = (
+            sys.intern(location) if location else None,
+            sys.intern(organization) if organization else None,
+            last_seen,
+        )
+        # Dicts keep insertion order, so the first entry is the least recently seen
+        while len(self.entities) > max_entities:
+            del self.entities[next(iter(self.entities))]
+
+    def to_json(self) -> str:
+        return json.dumps({"e": self.entities, "s": self.sentences, "t": self.touched})
+
+    @classmethod
+    def from_json(cls, raw: str) -> "StoryState":
+        data = json.loads(raw)
+        entities = {
+            sys.intern(name): (
+                sys.intern(loc) if loc else None,
+                sys.intern(org) if org else None,
+                seen,
+            )
+            for name, (loc, org, seen) in data["e"].items()
+        }
+        return cls(entities, data["s"], data["t"])
+
+
+class WorldStateStore:
+    """
+    Bounded map of user_id -> StoryState.
+
+    At most `max_stories` stories are kept in memory in LRU order; the least recently used
+    are spilled to a SQLite file at `spill_path` (or dropped if it is None) and reloaded on
+    their next access. Stories idle for longer than `ttl_seconds` expire from memory and
+    disk. Each story keeps its `max_entities` most recently seen entities.
+    """
+
+    # Seconds between sweeps of expired spilled stories
+    PURGE_INTERVAL = 60.0
+
+    def __init__(self, max_stories: int = 50000, ttl_seconds: float = 86400.0,
+                 spill_path: Optional[str] = None, max_entities: int = 64):
+        self.max_stories = max_stories
+        self.ttl_seconds = ttl_seconds
+        self.max_entities = max_entities
+        self._hot: "OrderedDict[str, StoryState]" = OrderedDict()
+        self._lock = threading.RLock()
+        self._purged_at = time.monotonic()
+        self.counters = {"hits": 0, "reloads": 0, "misses": 0, "spilled": 0, "expired": 0}
+        self._conn = None
+        if spill_path:
+            self._conn = sqlite3.connect(spill_path, isolation_level=None, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS stories (user_id TEXT PRIMARY KEY, data TEXT NOT NULL, touched REAL NOT NULL)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS stories_touched ON stories (touched)")
+
+    def get(self, user_id: str) -> StoryState:
+        """The user's story, loaded from disk or created if needed, marked most recently used."""
+        with self._lock:
+            now = time.time()
+            self._expire(now)
+            story = self._hot.pop(user_id, None)
+            if story is not None:
+                self.counters["hits"] += 1
+            else:
+                story = self._reload(user_id, now)
+            story.touched = now
+            self._hot[user_id] = story
+            while len(self._hot) > self.max_stories:
+                self._spill(*self._hot.popitem(last=False))
+            return story
+
+    def _reload(self, user_id: str, now: float) -> StoryState:
+        if self._conn is not None:
+            row = self._conn.execute("SELECT data FROM stories WHERE user_id = ?", (user_id,)).fetchone()
+            if row:
+                story = StoryState.from_json(row[0])
+                if now - story.touched <= self.ttl_seconds:
+                    self.counters["reloads"] += 1
+                    return story
+        self.counters["misses"] += 1
+        return StoryState()
+
+    def _spill(self, user_id: str, story: StoryState):
+        if self._conn is None:
+            return
+        self._conn.execute(
+            "INSERT INTO stories (user_id, data, touched) VALUES (?, ?, ?) "
+            "ON CONFLICT(user_id) DO UPDATE SET data = excluded.data, touched = excluded.touched",
+            (user_id, story.to_json(), story.touched),
+        )
+        self.counters["spilled"] += 1
+
+    def _expire(self, now: float):
+        # LRU order is also idle-time order, so expired stories sit at the front
+        cutoff = now - self.ttl_seconds
+        while self._hot:
+            user_id, story = next(iter(self._hot.items()))
+            if story.touched > cutoff:
+                break
+            del self._hot[user_id]
+            self.counters["expired"] += 1
+        if self._conn is not None and time.monotonic() - self._purged_at >= self.PURGE_INTERVAL:
+            self._conn.execute("DELETE FROM stories WHERE touched < ?", (cutoff,))
+            self._purged_at = time.monotonic()
+
+    def __len__(self) -> int:
+        return len(self._hot)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {**self.counters, "in_memory": len(self._hot)}
+
+    def flush(self):
+        """Spill every in-memory story so a restart can resume them."""
+        with self._lock:
+            if self._conn is None:
+                return
+            self._conn.execute("BEGIN")
+            for user_id, story in self._hot.items():
+                self._spill(user_id, story)
+            self._conn.execute("COMMIT")
+
+    def close(self):
+        self.flush()
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
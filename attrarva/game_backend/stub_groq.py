@@ -0,0 +1,88 @@
+"""
+Offline stand-in for the Groq chat-completions API.
+
+Serves canned, deterministic exercises and judgements in the OpenAI-compatible format,
+including `"stream": true` responses sent token by token, so the backend can be run and
+tested without network access:
+
+    python stub_groq.py --port 8099 --token-delay 0.02
+    GROQ_API_URL=http://127.0.0.1:8099/v1/chat/completions GROQ_API_KEY=stub uvicorn main:app
+"""
+import argparse
+import json
+import re
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+def judge(user_msg: str) -> dict:
+    match = re.search(r"User Input: (.*)", user_msg, re.S)
+    answer = match.group(1).strip() if match else ""
+    words = len(answer.split())
+    success = words >= 3
+    return {
+        "success": success,
+        "mastery_level": round(min(words / 12, 1.0), 2) if success else 0.2,
+        "reason": (
+            "The answer reads naturally and keeps the meaning of the original while meeting the goal of the exercise."
+            if success else
+            "The answer is too short to show the requested change; try rewriting the whole sentence."
+        ),
+        "correct_answer": "I would be grateful if you could send the report by Friday.",
+    }
+
+
+def exercise(user_msg: str) -> dict:
+    return {"text": f"Stub exercise. {user_msg}", "hint": "Read the sentence aloud before you answer."}
+
+
+def completion(system_msg: str, user_msg: str) -> str:
+    result = judge(user_msg) if "judge" in system_msg else exercise(user_msg)
+    return json.dumps(result)
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    token_delay = 0.0
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+        messages = body.get("messages", [])
+        system_msg = next((m["content"] for m in messages if m["role"] == "system"), "")
+        user_msg = next((m["content"] for m in messages if m["role"] == "user"), "")
+        content = completion(system_msg, user_msg)
+
+        if not body.get("stream"):
+            payload = json.dumps({"choices": [{"message": {"role": "assistant", "content": content}}]}).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.end_headers()
+        # Roughly token-sized pieces: words plus the punctuation between them
+        for piece in re.findall(r"\s*[^\s]{1,6}", content):
+            chunk = {"choices": [{"delta": {"content": piece}}]}
+            self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode())
+            self.wfile.flush()
+            time.sleep(self.token_delay)
+        self.wfile.write(b"data: [DONE]\n\n")
+
+    def log_message(self, format, *args):
+        pass
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Stub Groq chat-completions server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8099)
+    parser.add_argument("--token-delay", type=float, default=0.02, help="seconds between streamed chunks")
+    args = parser.parse_args()
+
+    StubHandler.token_delay = args.token_delay
+    server = ThreadingHTTPServer((args.host, args.port), StubHandler)
+    print(f"Stub Groq API on http://{args.host}:{args.port}/v1/chat/completions")
+    server.serve_forever()
@@ -61,7 +61,7 @@ export default function GameSession() {
     const getGameConfig = () => {
         switch (gameId) {
             case 'redundancy': return { title: 'Redundancy Eraser', backendName: 'Redundancy Eraser', getContext: () => ({ original: currentPrompt?.bad }), getInstruction: () => `Remove redundant words from: "${currentPrompt?.bad}"` };
-            case 'sentence-builder': return { title: 'Sentence Builder', backendName: 'Sentence Builder', getContext: () => ({ target_sentence: currentPrompt?.target }), getInstruction: () => `Unscramble: ${(currentPrompt?.words || []).join(', ')}` };
+            case 'sentence-builder': return { title: 'Sentence Builder', backendName: 'Sentence Builder', getContext: () => ({ target_sentence: currentPrompt?.target, words: currentPrompt?.words }), getInstruction: () => `Unscramble: ${(currentPrompt?.words || []).join(', ')}` };
             case 'reconstructor': return { title: 'Sentence Reconstructor', backendName: 'Sentence Reconstructor', getContext: () => ({ original: currentPrompt?.original }), getInstruction: () => `Make this sound more ${currentPrompt?.tone}: "${currentPrompt?.original}"` };
             case 'plot-hole': return { title: 'Plot Hole Hunter', backendName: 'Plot Hole Hunter', getContext: () => ({ original: currentPrompt?.story }), getInstruction: () => `Identify the plot hole in: "${currentPrompt?.story}"` };
             case 'tone-switcher': return { title: 'Tone Switcher', backendName: 'Tone Switcher', getContext: () => ({ target_tone: currentPrompt?.tone }), getInstruction: () => `Rewrite this to sound ${currentPrompt?.tone}: "${currentPrompt?.original}"` };
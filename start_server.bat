@@ -32,6 +32,19 @@ if %errorlevel% neq 0 (
     pip install -r requirements.txt
 )
 
+REM Models load from local artifacts only (ai_engine/artifacts); fetch them once if any required one is missing
+echo 🔎 Checking model artifacts...
+python -m ai_engine.utils.model_registry status >nul 2>&1
+if %errorlevel% neq 0 (
+    echo 📦 Required models missing, fetching them ^(needs network^)...
+    python -m ai_engine.utils.model_registry fetch
+    if !errorlevel! neq 0 (
+        echo ❌ Model artifacts are still not ready; see the report above.
+        pause
+        exit /b 1
+    )
+)
+
 REM Start the server
 echo.
 echo ✅ Starting FastAPI server...
@@ -34,6 +34,19 @@ catch {
     pip install -r requirements.txt
 }
 
+# Models load from local artifacts only (ai_engine/artifacts); fetch them once if any required one is missing
+Write-Host "🔎 Checking model artifacts..." -ForegroundColor Yellow
+python -m ai_engine.utils.model_registry status *> $null
+if ($LASTEXITCODE -ne 0) {
+    Write-Host "📦 Required models missing, fetching them (needs network)..." -ForegroundColor Yellow
+    python -m ai_engine.utils.model_registry fetch
+    if ($LASTEXITCODE -ne 0) {
+        Write-Host "❌ Model artifacts are still not ready; see the report above." -ForegroundColor Red
+        Read-Host "Press Enter to exit"
+        exit 1
+    }
+}
+
 # Display server info
 Write-Host ""
 Write-Host "✅ Starting FastAPI server..." -ForegroundColor Green